@@ -0,0 +1,11 @@
+
+"""
+Command line entry of this app. It searches
+without the interface and doesn't need PyQt5.
+"""
+import sys
+from lib.cli import main
+
+
+if __name__ == "__main__":
+    sys.exit(main())
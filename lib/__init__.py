@@ -1,4 +1,36 @@
-
-from .interface import *
+"""
+The package loads just the constants when it's
+imported. The search engine is imported from
+lib.logic and the interface, which needs PyQt5,
+is loaded at the first use of its names or when
+run_app is called.
+"""
+from importlib import import_module
 from .constants import *
-from .logic.search_algorithm import SearchProcess
+
+
+def run_app() -> None:
+    """
+    Import the interface and run the Qt
+    application.
+    """
+    from .interface.app import run_app
+    run_app()
+
+
+def __getattr__(name: str) -> object:
+    """
+    The interface names are loaded at the first
+    use, so the search engine and the command
+    line mode don't import PyQt5.
+    """
+    if name.startswith("__"):
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    if name == "SearchProcess":
+        from .logic.search_algorithm import SearchProcess
+        return SearchProcess
+    interface = import_module(f"{__name__}.interface")
+    try:
+        return getattr(interface, name)
+    except AttributeError:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}") from None
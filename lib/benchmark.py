@@ -0,0 +1,439 @@
+"""
+Benchmarks of the search engine on reproducible
+synthetic trees. Each mode is measured in its
+own process, so the peak memory of a mode is
+not affected by the others.
+-----------------------------------------------
+@usage:
+    python -m lib.benchmark run --output baseline.json
+    python -m lib.benchmark compare baseline.json
+    python -m lib.benchmark compare baseline.json current.json
+"""
+import os
+import sys
+import json
+import random
+import argparse
+import tempfile
+import subprocess
+from time import perf_counter
+from statistics import median
+from threading import Event
+from multiprocessing import active_children
+from .logic.search_algorithm import SearchProcess
+
+try:
+    import resource
+except ImportError:
+    # Not available on Windows
+    resource = None
+
+TARGET = "needle"
+
+# Criteria of SearchProcess in each benchmark mode
+MODES = {
+    "names": {},
+    "threads": {"in_file_search": True},
+    "processes": {"in_file_search": True, "execution_mode": "processes"},
+    "index": {"use_index": True},
+}
+
+# Metrics that a higher value of them is better
+THROUGHPUT_METRICS = ("dirs_per_second", "files_per_second", "mb_per_second")
+# Metrics that a lower value of them is better
+COST_METRICS = ("time_to_first_result", "peak_rss_mb", "children_peak_rss_mb")
+
+FILLER_WORDS = ("alpha", "bravo", "charlie", "delta", "echo", "foxtrot",
+                "golf", "hotel", "india", "juliett", "kilo", "lima")
+
+
+class SyntheticTree:
+    """
+    Generates a directories tree with the same
+    names and contents for the same parameters
+    and seed. A manifest file keeps the totals
+    of the tree, and an existing tree with the
+    same parameters is reused.
+    """
+    MANIFEST_NAME = "benchmark-tree.json"
+
+    def __init__(self,
+                 root: str = None,
+                 depth: int = 3,
+                 fan_out: int = 4,
+                 files_per_directory: int = 20,
+                 file_size: int = 8,
+                 match_density: float = 0.01,
+                 seed: int = 0) -> None:
+        """
+        ---------------------------------------
+        -> Params
+            root: str
+                default is a directory in the temp
+                directory named by the parameters
+            depth: int
+                levels of the sub directories
+            fan_out: int
+                sub directories of each directory
+            files_per_directory: int
+            file_size: int
+                Kilobyte
+            match_density: float
+                part of the files that their names
+                and their contents have the target
+            seed: int
+        """
+        if depth < 0 or fan_out < 1 or files_per_directory < 0 or file_size < 0:
+            raise ValueError("invalid tree parameters -> "
+                             f"<{depth}, {fan_out}, {files_per_directory}, {file_size}>")
+        if not 0 <= match_density <= 1:
+            raise ValueError(f"invalid match density -> <{match_density}>")
+        self.params = {"depth": depth,
+                       "fan_out": fan_out,
+                       "files_per_directory": files_per_directory,
+                       "file_size": file_size,
+                       "match_density": match_density,
+                       "seed": seed}
+        if root is None:
+            name = "-".join(str(value) for value in self.params.values())
+            root = os.path.join(tempfile.gettempdir(), f"advance-search-benchmark-{name}")
+        self.root = root
+        self.totals = None
+
+    def generate(self) -> dict:
+        """
+        Create the tree if it doesn't exist and
+        return its totals.
+        ----------------------------------------
+        <- Return
+            dict
+        """
+        manifest_path = os.path.join(self.root, self.MANIFEST_NAME)
+        try:
+            with open(manifest_path) as file:
+                manifest = json.load(file)
+            if manifest["params"] == self.params:
+                self.totals = manifest["totals"]
+                return self.totals
+        except (OSError, ValueError, KeyError):
+            pass
+        rng = random.Random(self.params["seed"])
+        filler = " ".join(rng.choice(FILLER_WORDS)
+                          for _ in range(16 * 1024)).encode()
+        self.totals = {"dirs": 0, "files": 0, "bytes": 0,
+                       "name_matches": 0, "content_matches": 0}
+        self.create_directory(self.root, 0, rng, filler)
+        with open(manifest_path, "w") as file:
+            json.dump({"params": self.params, "totals": self.totals}, file)
+        return self.totals
+
+    def create_directory(self,
+                         dir_path: str,
+                         level: int,
+                         rng: random.Random,
+                         filler: bytes) -> None:
+        """
+        Create a directory with its files and its
+        sub directories recursively.
+        -----------------------------------------
+        -> Params
+            dir_path: str
+            level: int
+            rng: random.Random
+            filler: bytes
+        """
+        os.makedirs(dir_path, exist_ok=True)
+        self.totals["dirs"] += 1
+        size = self.params["file_size"] * 1024
+        density = self.params["match_density"]
+        for index in range(self.params["files_per_directory"]):
+            name = f"file_{index}.txt"
+            if rng.random() < density:
+                name = f"file_{index}_{TARGET}.txt"
+                self.totals["name_matches"] += 1
+            start = rng.randrange(max(1, len(filler) - size))
+            content = filler[start:start + size]
+            if rng.random() < density:
+                position = rng.randrange(max(1, len(content)))
+                content = content[:position] + TARGET.encode() + content[position:]
+                self.totals["content_matches"] += 1
+            with open(os.path.join(dir_path, name), "wb") as file:
+                file.write(content)
+            self.totals["files"] += 1
+            self.totals["bytes"] += len(content)
+        if level < self.params["depth"]:
+            for index in range(self.params["fan_out"]):
+                self.create_directory(os.path.join(dir_path, f"dir_{index}"),
+                                      level + 1, rng, filler)
+
+
+def get_peak_rss(is_children: bool = False) -> float:
+    """
+    Returns the peak resident memory of the
+    process in Megabyte, or None when it's not
+    available.
+    -------------------------------------------
+    -> Params
+        is_children: bool
+            the peak of the largest terminated
+            child process instead, like the
+            process pool workers
+    <- Return
+        float
+    """
+    if resource is None:
+        return None
+    who = resource.RUSAGE_CHILDREN if is_children else resource.RUSAGE_SELF
+    peak = resource.getrusage(who).ru_maxrss
+    # It's in bytes on macOS and in Kilobytes on Linux
+    if sys.platform == "darwin":
+        return peak / (1024 * 1024)
+    return peak / 1024
+
+
+def measure(root: str, mode: str, index_path: str) -> dict:
+    """
+    Search the target in the tree once with the
+    criteria of the mode.
+    -------------------------------------------
+    -> Params
+        root: str
+        mode: str
+        index_path: str
+    <- Return
+        dict: elapsed, time to first result,
+              results count and peak RSS of the
+              process and of its children
+    """
+    finished = Event()
+    first_result = list()
+    results_count = [0]
+
+    def get_results(results: list) -> None:
+        if not first_result:
+            first_result.append(perf_counter())
+        results_count[0] += len(results)
+
+    search_process = SearchProcess(signal_callback=get_results,
+                                   finish_search_callback=finished.set,
+                                   index_path=index_path,
+                                   **MODES[mode])
+    if search_process.use_index:
+        # Building the index is not measured
+        search_process.index.build(paths=[root])
+    start = perf_counter()
+    search_process.search(targets=[TARGET], paths=[root])
+    finished.wait()
+    elapsed = perf_counter() - start
+    # The pool processes are counted in the children peak
+    # once they are joined
+    for child in active_children():
+        child.join()
+    return {"elapsed": elapsed,
+            "time_to_first_result": first_result[0] - start if first_result else None,
+            "results": results_count[0],
+            "peak_rss_mb": get_peak_rss(),
+            "children_peak_rss_mb": get_peak_rss(is_children=True)}
+
+
+def run_mode(root: str, mode: str, index_path: str) -> dict:
+    """
+    Measure a mode in a new Python process.
+    ---------------------------------------
+    -> Params
+        root: str
+        mode: str
+        index_path: str
+    <- Return
+        dict
+    """
+    output = subprocess.run(
+        [sys.executable, "-m", "lib.benchmark", "measure", root, mode, index_path],
+        check=True, capture_output=True, text=True,
+        cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__)))).stdout
+    return json.loads(output)
+
+
+def run_benchmark(tree: SyntheticTree,
+                  modes: list,
+                  repeat: int = 3) -> dict:
+    """
+    Measure each mode on the tree and return the
+    median of the repeats as the report.
+    -------------------------------------------
+    -> Params
+        tree: SyntheticTree
+        modes: list of str
+        repeat: int
+    <- Return
+        dict
+    """
+    totals = tree.generate()
+    report = {"tree": tree.params,
+              "root": tree.root,
+              "totals": totals,
+              "python": sys.version.split()[0],
+              "platform": sys.platform,
+              "modes": dict()}
+    with tempfile.TemporaryDirectory() as directory:
+        index_path = os.path.join(directory, "index.db")
+        for mode in modes:
+            runs = [run_mode(tree.root, mode, index_path) for _ in range(repeat)]
+            elapsed = median(run["elapsed"] for run in runs)
+            first_results = [run["time_to_first_result"] for run in runs
+                             if run["time_to_first_result"] is not None]
+            peaks = [run["peak_rss_mb"] for run in runs if run["peak_rss_mb"] is not None]
+            children_peaks = [run["children_peak_rss_mb"] for run in runs
+                              if run["children_peak_rss_mb"] is not None]
+            is_reading = MODES[mode].get("in_file_search", False)
+            report["modes"][mode] = {
+                "elapsed": elapsed,
+                "dirs_per_second": totals["dirs"] / elapsed,
+                "files_per_second": totals["files"] / elapsed,
+                "mb_per_second": totals["bytes"] / (1024 * 1024) / elapsed if is_reading else None,
+                "time_to_first_result": median(first_results) if first_results else None,
+                "peak_rss_mb": max(peaks) if peaks else None,
+                "children_peak_rss_mb": max(children_peaks) if children_peaks else None,
+                "results": runs[0]["results"],
+            }
+    return report
+
+
+def compare_reports(baseline: dict,
+                    current: dict,
+                    threshold: float = 0.1) -> list:
+    """
+    Returns the regressions of the current report
+    against the baseline, the throughput metrics
+    that are lower and the cost metrics that are
+    higher by more than the threshold.
+    ---------------------------------------------
+    -> Params
+        baseline: dict
+        current: dict
+        threshold: float
+            0.1 means 10 percent
+    <- Return
+        list of str
+    """
+    regressions = list()
+    for mode, base_metrics in baseline["modes"].items():
+        metrics = current["modes"].get(mode)
+        if metrics is None:
+            continue
+        if metrics["results"] != base_metrics["results"]:
+            regressions.append(f"{mode}: results {base_metrics['results']} -> {metrics['results']}")
+        for name in THROUGHPUT_METRICS + COST_METRICS:
+            base_value, value = base_metrics.get(name), metrics.get(name)
+            if not base_value or value is None:
+                continue
+            change = (value - base_value) / base_value
+            if name in THROUGHPUT_METRICS:
+                change = -change
+            if change > threshold:
+                regressions.append(f"{mode}: {name} {base_value:.4g} -> {value:.4g} "
+                                   f"({change:+.0%} worse)")
+    return regressions
+
+
+def print_report(report: dict) -> None:
+    """
+    Print the metrics of the report as a table.
+    -------------------------------------------
+    -> Params
+        report: dict
+    """
+    names = ("elapsed",) + THROUGHPUT_METRICS + COST_METRICS + ("results",)
+    print("mode".ljust(10) + "".join(name.rjust(22) for name in names))
+    for mode, metrics in report["modes"].items():
+        # Older reports may miss the newer metrics
+        values = ("-" if metrics.get(name) is None else f"{metrics[name]:.4g}"
+                  for name in names)
+        print(mode.ljust(10) + "".join(value.rjust(22) for value in values))
+
+
+def get_parser() -> argparse.ArgumentParser:
+    """
+    Returns the parser of the benchmark
+    commands.
+    """
+    parser = argparse.ArgumentParser(prog="python -m lib.benchmark",
+                                     description="Benchmarks of the search engine.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run = commands.add_parser("run", help="measure the modes and save the report")
+    run.add_argument("--output", help="path of the JSON report")
+    run.add_argument("--tree", help="directory of the synthetic tree")
+    run.add_argument("--depth", type=int, default=3)
+    run.add_argument("--fan-out", type=int, default=4)
+    run.add_argument("--files-per-directory", type=int, default=20)
+    run.add_argument("--file-size", type=int, default=8, help="Kilobyte")
+    run.add_argument("--match-density", type=float, default=0.01)
+    run.add_argument("--seed", type=int, default=0)
+    run.add_argument("--modes", nargs="+", choices=tuple(MODES), default=list(MODES))
+    run.add_argument("--repeat", type=int, default=3)
+
+    compare = commands.add_parser(
+        "compare", help="flag the regressions against a baseline report")
+    compare.add_argument("baseline", help="path of the baseline report")
+    compare.add_argument("current", nargs="?",
+                         help="path of the current report, default is "
+                              "running the baseline tree and modes now")
+    compare.add_argument("--threshold", type=float, default=0.1)
+    compare.add_argument("--repeat", type=int, default=3)
+
+    measure = commands.add_parser("measure", help=argparse.SUPPRESS)
+    measure.add_argument("root")
+    measure.add_argument("mode", choices=tuple(MODES))
+    measure.add_argument("index_path")
+    return parser
+
+
+def main(argv: list = None) -> int:
+    """
+    Entry point of the benchmarks.
+    ------------------------------
+    -> Params
+        argv: list of str
+    <- Return
+        int: exit code, 1 when there are regressions
+    """
+    arguments = get_parser().parse_args(argv)
+    if arguments.command == "measure":
+        print(json.dumps(measure(arguments.root, arguments.mode, arguments.index_path)))
+        return 0
+    if arguments.command == "run":
+        tree = SyntheticTree(root=arguments.tree,
+                             depth=arguments.depth,
+                             fan_out=arguments.fan_out,
+                             files_per_directory=arguments.files_per_directory,
+                             file_size=arguments.file_size,
+                             match_density=arguments.match_density,
+                             seed=arguments.seed)
+        report = run_benchmark(tree, arguments.modes, arguments.repeat)
+        print_report(report)
+        if arguments.output:
+            with open(arguments.output, "w") as file:
+                json.dump(report, file, indent=4)
+        return 0
+    with open(arguments.baseline) as file:
+        baseline = json.load(file)
+    if arguments.current:
+        with open(arguments.current) as file:
+            current = json.load(file)
+    else:
+        # The baseline tree is searched where it was generated,
+        # like a --tree directory
+        current = run_benchmark(SyntheticTree(root=baseline.get("root"),
+                                              **baseline["tree"]),
+                                list(baseline["modes"]),
+                                arguments.repeat)
+    print_report(current)
+    regressions = compare_reports(baseline, current, arguments.threshold)
+    for regression in regressions:
+        print(f"REGRESSION {regression}")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
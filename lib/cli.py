@@ -0,0 +1,227 @@
+"""
+Headless command line mode of the app. It runs
+the search engine without the interface and
+streams the results to the standard output.
+It must not import PyQt5.
+"""
+import os
+import sys
+import json
+import argparse
+from queue import Queue
+from .logic.search_algorithm import SearchProcess
+from .logic.results import SearchResult
+from .logic.filters import FILE_TYPES
+from .constants import DEFAULT_EXCLUDED_DIRECTORIES
+
+# Exit codes, the same as grep
+EXIT_FOUND = 0
+EXIT_NOT_FOUND = 1
+EXIT_ERROR = 2
+EXIT_INTERRUPTED = 130
+
+OUTPUT_FORMATS = ("jsonl", "null", "plain")
+
+# Marks the end of the results in the results queue
+SEARCH_FINISHED = None
+
+
+def get_parser() -> argparse.ArgumentParser:
+    """
+    Returns the parser of the command line
+    arguments, the same criteria of the
+    interface.
+    --------------------------------------
+    <- Return
+        argparse.ArgumentParser
+    """
+    parser = argparse.ArgumentParser(
+        prog="advance-file-search-cli",
+        description="Search the targets in the directories and files "
+                    "names and optionally in the files contents.",
+        epilog="Exit status is 0 if any result is found, 1 if nothing "
+               "is found, 2 on errors and 130 when interrupted.")
+    parser.add_argument("targets", nargs="+",
+                        help="targets to search, case insensitive")
+    parser.add_argument("-p", "--paths", nargs="+", default=[os.curdir],
+                        help="directories to search in, default is the "
+                             "current directory")
+    parser.add_argument("-r", "--regex", action="store_true",
+                        dest="use_regex",
+                        help="the targets are case insensitive regex patterns")
+    parser.add_argument("-i", "--in-file", action="store_true",
+                        dest="in_file_search",
+                        help="search in the files contents too")
+    parser.add_argument("-s", "--max-file-size", type=float, default=20,
+                        help="maximum size of the searched files in MB")
+    parser.add_argument("-e", "--extensions", nargs="+", default=[],
+                        help="search just in the files contents with "
+                             "these extensions")
+    parser.add_argument("-g", "--glob", nargs="+", default=[],
+                        dest="include_globs",
+                        help="search just the files that their names match "
+                             "any of these globs, like 'test_*.py'")
+    parser.add_argument("--exclude", nargs="+", default=[],
+                        dest="exclude_globs",
+                        help="skip the files that their names match any of "
+                             "these globs")
+    parser.add_argument("-T", "--type", nargs="+", default=[],
+                        dest="include_types", choices=sorted(FILE_TYPES),
+                        metavar="TYPE",
+                        help="search just the files of these types, like py "
+                             "or cpp")
+    parser.add_argument("--type-not", nargs="+", default=[],
+                        dest="exclude_types", choices=sorted(FILE_TYPES),
+                        metavar="TYPE",
+                        help="skip the files of these types")
+    parser.add_argument("--exclude-dir", nargs="+", default=[],
+                        dest="excluded_directories",
+                        help="never walk the directories that their names "
+                             "match these globs, like node_modules, in "
+                             f"addition to {', '.join(DEFAULT_EXCLUDED_DIRECTORIES)}")
+    parser.add_argument("--ignore-files", action="store_true",
+                        dest="use_ignore_files",
+                        help="skip the entries ignored by the .gitignore "
+                             "and .ignore files")
+    parser.add_argument("-t", "--threads", type=int, default=16,
+                        dest="threads_count",
+                        help="number of the search threads")
+    parser.add_argument("--use-index", action="store_true",
+                        help="answer from the files index when it's fresh")
+    parser.add_argument("--max-mb-per-second", type=float, default=0,
+                        help="limit of reading the files contents")
+    parser.add_argument("--max-files-per-second", type=float, default=0,
+                        help="limit of the files read per second")
+    parser.add_argument("--idle-priority", action="store_true",
+                        help="search with the lowest CPU and I/O priority")
+    parser.add_argument("--processes", action="store_const",
+                        const="processes", default="threads",
+                        dest="execution_mode",
+                        help="match the files contents in a process pool")
+    parser.add_argument("--trace", dest="trace_path",
+                        help="profile the search and write a Chrome trace "
+                             "JSON to this path")
+    parser.add_argument("--cprofile", dest="cprofile_path",
+                        help="profile the search threads with cProfile and "
+                             "dump the stats to this path")
+    parser.add_argument("--explain", action="store_true",
+                        help="print the query plan and its counters to the "
+                             "standard error after the search")
+    parser.add_argument("-f", "--format", choices=OUTPUT_FORMATS,
+                        default="plain", dest="output_format",
+                        help="jsonl: a JSON object per result, null: NUL "
+                             "separated paths, plain: a path per line")
+    return parser
+
+
+def format_result(result: SearchResult, output_format: str) -> bytes:
+    """
+    Returns the result in the output format.
+    Paths are written with the file system
+    encoding, so undecodable names are kept.
+    ----------------------------------------
+    -> Params
+        result: SearchResult
+        output_format: str
+    <- Return
+        bytes
+    """
+    if output_format == "jsonl":
+        line = json.dumps({"kind": result.kind.value,
+                           "path": result.path,
+                           "targets": list(result.targets)})
+        return line.encode() + b"\n"
+    if output_format == "null":
+        return os.fsencode(result.path) + b"\0"
+    return os.fsencode(result.path) + b"\n"
+
+
+def run(arguments: argparse.Namespace, output: object) -> int:
+    """
+    Run the search and write the results to
+    the output as they are found.
+    ---------------------------------------
+    -> Params
+        arguments: argparse.Namespace
+        output: binary file object
+    <- Return
+        int: exit code
+    """
+    results = Queue()
+    search_process = SearchProcess(
+        signal_callback=results.put,
+        finish_search_callback=lambda: results.put(SEARCH_FINISHED),
+        in_file_search=arguments.in_file_search,
+        max_file_size=arguments.max_file_size,
+        extensions=arguments.extensions,
+        threads_count=arguments.threads_count,
+        use_index=arguments.use_index,
+        max_mb_per_second=arguments.max_mb_per_second,
+        max_files_per_second=arguments.max_files_per_second,
+        idle_priority=arguments.idle_priority,
+        execution_mode=arguments.execution_mode,
+        trace_path=arguments.trace_path,
+        cprofile_path=arguments.cprofile_path,
+        use_regex=arguments.use_regex,
+        include_globs=arguments.include_globs,
+        exclude_globs=arguments.exclude_globs,
+        include_types=arguments.include_types,
+        exclude_types=arguments.exclude_types,
+        excluded_directories=(*DEFAULT_EXCLUDED_DIRECTORIES,
+                              *arguments.excluded_directories),
+        use_ignore_files=arguments.use_ignore_files)
+    is_found = False
+    try:
+        search_process.search(targets=arguments.targets,
+                              paths=arguments.paths)
+        while True:
+            batch = results.get()
+            if batch is SEARCH_FINISHED:
+                break
+            output.write(b"".join(format_result(result, arguments.output_format)
+                                  for result in batch))
+            output.flush()
+            is_found = True
+        if arguments.explain:
+            print(search_process.explain(arguments.targets), file=sys.stderr)
+    except KeyboardInterrupt:
+        search_process.stop_searching()
+        return EXIT_INTERRUPTED
+    except BrokenPipeError:
+        # The reader is closed, like "| head". Python
+        # flushes stdout at exit, so it's redirected
+        search_process.stop_searching()
+        os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+        return EXIT_FOUND
+    return EXIT_FOUND if is_found else EXIT_NOT_FOUND
+
+
+def main(argv: list = None) -> int:
+    """
+    Entry point of the command line mode.
+    -------------------------------------
+    -> Params
+        argv: list of str
+            default is the process arguments
+    <- Return
+        int: exit code
+    """
+    parser = get_parser()
+    arguments = parser.parse_args(argv)
+    for path in arguments.paths:
+        if not os.path.isdir(path):
+            print(f"{parser.prog}: not a directory -> <{path}>", file=sys.stderr)
+            return EXIT_ERROR
+    if arguments.threads_count < 1:
+        print(f"{parser.prog}: invalid threads count -> <{arguments.threads_count}>",
+              file=sys.stderr)
+        return EXIT_ERROR
+    try:
+        return run(arguments, sys.stdout.buffer)
+    except (OSError, ValueError) as error:
+        print(f"{parser.prog}: {error}", file=sys.stderr)
+        return EXIT_ERROR
+
+
+if __name__ == "__main__":
+    sys.exit(main())
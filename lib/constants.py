@@ -1,7 +1,9 @@
 
 from os import getcwd
+from os.path import expanduser
 
 CWD = getcwd()
+HOME = expanduser("~")
 
 DATE_FORMAT = "%d-%m-%Y"
 
@@ -9,4 +11,11 @@ CSS_COLORS_FILE_PATH = f"{CWD}/lib/css/colors.css"
 CSS_FILE_PATH = f"{CWD}/lib/css/style.css"
 
 
-APP_ICON_PATH = f"{CWD}/lib/icons/glass.png"
\ No newline at end of file
+APP_ICON_PATH = f"{CWD}/lib/icons/glass.png"
+
+APP_DATA_PATH = f"{HOME}/.advance-search"
+INDEX_FILE_PATH = f"{APP_DATA_PATH}/index.db"
+# An index older than this (in seconds) is treated as stale
+INDEX_MAX_AGE = 24 * 60 * 60
+# Directories that are never walked, like the version control data
+DEFAULT_EXCLUDED_DIRECTORIES = (".git", ".hg", ".svn")
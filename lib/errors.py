@@ -65,4 +65,11 @@ class TableCellNotFoundError(GUIBaseException):
 class InvalidFileContentError(GUIBaseException):
     """
     Raises when the file doesn't have required data.
-    """
\ No newline at end of file
+    """
+
+
+class WatcherNotSupportedError(GUIBaseException):
+    """
+    Raises when the file system events are not
+    available on the running platform.
+    """
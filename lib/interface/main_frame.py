@@ -10,15 +10,23 @@ from .widgets import Horizontal
 from .widgets import Vertical
 from .widgets import LabelEntry
 from .widgets import Button
-from .widgets import HorizontalTable
+from .widgets import VirtualTable
 from .widgets import CheckBox
+from .widgets import Label
 from .widgets import QFileDialog
 from .widgets import QGraphicsDropShadowEffect
 from .widgets import QColor
 from .widgets import pyqtSignal
 from .widgets import QObject
+from .widgets import QTimer
 from .widgets import MessageBox
 from lib.logic.search_algorithm import SearchProcess
+from lib.logic.search_algorithm import Search
+from lib.logic.indexing import FileIndex
+from lib.logic.watcher import IndexWatcher
+from lib.logic.results import ResultBuffer
+from lib.errors import WatcherNotSupportedError
+from lib.constants import DEFAULT_EXCLUDED_DIRECTORIES
 
 
 class FMain(Frame):
@@ -32,13 +40,19 @@ class FMain(Frame):
         self.init_widgets()
 
         self.provider = Provider(self.fresult.show_data)
+        self.stats_monitor = StatsMonitor(self.fcriteria.show_search_stats)
+        self.index_watcher = None
     
     def init_widgets(self) -> None:
         """
         Initializes the frames and widgets.
         """
         self.fresult = None
-        self.fcriteria = FCriteria(self.search, self.stop_search, self.clear_result)
+        self.fcriteria = FCriteria(self.search,
+                                   self.stop_search,
+                                   self.clear_result,
+                                   self.build_index,
+                                   self.watch_index)
         self.fresult = FResult()
     
     def clear_result(self) -> None:
@@ -59,12 +73,67 @@ class FMain(Frame):
         """
         targets = criteria.pop("targets")
         paths = criteria.pop("paths")
+        try:
+            self.search_process = SearchProcess(signal_callback=self.provider.get_search_result,
+                                                finish_search_callback=self.finish_search,
+                                                **criteria)
+            self.search_process.search(targets=targets,
+                                       paths=paths)
+        except ValueError as error:
+            # Like an invalid regex pattern or an unknown file type
+            self.fcriteria.stop_search_animation()
+            MessageBox(self, "high", "Error", str(error))
+            return
+        self.stats_monitor.start(self.search_process.stats)
+    
+    def build_index(self, criteria: dict) -> None:
+        """
+        Build or refresh the files index of the
+        given paths in the background. With in
+        file search, the content index of the
+        files in max file size is built too.
+        --------------------------------------
+        -> Params
+            criteria: dict
+        """
+        paths = criteria.pop("paths")
         self.search_process = SearchProcess(signal_callback=self.provider.get_search_result,
                                             finish_search_callback=self.fcriteria.stop_search_animation,
                                             **criteria)
-        self.search_process.search(targets=targets,
-                                   paths=paths)
-    
+        self.search_process.refresh_index(paths=paths,
+                                          with_content=criteria.get("in_file_search", False))
+
+    def watch_index(self, paths: list, is_enabled: bool) -> None:
+        """
+        Start or stop watching the given paths to
+        keep the files index up to date.
+        --------------------------------------
+        -> Params
+            paths: list of str
+            is_enabled: bool
+        """
+        if self.index_watcher:
+            self.index_watcher.stop()
+            self.index_watcher = None
+        if not is_enabled:
+            return
+        index = FileIndex(search_handler=Search(in_file_search=False))
+        try:
+            self.index_watcher = IndexWatcher(index=index, paths=paths)
+            self.index_watcher.start()
+        except WatcherNotSupportedError as error:
+            self.index_watcher = None
+            MessageBox(self, "high", "Error", error.error_message)
+
+    def finish_search(self) -> None:
+        """
+        Send the remaining buffered results to
+        the result frame and stop the search
+        animation.
+        """
+        self.provider.flush()
+        self.fcriteria.stop_search_animation()
+
     def stop_search(self) -> None:
         """
         Stop searching process.
@@ -73,6 +142,7 @@ class FMain(Frame):
             self.search_process.stop_searching()
         except AttributeError:
             pass
+        self.provider.flush()
 
 class FCriteria(Frame):
     """
@@ -83,11 +153,15 @@ class FCriteria(Frame):
     def __init__(self,
                  search_callback: Callable,
                  stop_search_callback: Callable,
-                 clear_result_callback: Callable) -> None:
+                 clear_result_callback: Callable,
+                 build_index_callback: Callable,
+                 watch_index_callback: Callable) -> None:
         super().__init__(layout=Vertical)
         self.search_callback = search_callback
         self.stop_search_callback = stop_search_callback
         self.clear_result_callback = clear_result_callback
+        self.build_index_callback = build_index_callback
+        self.watch_index_callback = watch_index_callback
         self.setup_frame()
         self.init_widgets(clear_result_callback)
 
@@ -131,10 +205,17 @@ class FCriteria(Frame):
         
         self.search_in_files_checkbox = CheckBox(label="SEARCH IN FILES")
 
+        self.regex_checkbox = CheckBox(label="REGEX")
+
+        self.use_index_checkbox = CheckBox(label="USE INDEX")
+
+        self.watch_index_checkbox = CheckBox(label="WATCH CHANGES",
+                                             callback_func=self.watch_index_checkbox_callback)
+
         self.max_file_size_entry = LabelEntry(label="MAX FILE SIZE",
                                                validator="int",
                                                default_value=2,
-                                               tool_tip="Size in megabyte. Note that specifying large file size can slow the machine.",
+                                               tool_tip="Size in megabyte. Large files are scanned with a bounded memory.",
                                                effect_color="#009187",
                                                object_name="criteria",
                                                effect_blur_radius=10)
@@ -144,13 +225,67 @@ class FCriteria(Frame):
                                            effect_color="#009187",
                                            object_name="criteria",
                                            effect_blur_radius=10)
+
+        self.include_globs_entry = LabelEntry(label="INCLUDE FILES",
+                                              place_holder="test_*.py, *.md",
+                                              tool_tip="Search just the files that match these globs.",
+                                              effect_color="#009187",
+                                              object_name="criteria",
+                                              effect_blur_radius=10)
+
+        self.exclude_globs_entry = LabelEntry(label="EXCLUDE FILES",
+                                              place_holder="*.min.js, *.lock",
+                                              tool_tip="Skip the files that match these globs.",
+                                              effect_color="#009187",
+                                              object_name="criteria",
+                                              effect_blur_radius=10)
+
+        self.file_types_entry = LabelEntry(label="FILE TYPES",
+                                           place_holder="py, cpp",
+                                           tool_tip="Search just the files of these types.",
+                                           effect_color="#009187",
+                                           object_name="criteria",
+                                           effect_blur_radius=10)
+
+        self.excluded_directories_entry = LabelEntry(label="EXCLUDE DIRS",
+                                                     place_holder="node_modules, build",
+                                                     tool_tip="These directories are never walked, in addition to .git, .hg and .svn.",
+                                                     effect_color="#009187",
+                                                     object_name="criteria",
+                                                     effect_blur_radius=10)
+
+        self.ignore_files_checkbox = CheckBox(label="USE .GITIGNORE")
+
+        self.max_mb_per_second_entry = LabelEntry(label="MAX MB/S",
+                                                  validator="int",
+                                                  default_value=0,
+                                                  tool_tip="Reading limit in megabyte per second. 0 means unthrottled.",
+                                                  effect_color="#009187",
+                                                  object_name="criteria",
+                                                  effect_blur_radius=10)
+
+        self.max_files_per_second_entry = LabelEntry(label="MAX FILES/S",
+                                                     validator="int",
+                                                     default_value=0,
+                                                     tool_tip="Reading limit in files per second. 0 means unthrottled.",
+                                                     effect_color="#009187",
+                                                     object_name="criteria",
+                                                     effect_blur_radius=10)
+
+        self.idle_priority_checkbox = CheckBox(label="IDLE PRIORITY")
+
+        self.multi_process_checkbox = CheckBox(label="MULTI PROCESS")
         self.add_stretch()
 
         self.loading_animation = TextAnimation(parent=self,
                                                text="SEARCHING",
                                                frame_size=(220, 50),
                                                speed=40)
+        self.search_stats_label = Label("", object_name="search-stats")
         
+        self.build_index_button = Button(label="BUILD INDEX",
+                                         callback_function=self.build_index_button_callback,
+                                         width=250)
         self.search_button = Button(label="SEARCH",
                                     callback_function=self.search_button_callback,
                                     width=250)
@@ -182,16 +317,25 @@ class FCriteria(Frame):
         criteria["targets"] = targets.split(",")
         paths = self.search_path_entry.get_value()
         criteria["paths"] = paths.split(",")
+        criteria["use_index"] = self.use_index_checkbox.get_value()
+        criteria["use_regex"] = self.regex_checkbox.get_value()
+        for name, entry in (("include_globs", self.include_globs_entry),
+                            ("exclude_globs", self.exclude_globs_entry),
+                            ("include_types", self.file_types_entry)):
+            value = entry.get_value()
+            if value:
+                criteria[name] = value.split(",")
+        criteria.update(self.get_ignore_criteria())
 
         in_file_search = self.search_in_files_checkbox.get_value()
         if in_file_search:
             criteria["in_file_search"] = in_file_search
-            max_file_size = self.max_file_size_entry.get_value()
-            if max_file_size > 100:
-                MessageBox(self, "high", "Error",
-                       "Max file size couldn't reach 100 Megabytes.")
-                return
-            criteria["max_file_size"] = max_file_size
+            criteria["max_file_size"] = self.max_file_size_entry.get_value()
+            criteria["max_mb_per_second"] = self.max_mb_per_second_entry.get_value()
+            criteria["max_files_per_second"] = self.max_files_per_second_entry.get_value()
+            criteria["idle_priority"] = self.idle_priority_checkbox.get_value()
+            if self.multi_process_checkbox.get_value():
+                criteria["execution_mode"] = "processes"
             extensions = self.extensions_entry.get_value()
             if extensions:
                 extensions = extensions.split(",")
@@ -200,6 +344,49 @@ class FCriteria(Frame):
         self.clear_result_callback()
         self.search_callback(criteria)
 
+    def build_index_button_callback(self) -> None:
+        """
+        Collects the search paths and pass them
+        to the build_index_callback to index them.
+        """
+        criteria = dict()
+        paths = self.search_path_entry.get_value()
+        criteria["paths"] = paths.split(",")
+        criteria.update(self.get_ignore_criteria())
+        in_file_search = self.search_in_files_checkbox.get_value()
+        if in_file_search:
+            criteria["in_file_search"] = in_file_search
+            criteria["max_file_size"] = self.max_file_size_entry.get_value()
+        self.loading_animation.start()
+        self.build_index_callback(criteria)
+
+    def get_ignore_criteria(self) -> dict:
+        """
+        Returns the criteria of the directories
+        that are not walked, for searching and
+        indexing.
+        ---------------------------------------
+        <- Return
+            dict
+        """
+        criteria = {"use_ignore_files": self.ignore_files_checkbox.get_value()}
+        excluded_directories = self.excluded_directories_entry.get_value()
+        if excluded_directories:
+            criteria["excluded_directories"] = [*DEFAULT_EXCLUDED_DIRECTORIES,
+                                                *excluded_directories.split(",")]
+        return criteria
+
+    def watch_index_checkbox_callback(self, state: int) -> None:
+        """
+        Start or stop watching the search paths
+        to keep the index up to date.
+        ---------------------------------------
+        -> Params
+            state: int
+        """
+        paths = self.search_path_entry.get_value()
+        self.watch_index_callback(paths.split(","), bool(state))
+
     def stop_search_button_callback(self) -> None:
         """
         Callback method to stop searching process
@@ -213,6 +400,19 @@ class FCriteria(Frame):
         """
         self.loading_animation.stop()
 
+    def show_search_stats(self, stats: dict) -> None:
+        """
+        Show the search rates under the search
+        animation.
+        --------------------------------------
+        -> Params
+            stats: dict
+                snapshot of SearchProcess.stats
+        """
+        self.search_stats_label.change_text(
+            f"{stats['files_per_second']:,.0f} FILES/S  "
+            f"{stats['mb_per_second']:,.1f} MB/S")
+
 class FResult(Frame):
     """
     This frame is for showing the result
@@ -240,35 +440,34 @@ class FResult(Frame):
         Initializes the tables for each group
         of data.
         """
-        self.dir_name = HorizontalTable(editable=True)
-        self.dir_name.setup_view(h_headers=["Directory Name"],
-                                 row_count=0,
-                                 column_count=1)
+        self.dir_name = VirtualTable(editable=True)
+        self.dir_name.setup_view(h_headers=["Directory Name"])
         
-        self.file_name = HorizontalTable(editable=True)
-        self.file_name.setup_view(h_headers=["File Name"],
-                                 row_count=0,
-                                 column_count=1)
+        self.file_name = VirtualTable(editable=True)
+        self.file_name.setup_view(h_headers=["File Name"])
         
-        self.in_file = HorizontalTable(editable=True)
-        self.in_file.setup_view(h_headers=["In File"],
-                                 row_count=0,
-                                 column_count=1)
+        self.in_file = VirtualTable(editable=True)
+        self.in_file.setup_view(h_headers=["In File"])
         
-    def show_data(self, data: dict) -> None:
+    def show_data(self, batch: list) -> None:
         """
-        Show the data in the table. It adds a
-        row to show the data in the table and 
-        if it not initialized, initialize new
-        table.
+        Show a batch of data in the tables. The
+        rows of each table are appended to its
+        model at once. If the tables are not
+        initialized, initialize new tables.
+        ------------------------------------------
+        -> Params
+            batch: list of SearchResult
         """
-        header,value = tuple(data.items())[0]
         if not self.widgets:
             self.init_widgets()
-        table = getattr(self, header)
-        rows_count = table.rowCount()
-        table.setRowCount(rows_count+1)
-        table.insert_row(value=[value], row=rows_count)
+        groups = dict()
+        for result in batch:
+            # The models keep the compact records and
+            # show their path just for the visible rows
+            groups.setdefault(result.kind.value, list()).append([result])
+        for header, rows in groups.items():
+            getattr(self, header).append_rows(rows)
 
 
     def clear_result(self) -> None:
@@ -285,20 +484,92 @@ class Provider(QObject):
     interface to show the search result.
     """
     
-    search_result = pyqtSignal(dict)
+    search_result = pyqtSignal(list)
 
     def __init__(self,
-                 provider_callback: Callable) -> None:
+                 provider_callback: Callable,
+                 max_items: int = 500,
+                 interval: float = 0.05) -> None:
+        """
+        ---------------------------------------
+        -> Params
+            provider_callback: Callable
+                gets a list of results
+            max_items: int
+                results that flush the buffer
+            interval: float
+                Seconds between the buffer flushes.
+        """
         super().__init__()
         self.search_result.connect(provider_callback)
+        self.buffer = ResultBuffer(callback=self.search_result.emit,
+                                   max_items=max_items,
+                                   interval=interval)
     
-    def get_search_result(self, result: dict) -> None:
+    def get_search_result(self, results: list) -> None:
+        """
+        Bridge method to get a batch of the search
+        results and buffer it. The buffered results
+        are sent to the interface as a list, so the
+        interface is not flooded with a signal per
+        result.
+        ---------------------------------------
+        -> Params
+            results: list of SearchResult
+        """
+        self.buffer.extend(results)
+
+    def flush(self) -> None:
+        """
+        Send the buffered results to the interface
+        and stop the buffer timer.
+        """
+        self.buffer.close()
+
+
+class StatsMonitor(QObject):
+    """
+    Reads the statistics of the running search
+    on a timer in the interface thread and pass
+    them to the callback, until the search is
+    finished.
+    """
+
+    def __init__(self,
+                 monitor_callback: Callable,
+                 interval: int = 500) -> None:
         """
-        Bridge method to get the search result
-        and pass it to the signal to send it to
-        the interface.
         ---------------------------------------
         -> Params
-            result: dict
+            monitor_callback: Callable
+                gets the stats snapshot
+            interval: int
+                Milliseconds between the updates.
+        """
+        super().__init__()
+        self.monitor_callback = monitor_callback
+        self.get_stats = None
+        self.timer = QTimer(self)
+        self.timer.setInterval(interval)
+        self.timer.timeout.connect(self.update)
+
+    def start(self, get_stats: Callable) -> None:
+        """
+        Start monitoring a search.
+        --------------------------
+        -> Params
+            get_stats: Callable
+                returns the stats snapshot
+        """
+        self.get_stats = get_stats
+        self.timer.start()
+
+    def update(self) -> None:
+        """
+        Pass the current stats to the callback and
+        stop the timer when the search is finished.
         """
-        self.search_result.emit(result)
\ No newline at end of file
+        stats = self.get_stats()
+        self.monitor_callback(stats)
+        if not stats["is_running"]:
+            self.timer.stop()
@@ -18,6 +18,7 @@ from PyQt5.QtWidgets import QVBoxLayout as Vertical
 from PyQt5.QtWidgets import QHBoxLayout as Horizontal
 from PyQt5.QtWidgets import QGroupBox
 from PyQt5.QtWidgets import QTableWidget
+from PyQt5.QtWidgets import QTableView
 from PyQt5.QtWidgets import QHeaderView
 from PyQt5.QtWidgets import QCheckBox
 from PyQt5.QtWidgets import QFrame
@@ -37,6 +38,9 @@ from PyQt5.QtCore import QRegExp
 from PyQt5.QtCore import QPropertyAnimation
 from PyQt5.QtCore import pyqtSignal
 from PyQt5.QtCore import QObject
+from PyQt5.QtCore import QTimer
+from PyQt5.QtCore import QAbstractTableModel
+from PyQt5.QtCore import QModelIndex
 from lib.errors import DataValidationFailed, RowNotExists, TableCellNotFoundError
 from .utils import log
 from .utils import void_function
@@ -1149,6 +1153,155 @@ class HorizontalTable(Table):
         self.horizontalHeader().hide()
         self.clear()
 
+class ColumnsModel(QAbstractTableModel):
+    """
+    Table model that keeps the values of each
+    column in a plain list. The view asks only
+    for the visible cells, so no item object is
+    created per cell.
+    """
+
+    def __init__(self, headers: list, **kwargs) -> None:
+        """
+        ---------------------------------------
+        -> Params
+            headers: list of str
+        """
+        super().__init__(**kwargs)
+        self.headers = tuple(headers)
+        self.columns = [list() for _ in self.headers]
+
+    def rowCount(self, parent: QModelIndex = QModelIndex()) -> int:
+        if parent.isValid():
+            return 0
+        return len(self.columns[0]) if self.columns else 0
+
+    def columnCount(self, parent: QModelIndex = QModelIndex()) -> int:
+        if parent.isValid():
+            return 0
+        return len(self.headers)
+
+    def data(self, index: QModelIndex, role: int = Qt.DisplayRole) -> object:
+        if not index.isValid() or role not in (Qt.DisplayRole, Qt.EditRole):
+            return None
+        return str(self.columns[index.column()][index.row()])
+
+    def setData(self,
+                index: QModelIndex,
+                value: object,
+                role: int = Qt.EditRole) -> bool:
+        if not index.isValid() or role != Qt.EditRole:
+            return False
+        self.columns[index.column()][index.row()] = value
+        self.dataChanged.emit(index, index, [role])
+        return True
+
+    def flags(self, index: QModelIndex) -> object:
+        if not index.isValid():
+            return Qt.NoItemFlags
+        return Qt.ItemIsSelectable | Qt.ItemIsEnabled | Qt.ItemIsEditable
+
+    def headerData(self,
+                   section: int,
+                   orientation: object,
+                   role: int = Qt.DisplayRole) -> object:
+        if role != Qt.DisplayRole:
+            return None
+        if orientation == Qt.Horizontal:
+            return self.headers[section]
+        return section + 1
+
+    def append_rows(self, rows: list) -> None:
+        """
+        Append a batch of rows with one insert
+        notification for the views.
+        ----------------------------------------
+        -> Params
+            rows: list of list
+        """
+        if not rows:
+            return
+        first_row = self.rowCount()
+        self.beginInsertRows(QModelIndex(), first_row, first_row + len(rows) - 1)
+        for column, values in zip(self.columns, zip(*rows)):
+            column.extend(values)
+        self.endInsertRows()
+
+    def clear(self) -> None:
+        """
+        Remove all the rows.
+        """
+        self.beginResetModel()
+        self.columns = [list() for _ in self.headers]
+        self.endResetModel()
+
+
+class VirtualTable(QTableView):
+    """
+    Table view over a ColumnsModel for showing
+    a large number of rows. Only the visible rows
+    are materialized by the view.
+    """
+
+    def __init__(self,
+                 min_width: int = 300,
+                 min_height: int = 200,
+                 editable: bool = False,
+                 selection_mode: object = QAbstractItemView.SingleSelection,
+                 object_name: str = None,
+                 grid_positions: tuple = None,
+                 **kwargs) -> None:
+        super().__init__(**kwargs)
+        edit_trigger = QAbstractItemView.NoEditTriggers
+        if editable:
+            edit_trigger = QAbstractItemView.DoubleClicked
+        self.setEditTriggers(edit_trigger)
+        self.setSelectionMode(selection_mode)
+        self.setSelectionBehavior(QAbstractItemView.SelectRows)
+        self.setMinimumSize(min_width, min_height)
+        self.setObjectName(object_name)
+        self.grid_positions = grid_positions
+        self.H_HEADER = None
+
+    def setup_view(self, h_headers: list) -> None:
+        """
+        Setup the model and the view of the
+        table.
+        -----------------------------------
+        -> Params
+            h_headers: list of str
+        """
+        self.H_HEADER = tuple(h_headers)
+        self.setModel(ColumnsModel(h_headers, parent=self))
+        self.setVerticalScrollMode(QAbstractItemView.ScrollPerPixel)
+        self.setHorizontalScrollMode(QAbstractItemView.ScrollPerPixel)
+        self.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
+        # Fixed row heights, so the view doesn't measure the rows
+        self.verticalHeader().setSectionResizeMode(QHeaderView.Fixed)
+        self.verticalHeader().hide()
+
+    def append_rows(self, rows: list) -> None:
+        """
+        Append a batch of rows to the table.
+        ------------------------------------
+        -> Params
+            rows: list of list
+        """
+        self.model().append_rows(rows)
+
+    def rowCount(self) -> int:
+        """
+        Returns the number of the rows.
+        """
+        return self.model().rowCount()
+
+    def clear_value(self) -> None:
+        """
+        Clear the table
+        """
+        self.model().clear()
+
+
 class CheckBox(QCheckBox):
     """
     Custom QtCheckbox widget
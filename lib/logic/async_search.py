@@ -0,0 +1,191 @@
+"""
+This module runs the search inside an asyncio
+event loop and gives the results as an async
+iterator.
+"""
+import asyncio
+from typing import AsyncGenerator
+from concurrent.futures import ThreadPoolExecutor
+from .search_algorithm import Search
+from .filters import NameFilter
+from .ignoring import IgnoreFilter
+from .throttling import RateGovernor
+from .traversal import list_directory
+
+# Marks the end of the results in the results queue
+SEARCH_FINISHED = object()
+
+
+class AsyncSearchProcess:
+    """
+    Search for the targets in the given paths with
+    the matching logic of Search. Listing the
+    directories and reading the files are offloaded
+    to threads with bounded concurrency and
+    cancelling the consumer task stops the search.
+    ----------------------------------------------
+    @usage:
+        engine = AsyncSearchProcess(in_file_search=True)
+        async for result in engine.search(["python"], ["/home"]):
+            print(result)
+    """
+
+    def __init__(self,
+                 in_file_search: bool = False,
+                 max_file_size: float = 20,
+                 extensions: list = [],
+                 listing_concurrency: int = 16,
+                 reading_concurrency: int = 16,
+                 executor: ThreadPoolExecutor = None,
+                 max_mb_per_second: float = 0,
+                 max_files_per_second: float = 0,
+                 use_regex: bool = False,
+                 name_filter: NameFilter = None,
+                 ignore_filter: IgnoreFilter = None) -> None:
+        """
+        -----------------------------------------------
+        -> Params
+            in_file_search: bool
+            max_file_size: float
+            extensions: list of string
+            listing_concurrency: int
+                directories listed at the same time
+            reading_concurrency: int
+                directories that their files are
+                checked at the same time
+            executor: ThreadPoolExecutor
+                default is the loop default executor
+            max_mb_per_second: float
+            max_files_per_second: float
+            use_regex: bool
+                the targets are regex patterns
+            name_filter: NameFilter
+                include and exclude globs and
+                types of the files
+            ignore_filter: IgnoreFilter
+                prunes the excluded and ignored
+                directories
+        """
+        self.search_handler = Search(in_file_search=in_file_search,
+                                     file_size_limit=max_file_size,
+                                     extensions=extensions,
+                                     governor=RateGovernor(
+                                         mb_per_second=max_mb_per_second,
+                                         files_per_second=max_files_per_second),
+                                     use_regex=use_regex,
+                                     name_filter=name_filter,
+                                     ignore_filter=ignore_filter)
+        self.listing_concurrency = listing_concurrency
+        self.reading_concurrency = reading_concurrency
+        self.executor = executor
+
+    async def search(self,
+                     targets: list,
+                     paths: list) -> AsyncGenerator:
+        """
+        Search the targets and yield the results
+        as they are found.
+        ----------------------------------------
+        -> Params
+            targets: list of string
+            paths: list of string
+        <- Return
+            AsyncGenerator
+        """
+        loop = asyncio.get_running_loop()
+        roots = await loop.run_in_executor(self.executor,
+                                           self.search_handler.get_roots, paths)
+        self.search_handler.get_matcher(targets)
+        directories = asyncio.Queue()
+        results = asyncio.Queue()
+        ignore_filter = self.search_handler.ignore_filter
+        for root in roots:
+            directories.put_nowait((root, ignore_filter.get_inherited_rules(root)))
+        listing = asyncio.Semaphore(self.listing_concurrency)
+        reading = asyncio.Semaphore(self.reading_concurrency)
+        tasks = [asyncio.create_task(self.worker(directories, results,
+                                                 listing, reading, targets))
+                 for _ in range(self.listing_concurrency)]
+        tasks.append(asyncio.create_task(self.finish(directories, results)))
+        try:
+            while True:
+                result = await results.get()
+                if result is SEARCH_FINISHED:
+                    break
+                yield result
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def worker(self,
+                     directories: asyncio.Queue,
+                     results: asyncio.Queue,
+                     listing: asyncio.Semaphore,
+                     reading: asyncio.Semaphore,
+                     targets: list) -> None:
+        """
+        Take a directory, list it in a thread, queue
+        its not pruned sub directories and put the
+        results of searching it to the results queue.
+        --------------------------------------------
+        -> Params
+            directories: asyncio.Queue
+                of (dir path, ignore rules)
+            results: asyncio.Queue
+            listing: asyncio.Semaphore
+            reading: asyncio.Semaphore
+            targets: list of str
+        """
+        loop = asyncio.get_running_loop()
+        ignore_filter = self.search_handler.ignore_filter
+        stats = self.search_handler.stats
+        while True:
+            dir_path, rules = await directories.get()
+            try:
+                async with listing:
+                    _, files, sub_directories = await loop.run_in_executor(
+                        self.executor, list_directory, dir_path, ignore_filter,
+                        rules, stats)
+                for sub_directory in sub_directories:
+                    directories.put_nowait(sub_directory)
+                async with reading:
+                    found = await loop.run_in_executor(
+                        self.executor, self.search_directory, dir_path, files, targets)
+                for result in found:
+                    await results.put(result)
+            except OSError:
+                pass
+            finally:
+                directories.task_done()
+
+    def search_directory(self,
+                         dir_path: str,
+                         files: list,
+                         targets: list) -> list:
+        """
+        Runs in the executor threads and returns
+        all the results of a directory.
+        ----------------------------------------
+        -> Params
+            dir_path: str
+            files: list of os.DirEntry
+            targets: list of str
+        <- Return
+            list of SearchResult
+        """
+        return list(self.search_handler.search_directory(dir_path, files, targets))
+
+    async def finish(self,
+                     directories: asyncio.Queue,
+                     results: asyncio.Queue) -> None:
+        """
+        Wait until all the directories are searched
+        and mark the end of the results.
+        -------------------------------------------
+        -> Params
+            directories: asyncio.Queue
+            results: asyncio.Queue
+        """
+        await directories.join()
+        await results.put(SEARCH_FINISHED)
@@ -0,0 +1,276 @@
+"""
+This module keeps a trigram index of the files
+contents, so searching in files just needs to
+read the files that can contain the targets.
+"""
+import os
+import sqlite3
+from time import time
+from array import array
+from typing import Generator
+from collections import defaultdict
+from lib.constants import INDEX_FILE_PATH
+from lib.constants import INDEX_MAX_AGE
+
+
+class ContentIndex:
+    """
+    Maps each trigram of the lowered files contents
+    to the posting list of the files ids that have
+    it. A query intersects the posting lists of the
+    target trigrams to find the candidate files.
+    The size and mtime of the indexed files are
+    recorded, so the files that changed after the
+    build and the new ones are always candidates.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS content_roots (
+            path TEXT PRIMARY KEY,
+            mtime REAL NOT NULL,
+            built_at REAL NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS content_files (
+            id INTEGER PRIMARY KEY,
+            path TEXT NOT NULL,
+            is_indexed INTEGER NOT NULL,
+            size INTEGER NOT NULL,
+            mtime REAL NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS content_trigrams (
+            trigram BLOB PRIMARY KEY,
+            postings BLOB NOT NULL
+        );
+    """
+
+    def __init__(self,
+                 search_handler: object,
+                 index_path: str = INDEX_FILE_PATH,
+                 max_age: float = INDEX_MAX_AGE) -> None:
+        """
+        ---------------------------------------
+        -> Params
+            search_handler: Search
+                Used for walking the directories
+                and reading the files. Files bigger
+                than its file size limit are not
+                indexed and always are candidates.
+            index_path: str
+                Path of the SQLite database file.
+            max_age: float
+                Seconds that an index stays fresh.
+        """
+        self.search_handler = search_handler
+        self.index_path = index_path
+        self.max_age = max_age
+
+    def connect(self) -> sqlite3.Connection:
+        """
+        Open a new connection to the index database
+        and make sure the tables are exist.
+        -------------------------------------------
+        <- Return
+            sqlite3.Connection
+        """
+        directory = os.path.dirname(self.index_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        connection = sqlite3.connect(self.index_path)
+        columns = {row[1] for row in connection.execute(
+            "PRAGMA table_info(content_files)")}
+        if columns and "mtime" not in columns:
+            # Built by an older version without the files stats,
+            # it must be built again
+            connection.executescript("""
+                DROP TABLE content_roots;
+                DROP TABLE content_files;
+                DROP TABLE content_trigrams;""")
+        connection.executescript(self.SCHEMA)
+        return connection
+
+    def get_mtime(self, path: str) -> float:
+        """
+        Returns modification time of the path or
+        -1 when the path is not accessible.
+        """
+        try:
+            return os.stat(path).st_mtime
+        except OSError:
+            return -1
+
+    def get_trigrams(self, data: bytes) -> set:
+        """
+        Returns all the three bytes sequences of
+        the given data.
+        ----------------------------------------
+        -> Params
+            data: bytes
+        <- Return
+            set of bytes
+        """
+        return {data[index:index + 3] for index in range(len(data) - 2)}
+
+    def get_files(self, paths: list = None) -> Generator:
+        """
+        Yield full path and name of the files of
+        the given roots.
+        ----------------------------------------
+        -> Params
+            paths: list of str
+        <- Return
+            Generator: (full path, file name)
+        """
+        for dir_path, _, file_names in self.search_handler.get_paths(paths=paths):
+            for file_name in file_names:
+                yield f"{dir_path}/{file_name}", file_name
+
+    def build(self, paths: list = None) -> None:
+        """
+        Read the files of the given roots and
+        replace the index with their trigrams.
+        Files bigger than the size limit are just
+        recorded as not indexed.
+        -----------------------------------------
+        -> Params
+            paths: list of str
+        """
+        postings = defaultdict(lambda: array("I"))
+        files = list()
+        for file_id, (full_path, file_name) in enumerate(self.get_files(paths), start=1):
+            try:
+                stat = os.stat(full_path)
+            except OSError:
+                continue
+            if stat.st_size / (1024 * 1024) > self.search_handler.file_size_limit:
+                files.append((file_id, full_path, 0, stat.st_size, stat.st_mtime))
+                continue
+            files.append((file_id, full_path, 1, stat.st_size, stat.st_mtime))
+            content = self.search_handler.read_file(full_path)
+            if content is None:
+                continue
+            for trigram in self.get_trigrams(content.encode("utf-8")):
+                postings[trigram].append(file_id)
+
+        connection = self.connect()
+        try:
+            with connection:
+                connection.execute("DELETE FROM content_roots")
+                connection.execute("DELETE FROM content_files")
+                connection.execute("DELETE FROM content_trigrams")
+                connection.executemany(
+                    "INSERT INTO content_roots (path, mtime, built_at) VALUES (?, ?, ?)",
+                    [(root, self.get_mtime(root), time())
+                     for root in self.search_handler.get_roots(paths)])
+                connection.executemany(
+                    """INSERT INTO content_files (id, path, is_indexed, size, mtime)
+                       VALUES (?, ?, ?, ?, ?)""",
+                    files)
+                connection.executemany(
+                    "INSERT INTO content_trigrams (trigram, postings) VALUES (?, ?)",
+                    ((trigram, ids.tobytes()) for trigram, ids in postings.items()))
+        finally:
+            connection.close()
+
+    def is_fresh(self, paths: list = None) -> bool:
+        """
+        Checks all the given roots are indexed, the
+        index is not older than max age and the
+        roots didn't change since the last build.
+        -------------------------------------------
+        -> Params
+            paths: list of str
+        <- Return
+            bool
+        """
+        if not os.path.isfile(self.index_path):
+            return False
+        roots = self.search_handler.get_roots(paths)
+        if not roots:
+            return False
+        connection = self.connect()
+        try:
+            for root in roots:
+                row = connection.execute(
+                    "SELECT mtime, built_at FROM content_roots WHERE path = ?",
+                    (root,)).fetchone()
+                if not row:
+                    return False
+                mtime, built_at = row
+                if time() - built_at > self.max_age:
+                    return False
+                if self.get_mtime(root) != mtime:
+                    return False
+            return True
+        finally:
+            connection.close()
+
+    def get_indexed_files(self) -> dict:
+        """
+        Returns the files that their contents are
+        indexed with their recorded stat. The other
+        files can't be rejected by the index.
+        -------------------------------------------
+        <- Return
+            dict: {full path: (id, size in bytes, mtime)}
+        """
+        connection = self.connect()
+        try:
+            return {path: (file_id, size, mtime) for file_id, path, size, mtime
+                    in connection.execute(
+                        """SELECT id, path, size, mtime FROM content_files
+                           WHERE is_indexed = 1""")}
+        finally:
+            connection.close()
+
+    def get_candidates(self, targets: list) -> dict:
+        """
+        Find the indexed files that may contain each
+        target by intersecting the posting lists of
+        the target trigrams. Targets shorter than
+        three bytes can't use the index and get None.
+        -------------------------------------------
+        -> Params
+            targets: list of str
+        <- Return
+            dict: {target: set of files ids or None}
+        """
+        connection = self.connect()
+        try:
+            return {target: self.get_file_ids(
+                        connection, self.get_trigrams(target.lower().encode("utf-8")))
+                    for target in targets}
+        finally:
+            connection.close()
+
+    def get_file_ids(self,
+                     connection: sqlite3.Connection,
+                     trigrams: set) -> set:
+        """
+        Intersect the posting lists of the given
+        trigrams, starting from the shortest one.
+        -----------------------------------------
+        -> Params
+            connection: sqlite3.Connection
+            trigrams: set of bytes
+        <- Return
+            set of int or None when there is no trigram
+        """
+        if not trigrams:
+            return None
+        postings = list()
+        for trigram in trigrams:
+            row = connection.execute(
+                "SELECT postings FROM content_trigrams WHERE trigram = ?",
+                (trigram,)).fetchone()
+            if not row:
+                return set()
+            postings.append(row[0])
+        postings.sort(key=len)
+        file_ids = None
+        for posting in postings:
+            ids = array("I")
+            ids.frombytes(posting)
+            file_ids = set(ids) if file_ids is None else file_ids.intersection(ids)
+            if not file_ids:
+                break
+        return file_ids
@@ -0,0 +1,181 @@
+"""
+This module compiles the glob and file type
+filters of the files names into one matcher,
+which is checked before any other work on a
+file.
+"""
+import re
+from fnmatch import translate
+
+# Globs of the named file types
+FILE_TYPES = {
+    "c": ("*.c", "*.h"),
+    "cpp": ("*.cpp", "*.cc", "*.cxx", "*.c++", "*.hpp", "*.hh", "*.hxx", "*.h", "*.inl"),
+    "cs": ("*.cs",),
+    "css": ("*.css", "*.scss", "*.sass", "*.less"),
+    "csv": ("*.csv", "*.tsv"),
+    "go": ("*.go",),
+    "html": ("*.html", "*.htm", "*.xhtml"),
+    "java": ("*.java",),
+    "js": ("*.js", "*.mjs", "*.cjs", "*.jsx"),
+    "json": ("*.json", "*.jsonl"),
+    "md": ("*.md", "*.markdown", "*.rst"),
+    "php": ("*.php",),
+    "py": ("*.py", "*.pyi", "*.pyw", "*.pyx"),
+    "rb": ("*.rb",),
+    "rust": ("*.rs",),
+    "sh": ("*.sh", "*.bash", "*.zsh"),
+    "sql": ("*.sql",),
+    "ts": ("*.ts", "*.tsx"),
+    "txt": ("*.txt", "*.text", "*.log"),
+    "xml": ("*.xml", "*.xsd", "*.xsl"),
+    "yaml": ("*.yaml", "*.yml"),
+}
+
+# Globs like "*.py" that are just a suffix
+SUFFIX_GLOB = re.compile(r"\*(\.[^*?\[\]]+)")
+
+
+class GlobMatcher:
+    """
+    Case insensitive matcher of the files names
+    with a group of globs. The globs that are a
+    suffix, like "*.py", are kept in a hash set
+    and the other ones are combined in a regex.
+    """
+
+    def __init__(self, globs: list) -> None:
+        """
+        ---------------------------------------
+        -> Params
+            globs: list of str
+        """
+        self.globs = tuple(dict.fromkeys(glob.strip() for glob in globs if glob.strip()))
+        self.suffixes = set()
+        patterns = list()
+        for glob in self.globs:
+            suffix = SUFFIX_GLOB.fullmatch(glob)
+            if suffix:
+                self.suffixes.add(suffix.group(1).lower())
+            else:
+                patterns.append(translate(glob))
+        self.pattern = re.compile("|".join(patterns), re.IGNORECASE) if patterns else None
+
+    def __bool__(self) -> bool:
+        return bool(self.globs)
+
+    def match(self, name: str) -> bool:
+        """
+        Checks the name matches any of the globs.
+        -----------------------------------------
+        -> Params
+            name: str
+        <- Return
+            bool
+        """
+        if self.suffixes:
+            lower_name = name.lower()
+            index = lower_name.find(".")
+            while index >= 0:
+                if lower_name[index:] in self.suffixes:
+                    return True
+                index = lower_name.find(".", index + 1)
+        if self.pattern:
+            return self.pattern.match(name) is not None
+        return False
+
+
+def get_type_globs(file_types: list) -> list:
+    """
+    Returns the globs of the named file types.
+    ------------------------------------------
+    -> Params
+        file_types: list of str
+    <- Return
+        list of str
+    """
+    globs = list()
+    for file_type in file_types:
+        file_type = file_type.strip().lower()
+        if not file_type:
+            continue
+        if file_type not in FILE_TYPES:
+            raise ValueError(f"invalid file type -> <{file_type}>")
+        globs.extend(FILE_TYPES[file_type])
+    return globs
+
+
+def get_extension_globs(extensions: list) -> list:
+    """
+    Returns the globs of the extensions, like
+    "txt" or ".txt".
+    -----------------------------------------
+    -> Params
+        extensions: list of str
+    <- Return
+        list of str
+    """
+    return [f"*.{extension.strip().lstrip('.')}" for extension in extensions
+            if extension.strip().lstrip(".")]
+
+
+class NameFilter:
+    """
+    Include and exclude filters of the files
+    names. A file passes when it matches any of
+    the include globs or types, or there isn't
+    any of them, and doesn't match any of the
+    exclude globs or types.
+    ---------------------------------------------
+    @usage:
+        name_filter = NameFilter(include_globs=["test_*"],
+                                 include_types=["py"])
+        files = name_filter.filter(entries)
+    """
+
+    def __init__(self,
+                 include_globs: list = [],
+                 exclude_globs: list = [],
+                 include_types: list = [],
+                 exclude_types: list = []) -> None:
+        """
+        ---------------------------------------
+        -> Params
+            include_globs: list of str
+            exclude_globs: list of str
+            include_types: list of str
+                names of FILE_TYPES
+            exclude_types: list of str
+        """
+        self.include = GlobMatcher(list(include_globs) + get_type_globs(include_types))
+        self.exclude = GlobMatcher(list(exclude_globs) + get_type_globs(exclude_types))
+
+    def __bool__(self) -> bool:
+        return bool(self.include or self.exclude)
+
+    def is_included(self, name: str) -> bool:
+        """
+        Checks the file name passes the filters.
+        ----------------------------------------
+        -> Params
+            name: str
+        <- Return
+            bool
+        """
+        if self.include and not self.include.match(name):
+            return False
+        return not (self.exclude and self.exclude.match(name))
+
+    def filter(self, entries: list) -> list:
+        """
+        Returns the entries that their names pass
+        the filters.
+        -----------------------------------------
+        -> Params
+            entries: list of os.DirEntry
+        <- Return
+            list of os.DirEntry
+        """
+        if not self:
+            return entries
+        return [entry for entry in entries if self.is_included(entry.name)]
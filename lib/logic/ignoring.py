@@ -0,0 +1,421 @@
+"""
+This module prunes the ignored directories and
+files while walking, before they are listed or
+checked. The excluded directories names, like
+".git", are always pruned and the .gitignore and
+.ignore files of the searched trees can be used
+too.
+"""
+import os
+import re
+from typing import Generator
+from lib.constants import DEFAULT_EXCLUDED_DIRECTORIES
+from .filters import GlobMatcher
+
+IGNORE_FILE_NAMES = (".gitignore", ".ignore")
+# Marks a repository root, the ignore files of its
+# parents don't apply to it
+REPOSITORY_MARKER = ".git"
+# Git matches the names case insensitive just on Windows
+IGNORE_FLAGS = re.IGNORECASE if os.name == "nt" else 0
+
+
+def translate_ignore_glob(glob: str) -> str:
+    """
+    Translate a glob of an ignore file to a regex
+    of the paths relative to the ignore file
+    directory. "*" and "?" don't match "/" and
+    "**" matches any number of directories.
+    ---------------------------------------------
+    -> Params
+        glob: str
+    <- Return
+        str
+    """
+    segments = glob.split("/")
+    regex = list()
+    for index, segment in enumerate(segments):
+        is_last = index == len(segments) - 1
+        if segment == "**":
+            regex.append(".*" if is_last else "(?:.*/)?")
+            continue
+        regex.append(translate_segment(segment))
+        if not is_last:
+            regex.append("/")
+    return "".join(regex)
+
+
+def translate_segment(segment: str) -> str:
+    """
+    Translate one segment of a glob, between
+    the "/" separators, to a regex.
+    ----------------------------------------
+    -> Params
+        segment: str
+    <- Return
+        str
+    """
+    regex = list()
+    index = 0
+    while index < len(segment):
+        char = segment[index]
+        index += 1
+        if char == "*":
+            regex.append("[^/]*")
+        elif char == "?":
+            regex.append("[^/]")
+        elif char == "\\" and index < len(segment):
+            regex.append(re.escape(segment[index]))
+            index += 1
+        elif char == "[":
+            end = segment.find("]", index + 1)
+            if end < 0:
+                regex.append(re.escape(char))
+                continue
+            chars = segment[index:end].replace("\\", "\\\\")
+            if chars[0] in "!^":
+                chars = "^" + chars[1:]
+            regex.append(f"[{chars}]")
+            index = end + 1
+        else:
+            regex.append(re.escape(char))
+    return "".join(regex)
+
+
+def parse_ignore_line(line: str) -> tuple:
+    """
+    Parse a line of an ignore file with the
+    .gitignore syntax.
+    ---------------------------------------
+    -> Params
+        line: str
+    <- Return
+        tuple: (regex, is negated, is just for directories)
+            or None for blank lines and comments
+    """
+    line = line.rstrip("\r\n")
+    # Trailing spaces are ignored unless escaped
+    stripped = line.rstrip(" ")
+    if stripped.endswith("\\") and len(stripped) < len(line):
+        stripped += " "
+    line = stripped
+    if not line or line.startswith("#"):
+        return None
+    is_negated = line.startswith("!")
+    if is_negated:
+        line = line[1:]
+    elif line.startswith(("\\!", "\\#")):
+        line = line[1:]
+    is_directory = line.endswith("/")
+    line = line.rstrip("/")
+    if not line:
+        return None
+    # A separator at the start or the middle anchors the
+    # glob to the ignore file directory
+    is_anchored = "/" in line
+    regex = translate_ignore_glob(line.lstrip("/"))
+    if not is_anchored:
+        regex = f"(?:.*/)?{regex}"
+    return regex, is_negated, is_directory
+
+
+class IgnoreFile:
+    """
+    Compiled rules of one ignore file. The rules
+    are combined in one regex for the directories
+    and one for the files. They are in reverse
+    order, so the first matching group is the
+    last matching rule, which decides.
+    """
+    __slots__ = ("base", "directory_pattern", "directory_negated",
+                 "file_pattern", "file_negated")
+
+    def __init__(self, base: str, lines: list) -> None:
+        """
+        ---------------------------------------
+        -> Params
+            base: str
+                directory of the ignore file
+            lines: list of str
+        """
+        self.base = base
+        rules = [rule for rule in map(parse_ignore_line, lines) if rule]
+        self.directory_pattern, self.directory_negated = self.compile(rules)
+        self.file_pattern, self.file_negated = self.compile(
+            [rule for rule in rules if not rule[2]])
+
+    def compile(self, rules: list) -> tuple:
+        """
+        Returns the combined regex of the rules
+        and the negation of each group.
+        ---------------------------------------
+        -> Params
+            rules: list of tuple
+        <- Return
+            tuple: (re.Pattern or None, tuple of bool)
+        """
+        if not rules:
+            return None, ()
+        rules = rules[::-1]
+        pattern = re.compile("|".join(f"({regex})" for regex, _, _ in rules),
+                             IGNORE_FLAGS | re.DOTALL)
+        # Groups are numbered from 1
+        return pattern, (False,) + tuple(is_negated for _, is_negated, _ in rules)
+
+    def match(self, path: str, is_dir: bool) -> bool:
+        """
+        Checks the path is ignored by the rules.
+        ----------------------------------------
+        -> Params
+            path: str
+            is_dir: bool
+        <- Return
+            bool or None when no rule matches
+        """
+        pattern, negated = ((self.directory_pattern, self.directory_negated) if is_dir
+                            else (self.file_pattern, self.file_negated))
+        if pattern is None or not path.startswith(self.base):
+            return None
+        relative = path[len(self.base):].lstrip("/\\").replace("\\", "/")
+        found = pattern.fullmatch(relative)
+        if found is None:
+            return None
+        return not negated[found.lastindex]
+
+    @classmethod
+    def read(cls, base: str, file_name: str) -> "IgnoreFile":
+        """
+        Read an ignore file of a directory.
+        -----------------------------------
+        -> Params
+            base: str
+            file_name: str
+        <- Return
+            IgnoreFile or None if it's not readable
+            or it has no rules
+        """
+        try:
+            with open(os.path.join(base, file_name), encoding="utf-8",
+                      errors="replace") as file:
+                ignore_file = cls(base, file.readlines())
+        except OSError:
+            return None
+        return ignore_file if ignore_file.directory_pattern else None
+
+
+class IgnoreRules:
+    """
+    The ignore files that apply to the entries
+    of a directory, from the outer directories
+    to the inner ones. It's immutable and shared
+    by the sub directories without ignore files.
+    """
+    __slots__ = ("files",)
+
+    def __init__(self, files: tuple = ()) -> None:
+        self.files = files
+
+    def __bool__(self) -> bool:
+        return bool(self.files)
+
+    def is_ignored(self, path: str, is_dir: bool) -> bool:
+        """
+        Checks the path is ignored. The rules of
+        the inner ignore files take precedence.
+        ----------------------------------------
+        -> Params
+            path: str
+            is_dir: bool
+        <- Return
+            bool
+        """
+        for ignore_file in reversed(self.files):
+            is_ignored = ignore_file.match(path, is_dir)
+            if is_ignored is not None:
+                return is_ignored
+        return False
+
+    def extend(self, dir_path: str, file_names: tuple) -> "IgnoreRules":
+        """
+        Returns the rules of a directory with the
+        given ignore files of it.
+        -----------------------------------------
+        -> Params
+            dir_path: str
+            file_names: tuple of str
+        <- Return
+            IgnoreRules
+        """
+        files = tuple(ignore_file for ignore_file in
+                      (IgnoreFile.read(dir_path, name) for name in file_names)
+                      if ignore_file)
+        if not files:
+            return self
+        return IgnoreRules(self.files + files)
+
+
+EMPTY_RULES = IgnoreRules()
+
+
+class IgnoreFilter:
+    """
+    Prunes the excluded and ignored directories
+    and files of a listed directory. The ignore
+    files of the parents of a searched root are
+    used up to its repository root.
+    ---------------------------------------------
+    @usage:
+        rules = ignore_filter.get_inherited_rules(root)
+        rules = ignore_filter.prune(dir_path, dir_names,
+                                    files, rules)
+    """
+
+    def __init__(self,
+                 excluded_directories: list = DEFAULT_EXCLUDED_DIRECTORIES,
+                 use_ignore_files: bool = False) -> None:
+        """
+        ---------------------------------------
+        -> Params
+            excluded_directories: list of str
+                names or globs of the directories
+                that are never walked
+            use_ignore_files: bool
+                prune the entries that are ignored
+                by the .gitignore and .ignore files
+        """
+        self.excluded = GlobMatcher(excluded_directories)
+        self.use_ignore_files = use_ignore_files
+
+    def get_parent_rules(self, dir_path: str) -> IgnoreRules:
+        """
+        Returns the rules that the directory gets
+        from its parents, from its repository root
+        down. It's empty out of a repository.
+        ------------------------------------------
+        -> Params
+            dir_path: str
+        <- Return
+            IgnoreRules
+        """
+        if not self.use_ignore_files:
+            return EMPTY_RULES
+        parents = list()
+        path = dir_path
+        while not os.path.exists(os.path.join(path, REPOSITORY_MARKER)):
+            parent = os.path.dirname(path)
+            if not parent or parent == path:
+                return EMPTY_RULES
+            path = parent
+            parents.append(path)
+        rules = EMPTY_RULES
+        for parent in reversed(parents):
+            rules = rules.extend(parent, IGNORE_FILE_NAMES)
+        return rules
+
+    def get_inherited_rules(self, dir_path: str, root: str = None) -> IgnoreRules:
+        """
+        Returns the rules that a directory in the
+        given root gets from its parents, with the
+        ignore files of the root down to its parent.
+        --------------------------------------------
+        -> Params
+            dir_path: str
+            root: str
+                searched root of the directory,
+                default is the directory itself
+        <- Return
+            IgnoreRules
+        """
+        if not self.use_ignore_files:
+            return EMPTY_RULES
+        if root is None or dir_path == root:
+            return self.get_parent_rules(dir_path)
+        parents = list()
+        path = dir_path
+        while path != root:
+            parent = os.path.dirname(path)
+            if not parent or parent == path:
+                break
+            path = parent
+            parents.append(path)
+        rules = self.get_parent_rules(parents[-1])
+        for parent in reversed(parents):
+            rules = rules.extend(parent, IGNORE_FILE_NAMES)
+        return rules
+
+    def is_skipped_directory(self, dir_path: str, root: str = None) -> bool:
+        """
+        Checks a directory should not be walked.
+        Its parents are expected to be walked.
+        ----------------------------------------
+        -> Params
+            dir_path: str
+            root: str
+                searched root of the directory,
+                without it the ignore files are
+                not checked
+        <- Return
+            bool
+        """
+        if self.excluded.match(os.path.basename(dir_path.rstrip("/\\"))):
+            return True
+        if not root or not self.use_ignore_files or dir_path == root:
+            return False
+        return self.get_inherited_rules(dir_path, root).is_ignored(dir_path, True)
+
+    def prune(self,
+              dir_path: str,
+              dir_names: list,
+              files: list,
+              parent_rules: IgnoreRules = None) -> IgnoreRules:
+        """
+        Remove the excluded and ignored entries of
+        a listed directory in place, the same way
+        of pruning os.walk, and returns the rules
+        of the directory for its sub directories.
+        ------------------------------------------
+        -> Params
+            dir_path: str
+            dir_names: list of str
+            files: list of str or os.DirEntry
+            parent_rules: IgnoreRules
+        <- Return
+            IgnoreRules
+        """
+        rules = EMPTY_RULES
+        if self.use_ignore_files:
+            file_names = {getattr(file, "name", file) for file in files}
+            names = tuple(name for name in IGNORE_FILE_NAMES if name in file_names)
+            rules = (parent_rules or EMPTY_RULES).extend(dir_path, names)
+        if self.excluded or rules:
+            dir_names[:] = [name for name in dir_names
+                            if not self.excluded.match(name)
+                            and not rules.is_ignored(f"{dir_path}/{name}", True)]
+        if rules:
+            files[:] = [file for file in files
+                        if not rules.is_ignored(f"{dir_path}/{getattr(file, 'name', file)}",
+                                                False)]
+        return rules
+
+    def walk(self, top: str, root: str = None) -> Generator:
+        """
+        Walk like os.walk and prune the excluded
+        and ignored entries before they are walked.
+        -------------------------------------------
+        -> Params
+            top: str
+            root: str
+                searched root of the top directory,
+                default is the top itself
+        <- Return
+            Generator: (dir path, dir names, file names)
+        """
+        if root is not None and top != root and self.is_skipped_directory(top, root):
+            return
+        rules = {top: self.get_inherited_rules(top, root)}
+        for dir_path, dir_names, file_names in os.walk(top):
+            dir_rules = self.prune(dir_path, dir_names, file_names,
+                                   rules.pop(dir_path, EMPTY_RULES))
+            for name in dir_names:
+                rules[os.path.join(dir_path, name)] = dir_rules
+            yield dir_path, dir_names, file_names
@@ -0,0 +1,664 @@
+"""
+This module keeps a persistent index of the
+directories and files names, so the repeated
+searches don't need to walk the whole tree.
+"""
+import os
+import sqlite3
+from time import time
+from collections import defaultdict
+from typing import Generator
+from lib.constants import INDEX_FILE_PATH
+from lib.constants import INDEX_MAX_AGE
+from .results import MatchKind
+from .results import SearchResult
+
+
+class IndexedEntry:
+    """
+    File entry of the index with the same name,
+    path and stat() of os.DirEntry. Its stat is
+    the recorded size and modification time, so
+    the indexed files don't need any os.stat.
+    """
+    __slots__ = ("name", "path", "st_size", "st_mtime")
+
+    def __init__(self,
+                 dir_path: str,
+                 name: str,
+                 size: int,
+                 mtime: float) -> None:
+        self.name = name
+        self.path = os.path.join(dir_path, name)
+        self.st_size = size
+        self.st_mtime = mtime
+
+    def stat(self) -> "IndexedEntry":
+        """
+        Returns the recorded stat of the file.
+        """
+        return self
+
+
+class FileIndex:
+    """
+    Records directories and files names with their
+    size and modification time in a SQLite database
+    and answers the name queries from it.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS roots (
+            id INTEGER PRIMARY KEY,
+            path TEXT UNIQUE NOT NULL,
+            mtime REAL NOT NULL,
+            built_at REAL NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS directories (
+            id INTEGER PRIMARY KEY,
+            root_id INTEGER NOT NULL,
+            path TEXT NOT NULL,
+            lower_path TEXT NOT NULL,
+            mtime REAL NOT NULL,
+            UNIQUE (root_id, path)
+        );
+        CREATE TABLE IF NOT EXISTS files (
+            id INTEGER PRIMARY KEY,
+            directory_id INTEGER NOT NULL,
+            name TEXT NOT NULL,
+            lower_name TEXT NOT NULL,
+            size INTEGER NOT NULL,
+            mtime REAL NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS directories_root
+            ON directories (root_id);
+        CREATE INDEX IF NOT EXISTS files_directory
+            ON files (directory_id);
+    """
+
+    def __init__(self,
+                 search_handler: object,
+                 index_path: str = INDEX_FILE_PATH,
+                 max_age: float = INDEX_MAX_AGE) -> None:
+        """
+        ---------------------------------------
+        -> Params
+            search_handler: Search
+                Used for resolving the roots and
+                walking through the directories.
+            index_path: str
+                Path of the SQLite database file.
+            max_age: float
+                Seconds that an index stays fresh.
+        """
+        self.search_handler = search_handler
+        self.index_path = index_path
+        self.max_age = max_age
+
+    def connect(self,
+                check_same_thread: bool = True) -> sqlite3.Connection:
+        """
+        Open a new connection to the index database
+        and make sure the tables are exist. Each
+        thread should use its own connection unless
+        the accesses are serialized by the caller.
+        -------------------------------------------
+        -> Params
+            check_same_thread: bool
+        <- Return
+            sqlite3.Connection
+        """
+        directory = os.path.dirname(self.index_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        connection = sqlite3.connect(self.index_path,
+                                     check_same_thread=check_same_thread)
+        connection.executescript(self.SCHEMA)
+        return connection
+
+    def exists(self) -> bool:
+        """
+        Checks the index database file is exist.
+        """
+        return os.path.isfile(self.index_path)
+
+    def get_roots(self, paths: list = None) -> list:
+        """
+        Returns the valid root directories for
+        the given paths. If didn't provided any
+        paths, it uses all partitions.
+        ---------------------------------------
+        -> Params
+            paths: list of str
+        <- Return
+            list of str
+        """
+        return self.search_handler.get_roots(paths)
+
+    def get_mtime(self, path: str) -> float:
+        """
+        Returns modification time of the path or
+        -1 when the path is not accessible.
+        """
+        try:
+            return os.stat(path).st_mtime
+        except OSError:
+            return -1
+
+    def build(self, paths: list = None) -> None:
+        """
+        Walk through the given roots and record
+        all directories and files in the index.
+        Previous records of the roots are replaced.
+        -------------------------------------------
+        -> Params
+            paths: list of str
+        """
+        connection = self.connect()
+        try:
+            for root in self.get_roots(paths):
+                with connection:
+                    self.remove_root(connection, root)
+                    root_id = connection.execute(
+                        "INSERT INTO roots (path, mtime, built_at) VALUES (?, ?, ?)",
+                        (root, self.get_mtime(root), time())).lastrowid
+                    for dir_path, _, file_names in self.search_handler.get_paths(paths=[root]):
+                        self.add_directory(connection, root_id, dir_path, file_names)
+        finally:
+            connection.close()
+
+    def add_directory(self,
+                      connection: sqlite3.Connection,
+                      root_id: int,
+                      dir_path: str,
+                      file_names: list) -> None:
+        """
+        Insert a directory and its files into the
+        index.
+        -----------------------------------------
+        -> Params
+            connection: sqlite3.Connection
+            root_id: int
+            dir_path: str
+            file_names: list of str
+        """
+        directory_id = connection.execute(
+            "INSERT INTO directories (root_id, path, lower_path, mtime) VALUES (?, ?, ?, ?)",
+            (root_id, dir_path, dir_path.lower(), self.get_mtime(dir_path))).lastrowid
+        self.add_files(connection, directory_id, dir_path, file_names)
+
+    def add_files(self,
+                  connection: sqlite3.Connection,
+                  directory_id: int,
+                  dir_path: str,
+                  file_names: list) -> None:
+        """
+        Insert the files of a directory into the
+        index.
+        -----------------------------------------
+        -> Params
+            connection: sqlite3.Connection
+            directory_id: int
+            dir_path: str
+            file_names: list of str
+        """
+        files = list()
+        for file_name in file_names:
+            try:
+                stat = os.stat(f"{dir_path}/{file_name}")
+            except OSError:
+                continue
+            files.append((directory_id, file_name, file_name.lower(),
+                          stat.st_size, stat.st_mtime))
+        connection.executemany(
+            "INSERT INTO files (directory_id, name, lower_name, size, mtime) VALUES (?, ?, ?, ?, ?)",
+            files)
+
+    def refresh(self, paths: list = None) -> int:
+        """
+        Update the index of the given roots by
+        checking just the directories mtimes and
+        rescanning the directories that their
+        entries changed. Not indexed roots will be
+        built completely.
+        -------------------------------------------
+        -> Params
+            paths: list of str
+        <- Return
+            int: number of rescanned directories
+        """
+        rescanned = 0
+        connection = self.connect()
+        try:
+            for root in self.get_roots(paths):
+                row = connection.execute("SELECT id FROM roots WHERE path = ?",
+                                         (root,)).fetchone()
+                if not row:
+                    self.build(paths=[root])
+                    continue
+                with connection:
+                    rescanned += self.refresh_root(connection, row[0], root)
+        finally:
+            connection.close()
+        return rescanned
+
+    def refresh_root(self,
+                     connection: sqlite3.Connection,
+                     root_id: int,
+                     root: str) -> int:
+        """
+        Walk through the indexed directories of the
+        root from top to bottom. Unchanged directories
+        are not listed and their indexed sub directories
+        are used, changed and new directories are
+        rescanned and missing ones are removed.
+        ----------------------------------------------
+        -> Params
+            connection: sqlite3.Connection
+            root_id: int
+            root: str
+        <- Return
+            int: number of rescanned directories
+        """
+        indexed = {path: (directory_id, mtime) for directory_id, path, mtime
+                   in connection.execute(
+                       "SELECT id, path, mtime FROM directories WHERE root_id = ?",
+                       (root_id,))}
+        sub_directories = defaultdict(list)
+        for path in indexed:
+            if path == root:
+                continue
+            parent = os.path.dirname(path)
+            # Children of a root with trailing separator
+            sub_directories[parent if parent in indexed else root].append(path)
+
+        rescanned = 0
+        visited = set()
+        pending = [root]
+        ignore_filter = self.search_handler.ignore_filter
+        while pending:
+            dir_path = pending.pop()
+            visited.add(dir_path)
+            mtime = self.get_mtime(dir_path)
+            directory_id, indexed_mtime = indexed.get(dir_path, (None, None))
+            if mtime == indexed_mtime:
+                pending.extend(sub_directories[dir_path])
+                continue
+            try:
+                dir_names, file_names = self.list_directory(dir_path)
+            except OSError:
+                visited.discard(dir_path)
+                continue
+            # The indexed directories were pruned when they were
+            # added, just the rescanned entries are checked
+            ignore_filter.prune(dir_path, dir_names, file_names,
+                                ignore_filter.get_inherited_rules(dir_path, root))
+            rescanned += 1
+            if directory_id is None:
+                self.add_directory(connection, root_id, dir_path, file_names)
+            else:
+                connection.execute("DELETE FROM files WHERE directory_id = ?",
+                                   (directory_id,))
+                connection.execute("UPDATE directories SET mtime = ? WHERE id = ?",
+                                   (mtime, directory_id))
+                self.add_files(connection, directory_id, dir_path, file_names)
+            pending.extend(os.path.join(dir_path, name) for name in dir_names)
+
+        removed = [(indexed[path][0],) for path in indexed.keys() - visited]
+        connection.executemany("DELETE FROM files WHERE directory_id = ?", removed)
+        connection.executemany("DELETE FROM directories WHERE id = ?", removed)
+        connection.execute("UPDATE roots SET mtime = ?, built_at = ? WHERE id = ?",
+                           (self.get_mtime(root), time(), root_id))
+        return rescanned
+
+    def list_directory(self, dir_path: str) -> tuple:
+        """
+        List a directory entries the same way of
+        os.walk. Symbolic links to directories are
+        not followed.
+        ------------------------------------------
+        -> Params
+            dir_path: str
+        <- Return
+            tuple: (sub directories names, file names)
+        """
+        dir_names = list()
+        file_names = list()
+        with os.scandir(dir_path) as entries:
+            for entry in entries:
+                try:
+                    is_dir = entry.is_dir()
+                except OSError:
+                    is_dir = False
+                if not is_dir:
+                    file_names.append(entry.name)
+                elif not entry.is_symlink():
+                    dir_names.append(entry.name)
+        return dir_names, file_names
+
+    def get_directory(self,
+                      connection: sqlite3.Connection,
+                      dir_path: str) -> tuple:
+        """
+        Returns id and root id of an indexed
+        directory or None if it's not indexed.
+        -------------------------------------
+        -> Params
+            connection: sqlite3.Connection
+            dir_path: str
+        <- Return
+            tuple: (id, root_id)
+        """
+        return connection.execute(
+            "SELECT id, root_id FROM directories WHERE path = ?",
+            (dir_path,)).fetchone()
+
+    def get_root_path(self,
+                      connection: sqlite3.Connection,
+                      root_id: int) -> str:
+        """
+        Returns the path of an indexed root or None
+        if it's not indexed.
+        -------------------------------------------
+        -> Params
+            connection: sqlite3.Connection
+            root_id: int
+        <- Return
+            str
+        """
+        row = connection.execute("SELECT path FROM roots WHERE id = ?",
+                                 (root_id,)).fetchone()
+        return row[0] if row else None
+
+    def add_tree(self,
+                 connection: sqlite3.Connection,
+                 root_id: int,
+                 dir_path: str) -> list:
+        """
+        Index a directory and all its sub directories,
+        replacing the previous records of them. The
+        excluded and ignored directories are skipped.
+        ----------------------------------------------
+        -> Params
+            connection: sqlite3.Connection
+            root_id: int
+            dir_path: str
+        <- Return
+            list of str: indexed directories
+        """
+        self.remove_tree(connection, dir_path)
+        added = list()
+        for path, _, file_names in self.search_handler.ignore_filter.walk(
+                dir_path, self.get_root_path(connection, root_id)):
+            self.add_directory(connection, root_id, path, file_names)
+            added.append(path)
+        return added
+
+    def remove_tree(self,
+                    connection: sqlite3.Connection,
+                    dir_path: str) -> None:
+        """
+        Delete a directory, its sub directories and
+        their files from the index.
+        -------------------------------------------
+        -> Params
+            connection: sqlite3.Connection
+            dir_path: str
+        """
+        prefix = os.path.join(dir_path, "")
+        tree = """SELECT id FROM directories
+                  WHERE path = ? OR substr(path, 1, ?) = ?"""
+        params = (dir_path, len(prefix), prefix)
+        connection.execute(f"DELETE FROM files WHERE directory_id IN ({tree})", params)
+        connection.execute(f"DELETE FROM directories WHERE id IN ({tree})", params)
+
+    def move_tree(self,
+                  connection: sqlite3.Connection,
+                  root_id: int,
+                  old_path: str,
+                  new_path: str) -> None:
+        """
+        Change path of an indexed directory and its
+        sub directories after it's renamed or moved.
+        --------------------------------------------
+        -> Params
+            connection: sqlite3.Connection
+            root_id: int
+                root of the new parent directory
+            old_path: str
+            new_path: str
+        """
+        self.remove_tree(connection, new_path)
+        prefix = os.path.join(old_path, "")
+        connection.execute(
+            """UPDATE directories
+               SET path = ? || substr(path, ?),
+                   lower_path = ? || substr(lower_path, ?),
+                   root_id = ?
+               WHERE path = ? OR substr(path, 1, ?) = ?""",
+            (new_path, len(old_path) + 1, new_path.lower(), len(old_path.lower()) + 1,
+             root_id, old_path, len(prefix), prefix))
+
+    def remove_file(self,
+                    connection: sqlite3.Connection,
+                    directory_id: int,
+                    file_name: str) -> None:
+        """
+        Delete a file of a directory from the index.
+        """
+        connection.execute("DELETE FROM files WHERE directory_id = ? AND name = ?",
+                           (directory_id, file_name))
+
+    def touch_directories(self,
+                          connection: sqlite3.Connection,
+                          dir_paths: set) -> None:
+        """
+        Record the current modification time of
+        the given indexed directories, after their
+        changes are applied to the index.
+        ------------------------------------------
+        -> Params
+            connection: sqlite3.Connection
+            dir_paths: set of str
+        """
+        connection.executemany("UPDATE directories SET mtime = ? WHERE path = ?",
+                               [(self.get_mtime(dir_path), dir_path)
+                                for dir_path in dir_paths])
+
+    def touch_roots(self,
+                    connection: sqlite3.Connection,
+                    paths: list = None) -> None:
+        """
+        Mark the given roots as up to date with
+        their current modification time.
+        ---------------------------------------
+        -> Params
+            connection: sqlite3.Connection
+            paths: list of str
+        """
+        for root in self.get_roots(paths):
+            connection.execute("UPDATE roots SET mtime = ?, built_at = ? WHERE path = ?",
+                               (self.get_mtime(root), time(), root))
+
+    def remove_root(self,
+                    connection: sqlite3.Connection,
+                    root: str) -> None:
+        """
+        Delete all the records of the given root.
+        """
+        row = connection.execute("SELECT id FROM roots WHERE path = ?",
+                                 (root,)).fetchone()
+        if not row:
+            return
+        connection.execute("""DELETE FROM files WHERE directory_id IN
+                              (SELECT id FROM directories WHERE root_id = ?)""", row)
+        connection.execute("DELETE FROM directories WHERE root_id = ?", row)
+        connection.execute("DELETE FROM roots WHERE id = ?", row)
+
+    def get_root_ids(self,
+                     connection: sqlite3.Connection,
+                     paths: list = None) -> list:
+        """
+        Returns the id of the indexed roots for the
+        given paths.
+        -------------------------------------------
+        -> Params
+            connection: sqlite3.Connection
+            paths: list of str
+        <- Return
+            list of int
+        """
+        root_ids = list()
+        for root in self.get_roots(paths):
+            row = connection.execute("SELECT id FROM roots WHERE path = ?",
+                                     (root,)).fetchone()
+            if row:
+                root_ids.append(row[0])
+        return root_ids
+
+    def is_fresh(self, paths: list = None) -> bool:
+        """
+        Checks all the given roots are indexed, the
+        index is not older than max age and none of
+        the indexed directories changed since they
+        were recorded. Adding, removing or renaming
+        an entry changes the mtime of its directory,
+        so a change at any depth is noticed with one
+        stat of each directory, without listing them.
+        -------------------------------------------
+        -> Params
+            paths: list of str
+        <- Return
+            bool
+        """
+        if not self.exists():
+            return False
+        roots = self.get_roots(paths)
+        if not roots:
+            return False
+        connection = self.connect()
+        try:
+            for root in roots:
+                row = connection.execute(
+                    "SELECT mtime, built_at FROM roots WHERE path = ?",
+                    (root,)).fetchone()
+                if not row:
+                    return False
+                mtime, built_at = row
+                if time() - built_at > self.max_age:
+                    return False
+                if self.get_mtime(root) != mtime:
+                    return False
+                directories = connection.execute(
+                    """SELECT directories.path, directories.mtime FROM directories
+                       JOIN roots ON roots.id = directories.root_id
+                       WHERE roots.path = ?""", (root,))
+                for dir_path, dir_mtime in directories:
+                    if self.get_mtime(dir_path) != dir_mtime:
+                        return False
+            return True
+        finally:
+            connection.close()
+
+    def search_names(self,
+                     targets: list,
+                     paths: list = None) -> Generator:
+        """
+        Search targets in the indexed directories
+        and files names of the given roots. It
+        yields the SearchResult of the matches
+        like Search.search_directory.
+        -----------------------------------------
+        -> Params
+            targets: list of str
+            paths: list of str
+        <- Return
+            Generator
+        """
+        matcher = self.search_handler.get_matcher(targets)
+        if not matcher.words:
+            return
+        table = self.search_handler.directories
+        name_filter = self.search_handler.name_filter
+        connection = self.connect()
+        try:
+            root_ids = self.get_root_ids(connection, paths)
+            placeholders = ",".join("?" * len(root_ids))
+            # One scan of each table for all the targets. The
+            # literals of the matcher filter the rows in SQL and
+            # without them, the matcher checks all the rows.
+            literals = matcher.literals or ()
+            directories = connection.execute(
+                f"""SELECT path, lower_path FROM directories
+                    WHERE root_id IN ({placeholders})
+                    {self.get_literals_filter("lower_path", literals)}""",
+                (*root_ids, *literals))
+            for dir_path, lower_path in directories:
+                found = matcher.find(lower_path, is_lower=True)
+                if found:
+                    yield SearchResult.from_path(MatchKind.DIR_NAME,
+                                                 dir_path.replace("\\", "/"),
+                                                 tuple(sorted(found)),
+                                                 table)
+            files = connection.execute(
+                f"""SELECT directories.path, files.name, files.lower_name FROM files
+                    JOIN directories ON directories.id = files.directory_id
+                    WHERE directories.root_id IN ({placeholders})
+                    {self.get_literals_filter("files.lower_name", literals)}""",
+                (*root_ids, *literals))
+            for dir_path, file_name, lower_name in files:
+                if name_filter and not name_filter.is_included(file_name):
+                    continue
+                found = matcher.find(lower_name, is_lower=True)
+                if found:
+                    yield SearchResult(MatchKind.FILE_NAME,
+                                       table.get_id(dir_path.replace("\\", "/")),
+                                       file_name,
+                                       tuple(sorted(found)),
+                                       table)
+        finally:
+            connection.close()
+
+    def get_literals_filter(self, column: str, literals: tuple) -> str:
+        """
+        Returns the SQL condition of the rows that
+        their column contains any of the literals.
+        ------------------------------------------
+        -> Params
+            column: str
+            literals: tuple of str
+        <- Return
+            str
+        """
+        if not literals:
+            return ""
+        return f"AND ({' OR '.join([f'instr({column}, ?) > 0'] * len(literals))})"
+
+    def walk(self, paths: list = None) -> Generator:
+        """
+        Yield the indexed directories in the same
+        shape of the traversal output, so the
+        workers can use it instead of walking the
+        tree. Files are given as IndexedEntry.
+        -------------------------------------------
+        -> Params
+            paths: list of str
+        <- Return
+            Generator
+        """
+        # Workers consume this generator from different
+        # threads but always under their lock
+        connection = self.connect(check_same_thread=False)
+        try:
+            for root_id in self.get_root_ids(connection, paths):
+                directories = connection.execute(
+                    "SELECT id, path FROM directories WHERE root_id = ? ORDER BY id",
+                    (root_id,)).fetchall()
+                for directory_id, dir_path in directories:
+                    files = [IndexedEntry(dir_path, name, size, mtime)
+                             for name, size, mtime in connection.execute(
+                                 "SELECT name, size, mtime FROM files WHERE directory_id = ?",
+                                 (directory_id,))]
+                    yield dir_path, [], files
+        finally:
+            connection.close()
@@ -0,0 +1,570 @@
+"""
+This module compiles the search targets into a
+matcher that finds all of them in one pass over
+a name or a file content.
+"""
+import re
+from collections import deque
+try:
+    from re import _parser as sre_parse
+    from re import _constants as sre_constants
+except ImportError:
+    # Python older than 3.11
+    import sre_parse
+    import sre_constants
+
+# Bytes of the data that are lowered at once for
+# finding the required literals of the regex targets
+LOWER_WINDOW = 1024 * 1024
+# Overlap of the file chunks in regex mode. Longer
+# matches across the chunks boundaries are missed
+REGEX_OVERLAP = 4096
+REPEATS = tuple(getattr(sre_constants, name) for name in
+                ("MAX_REPEAT", "MIN_REPEAT", "POSSESSIVE_REPEAT")
+                if hasattr(sre_constants, name))
+
+
+def get_required_literal(pattern: str) -> str:
+    """
+    Returns the longest lowered ASCII substring
+    that every match of the regex pattern must
+    contain, or an empty string if there isn't
+    any.
+    -------------------------------------------
+    -> Params
+        pattern: str
+    <- Return
+        str
+    """
+    try:
+        parsed = sre_parse.parse(pattern, re.IGNORECASE)
+    except (re.error, RecursionError):
+        return ""
+    literals = list()
+    collect_literals(parsed, literals)
+    return max(literals, key=len, default="").lower()
+
+
+def collect_literals(items: object, literals: list) -> None:
+    """
+    Add the runs of the literal characters of a
+    parsed pattern that are always matched to the
+    literals. Branches, character sets and
+    optional parts end a run.
+    --------------------------------------------
+    -> Params
+        items: parsed pattern
+        literals: list of str
+    """
+    run = list()
+    for operation, value in items:
+        if operation is sre_constants.LITERAL and value < 128:
+            run.append(chr(value))
+            continue
+        if run:
+            literals.append("".join(run))
+            run = list()
+        if operation is sre_constants.SUBPATTERN:
+            collect_literals(value[-1], literals)
+        elif operation in REPEATS and value[0] >= 1:
+            collect_literals(value[2], literals)
+    if run:
+        literals.append("".join(run))
+
+
+def find_literals(data: object,
+                  literals: set,
+                  start: int = 0,
+                  end: int = None) -> set:
+    """
+    Returns the lowered literals that are in the
+    data. The data is lowered in windows, so the
+    memory maps are not copied at once.
+    --------------------------------------------
+    -> Params
+        data: bytes, bytearray or mmap
+        literals: set of bytes
+        start: int
+        end: int
+    <- Return
+        set of bytes
+    """
+    if end is None:
+        end = len(data)
+    found = set()
+    overlap = max(len(literal) for literal in literals) - 1
+    position = start
+    while position < end and len(found) < len(literals):
+        stop = min(end, position + LOWER_WINDOW)
+        block = data[max(start, position - overlap):stop].lower()
+        for literal in literals - found:
+            if block.find(literal) >= 0:
+                found.add(literal)
+        position = stop
+    return found
+
+
+class TargetMatcher:
+    """
+    Case insensitive Aho-Corasick automaton of the
+    targets. A regex alternation of the targets
+    rejects the texts without any target at C speed
+    and the automaton reports the targets of the
+    rest in one pass.
+    """
+
+    def __init__(self, targets: list) -> None:
+        """
+        ---------------------------------------
+        -> Params
+            targets: list of str
+        """
+        self.targets = tuple(targets)
+        self.words = tuple({target.lower() for target in targets if target})
+        self.goto = [dict()]
+        self.fail = [0]
+        self.output = [set()]
+        self.build()
+        pattern = "|".join(re.escape(word) for word in
+                           sorted(self.words, key=len, reverse=True))
+        self.pattern = re.compile(pattern) if self.words else None
+        # Any match contains one of them in the lowered text
+        self.literals = self.words
+        self.bytes_matchers = dict()
+
+    def build(self) -> None:
+        """
+        Build the trie of the lowered targets and
+        set the failure links in breadth first order.
+        """
+        for word in self.words:
+            state = 0
+            for character in word:
+                next_state = self.goto[state].get(character)
+                if next_state is None:
+                    next_state = len(self.goto)
+                    self.goto.append(dict())
+                    self.fail.append(0)
+                    self.output.append(set())
+                    self.goto[state][character] = next_state
+                state = next_state
+            self.output[state].add(word)
+
+        queue = deque(self.goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for character, next_state in self.goto[state].items():
+                queue.append(next_state)
+                fail = self.fail[state]
+                while fail and character not in self.goto[fail]:
+                    fail = self.fail[fail]
+                fail = self.goto[fail].get(character, 0)
+                self.fail[next_state] = fail
+                self.output[next_state] |= self.output[fail]
+
+    def find(self, text: str, is_lower: bool = False) -> set:
+        """
+        Returns the lowered targets that are in the
+        given text.
+        -------------------------------------------
+        -> Params
+            text: str
+            is_lower: bool
+                the text is already lowered
+        <- Return
+            set of str
+        """
+        if not self.pattern:
+            return set()
+        if not is_lower:
+            text = text.lower()
+        first_match = self.pattern.search(text)
+        if not first_match:
+            return set()
+        if len(self.words) == 1:
+            return set(self.words)
+        found = set()
+        goto = self.goto
+        fail = self.fail
+        output = self.output
+        state = 0
+        for character in text[first_match.start():]:
+            while state and character not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(character, 0)
+            if output[state]:
+                found |= output[state]
+                if len(found) == len(self.words):
+                    break
+        return found
+
+    def is_match(self, text: str, is_lower: bool = False) -> bool:
+        """
+        Checks any of the targets is in the text.
+        -----------------------------------------
+        -> Params
+            text: str
+            is_lower: bool
+        <- Return
+            bool
+        """
+        if not self.pattern:
+            return False
+        if not is_lower:
+            text = text.lower()
+        return self.pattern.search(text) is not None
+
+    def get_bytes_matcher(self, encodings: tuple = ("utf-8",)) -> "BytesMatcher":
+        """
+        Returns the matcher of the targets encoded
+        with the given encodings. It's compiled once
+        for each group of encodings.
+        -------------------------------------------
+        -> Params
+            encodings: tuple of str
+        <- Return
+            BytesMatcher
+        """
+        matcher = self.bytes_matchers.get(encodings)
+        if matcher is None:
+            matcher = BytesMatcher(self.words, encodings)
+            self.bytes_matchers[encodings] = matcher
+        return matcher
+
+
+class BytesMatcher:
+    """
+    Case insensitive matcher of the encoded targets
+    that searches raw bytes, mmap objects included,
+    without decoding or lowering them. Each character
+    of a target matches its encoded case variants
+    and each target matches its form in any of the
+    encodings.
+    """
+
+    def __init__(self, words: tuple, encodings: tuple) -> None:
+        """
+        ---------------------------------------
+        -> Params
+            words: tuple of str
+                lowered targets
+            encodings: tuple of str
+        """
+        self.encodings = encodings
+        self.patterns = dict()
+        # Longest encoded target, neighbour chunks must
+        # overlap by one byte less to not miss a target
+        self.max_length = 0
+        for word in words:
+            # Same encoded forms, like the ASCII targets
+            # in UTF-8 and latin-1, are searched once
+            forms = dict.fromkeys(self.compile_word(word, encoding)
+                                  for encoding in encodings)
+            forms.pop(None, None)
+            if forms:
+                self.patterns[word] = re.compile(b"|".join(forms))
+        self.words = tuple(self.patterns)
+        # {found targets: (pattern, targets) of the rest}
+        self.remaining = dict()
+        self.pattern = self.get_remaining(frozenset())[0] if self.patterns else None
+
+    def compile_word(self, word: str, encoding: str) -> bytes:
+        """
+        Create the bytes pattern of a lowered target
+        or None if it can't be encoded.
+        --------------------------------------------
+        -> Params
+            word: str
+            encoding: str
+        <- Return
+            bytes
+        """
+        pattern = list()
+        length = 0
+        for character in word:
+            variants = list()
+            for variant in dict.fromkeys((character,
+                                          character.upper(),
+                                          character.title())):
+                if variant.lower() != character:
+                    continue
+                try:
+                    variants.append(variant.encode(encoding))
+                except UnicodeEncodeError:
+                    continue
+            if not variants:
+                return None
+            length += max(len(variant) for variant in variants)
+            if len(variants) == 1:
+                pattern.append(re.escape(variants[0]))
+            elif all(len(variant) == 1 for variant in variants):
+                pattern.append(b"[" + b"".join(re.escape(variant)
+                                               for variant in variants) + b"]")
+            else:
+                pattern.append(b"(?:" + b"|".join(re.escape(variant)
+                                                   for variant in variants) + b")")
+        self.max_length = max(self.max_length, length)
+        return b"".join(pattern)
+
+    def find(self, data: bytes, start: int = 0, end: int = None) -> set:
+        """
+        Returns the lowered targets that are in the
+        given data.
+        -------------------------------------------
+        -> Params
+            data: bytes, bytearray or mmap
+            start: int
+            end: int
+        <- Return
+            set of str
+        """
+        if not self.pattern:
+            return set()
+        if end is None:
+            end = len(data)
+        found = set()
+        pattern, words = self.pattern, self.words
+        position = start
+        while True:
+            match = pattern.search(data, position, end)
+            if not match:
+                return found
+            # Each group is a target, the others that start at
+            # the same position are hidden by the first one
+            position = match.start()
+            found.add(words[match.lastindex - 1])
+            for word in words:
+                if word not in found and self.patterns[word].match(data, position, end):
+                    found.add(word)
+            if len(found) == len(self.words):
+                return found
+            pattern, words = self.get_remaining(frozenset(found))
+            position += 1
+
+    def get_remaining(self, found: frozenset) -> tuple:
+        """
+        Returns the combined pattern of the targets
+        that are not found yet, with a group for
+        each of them. It's compiled once for each
+        group of found targets.
+        -------------------------------------------
+        -> Params
+            found: frozenset of str
+        <- Return
+            tuple: (re.Pattern, tuple of str)
+        """
+        remaining = self.remaining.get(found)
+        if remaining is None:
+            words = tuple(word for word in self.words if word not in found)
+            pattern = re.compile(b"|".join(b"(%s)" % self.patterns[word].pattern
+                                           for word in words))
+            remaining = (pattern, words)
+            self.remaining[found] = remaining
+        return remaining
+
+
+class RegexMatcher:
+    """
+    Case insensitive regex targets with the same
+    interface of TargetMatcher. Each pattern is
+    compiled once and runs just on the texts that
+    contain its required literal, which is found
+    with str.find or bytes.find.
+    """
+
+    def __init__(self, targets: list) -> None:
+        """
+        ---------------------------------------
+        -> Params
+            targets: list of str
+                regex patterns
+        """
+        self.targets = tuple(targets)
+        self.words = tuple(dict.fromkeys(target for target in targets if target))
+        self.patterns = dict()
+        # {pattern: required literal or empty string}
+        self.required = dict()
+        for word in self.words:
+            try:
+                self.patterns[word] = re.compile(word, re.IGNORECASE)
+            except re.error as error:
+                raise ValueError(f"invalid regex pattern -> <{word}>") from error
+            self.required[word] = get_required_literal(word)
+        required = tuple(self.required.values())
+        # The literals can filter the texts just when
+        # all the patterns have one
+        self.literals = required if required and all(required) else None
+        self.bytes_matchers = dict()
+
+    def find(self, text: str, is_lower: bool = False) -> set:
+        """
+        Returns the patterns that match the text.
+        -----------------------------------------
+        -> Params
+            text: str
+            is_lower: bool
+                the text is already lowered
+        <- Return
+            set of str
+        """
+        lowered = text if is_lower else text.lower()
+        return {word for word, pattern in self.patterns.items()
+                if lowered.find(self.required[word]) >= 0 and pattern.search(text)}
+
+    def is_match(self, text: str, is_lower: bool = False) -> bool:
+        """
+        Checks any of the patterns matches the text.
+        --------------------------------------------
+        -> Params
+            text: str
+            is_lower: bool
+        <- Return
+            bool
+        """
+        return bool(self.find(text, is_lower))
+
+    def get_bytes_matcher(self, encodings: tuple = ("utf-8",)) -> "RegexBytesMatcher":
+        """
+        Returns the matcher of the patterns for the
+        contents with the given encodings.
+        -------------------------------------------
+        -> Params
+            encodings: tuple of str
+        <- Return
+            RegexBytesMatcher
+        """
+        matcher = self.bytes_matchers.get(encodings)
+        if matcher is None:
+            matcher = RegexBytesMatcher(self.required, encodings)
+            self.bytes_matchers[encodings] = matcher
+        return matcher
+
+
+class RegexBytesMatcher:
+    """
+    Searches the regex patterns in raw bytes. For
+    UTF-8 and latin-1 contents and ASCII patterns
+    the patterns run on the bytes directly, other
+    contents are decoded first. A pattern runs
+    just when its required literal is in the
+    lowered data.
+    """
+
+    def __init__(self, required: dict, encodings: tuple) -> None:
+        """
+        ---------------------------------------
+        -> Params
+            required: dict
+                {pattern: required literal}
+            encodings: tuple of str
+        """
+        self.encodings = encodings
+        self.max_length = REGEX_OVERLAP
+        self.is_bytes = all(encoding in ("utf-8", "latin-1") for encoding in encodings) \
+            and all(word.isascii() for word in required)
+        self.patterns = dict()
+        self.literals = dict()
+        if self.is_bytes:
+            try:
+                for word, literal in required.items():
+                    self.patterns[word] = re.compile(word.encode("ascii"), re.IGNORECASE)
+                    self.literals[word] = literal.encode("ascii")
+                return
+            except re.error:
+                # A str only syntax, search the decoded content
+                self.is_bytes = False
+        for word, literal in required.items():
+            self.patterns[word] = re.compile(word, re.IGNORECASE)
+            self.literals[word] = literal
+
+    def decode(self, data: bytes) -> str:
+        """
+        Decode the data with the first encoding
+        that can decode it.
+        ---------------------------------------
+        -> Params
+            data: bytes
+        <- Return
+            str
+        """
+        for encoding in self.encodings[:-1]:
+            try:
+                return data.decode(encoding)
+            except UnicodeDecodeError:
+                continue
+        return data.decode(self.encodings[-1], errors="replace")
+
+    def get_boundary(self, data: bytes, position: int, start: int) -> int:
+        """
+        Returns the nearest character boundary at
+        or before the position, so a window of the
+        data doesn't split a character. UTF-16
+        characters start at the even offsets and
+        UTF-8 ones at the non continuation bytes.
+        -------------------------------------------
+        -> Params
+            data: bytes, bytearray or mmap
+            position: int
+            start: int
+                offset of the first character
+        <- Return
+            int
+        """
+        if self.encodings[0].startswith("utf-16"):
+            return position - (position - start) % 2
+        boundary = position
+        while boundary > max(start, position - 3) and data[boundary] & 0xC0 == 0x80:
+            boundary -= 1
+        return boundary
+
+    def find_text(self, text: str, found: set) -> set:
+        """
+        Returns the patterns that match the decoded
+        text, except the already found ones.
+        -------------------------------------------
+        -> Params
+            text: str
+            found: set of str
+        <- Return
+            set of str
+        """
+        lowered = text.lower()
+        return {word for word, pattern in self.patterns.items()
+                if word not in found and lowered.find(self.literals[word]) >= 0
+                and pattern.search(text)}
+
+    def find(self, data: bytes, start: int = 0, end: int = None) -> set:
+        """
+        Returns the patterns that match the data.
+        The contents that are decoded first are
+        decoded in windows, which overlap by the
+        longest match that is found across their
+        boundaries, so a memory map is never
+        decoded at once.
+        -----------------------------------------
+        -> Params
+            data: bytes, bytearray or mmap
+            start: int
+            end: int
+        <- Return
+            set of str
+        """
+        if end is None:
+            end = len(data)
+        if not self.is_bytes:
+            found = set()
+            position = start
+            while position < end and len(found) < len(self.patterns):
+                stop = end
+                if end - position > LOWER_WINDOW:
+                    stop = self.get_boundary(data, position + LOWER_WINDOW, start)
+                window_start = self.get_boundary(data, max(start, position - REGEX_OVERLAP),
+                                                 start)
+                found |= self.find_text(self.decode(bytes(data[window_start:stop])), found)
+                position = stop
+            return found
+        literals = {literal for literal in self.literals.values() if literal}
+        present = find_literals(data, literals, start, end) if literals else set()
+        present.add(b"")
+        return {word for word, pattern in self.patterns.items()
+                if self.literals[word] in present and pattern.search(data, start, end)}
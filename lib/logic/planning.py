@@ -0,0 +1,176 @@
+"""
+This module orders the checks of the files before
+reading their contents. The criteria of a search
+are compiled to a query plan that runs the cheap
+and selective checks first, so the stat and the
+read are skipped for the files that the earlier
+checks already rejected.
+"""
+
+# Relative cost of each check of a file, checking a
+# name in a hash set is 1
+STAGE_COSTS = {"extension": 1, "index": 2, "size": 25}
+# The stat of an indexed entry, or a Windows entry, is
+# recorded while listing
+CACHED_STAT_COST = 1
+READ_COST = 1000
+# Ratio of the files that pass each check, assumed
+# until enough files are observed
+DEFAULT_PASS_RATES = {"extension": 0.3, "index": 0.2, "size": 0.95}
+MIN_OBSERVED_FILES = 256
+# Files between the updates of the plan from the counters
+UPDATE_INTERVAL = 4096
+
+
+class PlanStage:
+    """
+    One check of the files in the plan. Its check
+    callable counts the checked and the skipped
+    files in the counters named after the stage,
+    like files_checked_size and files_skipped_size.
+    """
+    __slots__ = ("name", "check", "cost", "pass_rate", "is_observed")
+
+    def __init__(self,
+                 name: str,
+                 check: object,
+                 cost: float) -> None:
+        """
+        ---------------------------------------
+        -> Params
+            name: str
+            check: Callable
+                (entry, full path, matcher, counters) -> bool
+            cost: float
+        """
+        self.name = name
+        self.check = check
+        self.cost = cost
+        self.pass_rate = DEFAULT_PASS_RATES[name]
+        self.is_observed = False
+
+    @property
+    def rank(self) -> float:
+        """
+        Cost of the check for each file that it
+        rejects. Running the checks with the lower
+        ranks first has the lowest expected cost.
+        """
+        return self.cost / max(1 - self.pass_rate, 1e-6)
+
+
+class QueryPlan:
+    """
+    Ordered checks of the files contents search
+    of a matcher. The order is chosen by the costs
+    and the assumed pass rates of the checks and
+    it's updated with the observed pass rates
+    while the search runs.
+    ---------------------------------------------
+    @usage:
+        for stage in plan.stages:
+            if not stage.check(entry, full_path, matcher, counters):
+                break
+        else:
+            read(full_path)
+    """
+
+    def __init__(self,
+                 matcher: object,
+                 stages: list,
+                 description: list) -> None:
+        """
+        ---------------------------------------
+        -> Params
+            matcher: TargetMatcher or RegexMatcher
+            stages: list of PlanStage
+            description: list of (str, str)
+                the fixed steps of the search that
+                are shown by explain
+        """
+        self.matcher = matcher
+        self.description = description
+        self.stages = self.order(stages)
+        self.files_until_update = UPDATE_INTERVAL
+
+    def order(self, stages: list) -> tuple:
+        """
+        Returns the stages sorted by their rank.
+        ----------------------------------------
+        -> Params
+            stages: list of PlanStage
+        <- Return
+            tuple of PlanStage
+        """
+        return tuple(sorted(stages, key=lambda stage: stage.rank))
+
+    def observe(self, files_count: int, stats: object) -> None:
+        """
+        Count the checked files and update the plan
+        from the counters of the search at the
+        intervals. The count is shared by the threads
+        without a lock, an update more or less
+        doesn't matter.
+        -------------------------------------------
+        -> Params
+            files_count: int
+            stats: SearchStats
+        """
+        self.files_until_update -= files_count
+        if self.files_until_update > 0:
+            return
+        self.files_until_update = UPDATE_INTERVAL
+        self.update(stats.snapshot())
+
+    def update(self, snapshot: dict) -> None:
+        """
+        Use the observed pass rates of the stages
+        that checked enough files and reorder them.
+        The pass rate of a stage is observed on the
+        files that passed the stages before it.
+        -------------------------------------------
+        -> Params
+            snapshot: dict
+                SearchStats snapshot
+        """
+        for stage in self.stages:
+            checked = snapshot.get(f"files_checked_{stage.name}", 0)
+            if checked < MIN_OBSERVED_FILES:
+                continue
+            skipped = snapshot.get(f"files_skipped_{stage.name}", 0)
+            stage.pass_rate = 1 - skipped / checked
+            stage.is_observed = True
+        # Replaced at once, the threads keep iterating the old one
+        self.stages = self.order(self.stages)
+
+    def explain(self, snapshot: dict = None) -> str:
+        """
+        Returns the plan as text, with the counters
+        of the stages when a snapshot is given.
+        -------------------------------------------
+        -> Params
+            snapshot: dict
+                SearchStats snapshot
+        <- Return
+            str
+        """
+        lines = [f"QUERY PLAN  targets: {', '.join(self.matcher.targets)}"]
+        for name, detail in self.description:
+            lines.append(f"  {name:<12} {detail}")
+        if not self.stages:
+            return "\n".join(lines)
+        lines.append("  checks before reading, by rank = cost / rejected ratio:")
+        for index, stage in enumerate(self.stages, start=1):
+            line = (f"    {index}. {stage.name:<10} cost {stage.cost:<5g} "
+                    f"pass {stage.pass_rate:>4.0%} "
+                    f"({'observed' if stage.is_observed else 'assumed'})  "
+                    f"rank {stage.rank:.1f}")
+            if snapshot:
+                line += (f"  checked {snapshot.get(f'files_checked_{stage.name}', 0)}"
+                         f"  skipped {snapshot.get(f'files_skipped_{stage.name}', 0)}")
+            lines.append(line)
+        line = f"    {len(self.stages) + 1}. read       cost {READ_COST}"
+        if snapshot:
+            line += f"  read {snapshot.get('files_read', 0)}"
+        lines.append(line)
+        return "\n".join(lines)
@@ -0,0 +1,199 @@
+"""
+This module sends the files contents matching to
+a pool of processes, so searching in files is not
+limited to one CPU core by the GIL.
+"""
+import os
+from threading import Lock
+from collections import deque
+from typing import Generator
+from multiprocessing import get_context
+from concurrent.futures import CancelledError
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from .matching import TargetMatcher
+from .scanning import ContentScanner
+
+# Matchers compiled in each pool process, by their class and targets
+PROCESS_MATCHERS = dict()
+
+
+def scan_batch(paths: list,
+               targets: tuple,
+               scanner: ContentScanner,
+               matcher_class: type = TargetMatcher) -> list:
+    """
+    Runs in the pool processes and searches the
+    targets in the contents of a batch of files.
+    --------------------------------------------
+    -> Params
+        paths: list of str
+        targets: tuple of str
+        scanner: ContentScanner
+        matcher_class: type
+            TargetMatcher or RegexMatcher
+    <- Return
+        list of tuple: (path, found targets)
+    """
+    key = (matcher_class, targets)
+    matcher = PROCESS_MATCHERS.get(key)
+    if matcher is None:
+        matcher = matcher_class(targets)
+        PROCESS_MATCHERS.clear()
+        PROCESS_MATCHERS[key] = matcher
+    results = list()
+    for path in paths:
+        try:
+            results.append((path, scanner.scan(path, matcher)))
+        except OSError:
+            results.append((path, set()))
+    return results
+
+
+class ProcessPoolScanner:
+    """
+    Scans the files in batches on a process pool.
+    The batches of all the search threads are
+    queued in the order they are submitted and
+    their results are collected as they complete,
+    so a thread goes on listing and submitting
+    while the processes scan. The pool is started
+    at the first batch of each search and shut
+    down at its end.
+    ---------------------------------------------
+    @usage:
+        pool.start()
+        pool.submit(paths, targets)
+        for path, found in pool.collect(pool.max_pending):
+            ...
+        # At the end of the search
+        for path, found in pool.collect():
+            ...
+        pool.shutdown()
+    """
+
+    def __init__(self,
+                 scanner: ContentScanner,
+                 processes_count: int = None,
+                 batch_size: int = 32) -> None:
+        """
+        ---------------------------------------
+        -> Params
+            scanner: ContentScanner
+                settings of scanning in the processes
+            processes_count: int
+                default is the number of CPU cores
+            batch_size: int
+                files sent to a process at once
+        """
+        self.scanner = scanner
+        self.batch_size = batch_size
+        self.processes_count = processes_count or os.cpu_count() or 1
+        self.executor = None
+        # Outstanding batches, enough to keep every process busy
+        # while the threads collect the completed ones
+        self.futures = deque()
+        self.max_pending = self.processes_count * 2
+        self.is_stopped = False
+        self.lock = Lock()
+
+    def start(self) -> None:
+        """
+        Allow the batches of a new search. The
+        processes are started by the first one.
+        """
+        with self.lock:
+            self.is_stopped = False
+
+    def get_executor(self) -> ProcessPoolExecutor:
+        """
+        Returns the running pool or starts a new
+        one. The processes are spawned, forking
+        this process that already runs the search
+        threads can copy their held locks.
+        --------------------------------------------
+        <- Return
+            ProcessPoolExecutor or None when the pool
+            is stopped
+        """
+        with self.lock:
+            if self.executor is None and not self.is_stopped:
+                self.executor = ProcessPoolExecutor(max_workers=self.processes_count,
+                                                    mp_context=get_context("spawn"))
+            return self.executor
+
+    def submit(self,
+               paths: list,
+               targets: tuple,
+               matcher_class: type = TargetMatcher) -> None:
+        """
+        Queue the paths in batches without waiting
+        for their results. Nothing is queued after
+        the pool is stopped.
+        ---------------------------------------
+        -> Params
+            paths: list of str
+            targets: tuple of str
+            matcher_class: type
+        """
+        executor = self.get_executor()
+        if executor is None:
+            return
+        try:
+            futures = [executor.submit(scan_batch,
+                                       paths[index:index + self.batch_size],
+                                       targets,
+                                       self.scanner,
+                                       matcher_class)
+                       for index in range(0, len(paths), self.batch_size)]
+        except RuntimeError:
+            if self.is_stopped:
+                # Shut down by stopping the search meanwhile
+                return
+            raise
+        with self.lock:
+            self.futures.extend(futures)
+
+    def collect(self, max_pending: int = 0) -> Generator:
+        """
+        Yield the results of the completed batches
+        in the order they were submitted. It waits
+        for the oldest batch just while more than
+        max_pending batches are outstanding, so it
+        waits for all of them with the default.
+        It stops when the pool is shut down.
+        ------------------------------------------
+        -> Params
+            max_pending: int
+        <- Return
+            Generator: (path, found targets)
+        """
+        while True:
+            with self.lock:
+                if not self.futures:
+                    return
+                future = self.futures[0]
+                if not future.done() and len(self.futures) <= max_pending:
+                    return
+                self.futures.popleft()
+            try:
+                results = future.result()
+            except (CancelledError, BrokenProcessPool):
+                if self.is_stopped:
+                    return
+                raise
+            yield from results
+
+    def shutdown(self) -> None:
+        """
+        Stop the processes and cancel the batches
+        that are not started yet. The next search
+        starts a new pool.
+        """
+        with self.lock:
+            self.is_stopped = True
+            executor = self.executor
+            self.executor = None
+            self.futures.clear()
+        if executor:
+            executor.shutdown(wait=False, cancel_futures=True)
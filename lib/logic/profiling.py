@@ -0,0 +1,226 @@
+"""
+This module records the named spans of a search
+in a ring buffer of each thread and writes them
+as a Chrome trace, which can be opened in
+chrome://tracing or ui.perfetto.dev. It can
+also profile the search threads with cProfile.
+"""
+import os
+import json
+from time import perf_counter_ns
+from threading import Lock
+from threading import local
+from threading import get_native_id
+from threading import current_thread
+from collections import deque
+
+
+class Span:
+    """
+    Context manager that records its duration
+    in the ring buffer of its thread.
+    """
+    __slots__ = ("events", "name", "args", "start")
+
+    def __init__(self, events: deque, name: str, args: dict) -> None:
+        self.events = events
+        self.name = name
+        self.args = args
+        self.start = 0
+
+    def __enter__(self) -> "Span":
+        self.start = perf_counter_ns()
+        return self
+
+    def __exit__(self, *_) -> None:
+        self.events.append((self.name, self.start,
+                            perf_counter_ns() - self.start, self.args))
+
+
+class NullSpan:
+    """
+    Span of a disabled profiler that records
+    nothing.
+    """
+    __slots__ = ()
+
+    def __enter__(self) -> "NullSpan":
+        return self
+
+    def __exit__(self, *_) -> None:
+        pass
+
+
+NULL_SPAN = NullSpan()
+
+
+class Profiler:
+    """
+    Records the spans of the threads and the
+    cProfile of the search threads. Without a
+    trace path and a cProfile path it's disabled
+    and its spans cost just a method call.
+    ---------------------------------------------
+    @usage:
+        with profiler.span("read", {"path": path}):
+            read(path)
+    """
+
+    def __init__(self,
+                 trace_path: str = None,
+                 cprofile_path: str = None,
+                 ring_size: int = 100_000) -> None:
+        """
+        ---------------------------------------
+        -> Params
+            trace_path: str
+                path of the Chrome trace JSON
+            cprofile_path: str
+                path of the cProfile stats dump
+            ring_size: int
+                last spans that are kept of each
+                thread
+        """
+        self.trace_path = trace_path
+        self.cprofile_path = cprofile_path
+        self.ring_size = ring_size
+        self.local = local()
+        self.lock = Lock()
+        # (thread id, thread name, events) of each thread
+        self.threads = list()
+        self.profiles = list()
+        self.origin = perf_counter_ns()
+
+    @property
+    def is_enabled(self) -> bool:
+        """
+        Checks the profiler records anything.
+        """
+        return bool(self.trace_path or self.cprofile_path)
+
+    def get_events(self) -> deque:
+        """
+        Returns the ring buffer of the calling
+        thread.
+        --------------------------------------
+        <- Return
+            deque
+        """
+        try:
+            return self.local.events
+        except AttributeError:
+            events = deque(maxlen=self.ring_size)
+            self.local.events = events
+            with self.lock:
+                self.threads.append((get_native_id(), current_thread().name, events))
+            return events
+
+    def span(self, name: str, args: dict = None) -> Span:
+        """
+        Returns a context manager that records a
+        span with the given name.
+        ----------------------------------------
+        -> Params
+            name: str
+            args: dict
+                shown with the span in the trace
+        <- Return
+            Span
+        """
+        if not self.trace_path:
+            return NULL_SPAN
+        return Span(self.get_events(), name, args)
+
+    def start_thread(self) -> None:
+        """
+        Must be called by each search thread when it
+        starts, to profile it with cProfile.
+        """
+        if not self.cprofile_path:
+            return
+        # Loaded just when the threads are profiled
+        import cProfile
+        profile = cProfile.Profile()
+        try:
+            profile.enable()
+        except ValueError:
+            # Another profiler is active in this thread
+            return
+        self.local.profile = profile
+
+    def finish_thread(self) -> None:
+        """
+        Must be called by each search thread before
+        it stops.
+        """
+        profile = getattr(self.local, "profile", None)
+        if profile is None:
+            return
+        profile.disable()
+        self.local.profile = None
+        with self.lock:
+            self.profiles.append(profile)
+
+    def export(self) -> None:
+        """
+        Write the trace and the cProfile stats of
+        the finished threads to their paths.
+        """
+        if self.trace_path:
+            self.write_trace(self.trace_path)
+        if self.cprofile_path:
+            with self.lock:
+                profiles = list(self.profiles)
+            if profiles:
+                import pstats
+                make_directory(self.cprofile_path)
+                stats = pstats.Stats(profiles[0])
+                stats.add(*profiles[1:])
+                stats.dump_stats(self.cprofile_path)
+
+    def get_trace(self) -> dict:
+        """
+        Returns the recorded spans in the Chrome
+        trace event format.
+        ----------------------------------------
+        <- Return
+            dict
+        """
+        process_id = os.getpid()
+        trace_events = list()
+        with self.lock:
+            threads = list(self.threads)
+        for thread_id, thread_name, events in threads:
+            trace_events.append({"name": "thread_name", "ph": "M",
+                                 "pid": process_id, "tid": thread_id,
+                                 "args": {"name": thread_name}})
+            for name, start, duration, args in tuple(events):
+                event = {"name": name, "cat": "search", "ph": "X",
+                         "ts": (start - self.origin) / 1000,
+                         "dur": duration / 1000,
+                         "pid": process_id, "tid": thread_id}
+                if args:
+                    event["args"] = args
+                trace_events.append(event)
+        return {"traceEvents": trace_events, "displayTimeUnit": "ms"}
+
+    def write_trace(self, path: str) -> None:
+        """
+        Write the Chrome trace JSON file.
+        ---------------------------------
+        -> Params
+            path: str
+        """
+        make_directory(path)
+        with open(path, "w") as file:
+            json.dump(self.get_trace(), file)
+
+
+def make_directory(path: str) -> None:
+    """
+    Create the directory of the given file path
+    if it doesn't exist.
+    """
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
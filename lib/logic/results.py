@@ -0,0 +1,228 @@
+"""
+This module contains the helpers for delivering
+the search results.
+"""
+from enum import Enum
+from typing import Callable
+from threading import Lock
+from threading import Event
+from threading import Thread
+
+
+class MatchKind(Enum):
+    """
+    Where the targets are found. The values are
+    the names of the result tables.
+    """
+    DIR_NAME = "dir_name"
+    FILE_NAME = "file_name"
+    IN_FILE = "in_file"
+
+
+class DirectoryTable:
+    """
+    Interns the directories of the results. Each
+    directory path is stored once and the results
+    keep its id instead of the full path.
+    """
+
+    def __init__(self) -> None:
+        self.paths = list()
+        self.ids = dict()
+        self.lock = Lock()
+
+    def __len__(self) -> int:
+        return len(self.paths)
+
+    def get_id(self, path: str) -> int:
+        """
+        Returns the id of the directory and adds
+        it to the table if it's new.
+        ----------------------------------------
+        -> Params
+            path: str
+        <- Return
+            int
+        """
+        directory_id = self.ids.get(path)
+        if directory_id is None:
+            with self.lock:
+                directory_id = self.ids.get(path)
+                if directory_id is None:
+                    directory_id = len(self.paths)
+                    self.paths.append(path)
+                    self.ids[path] = directory_id
+        return directory_id
+
+    def get_path(self, directory_id: int) -> str:
+        """
+        Returns the path of the directory id.
+        -------------------------------------
+        -> Params
+            directory_id: int
+        <- Return
+            str
+        """
+        return self.paths[directory_id]
+
+
+class SearchResult:
+    """
+    A found path with the kind of the match and
+    the found targets. The path is kept as the
+    id of its directory in a DirectoryTable and
+    its base name.
+    """
+    __slots__ = ("kind", "directory_id", "name", "targets", "directories")
+
+    def __init__(self,
+                 kind: MatchKind,
+                 directory_id: int,
+                 name: str,
+                 targets: tuple,
+                 directories: DirectoryTable) -> None:
+        """
+        ---------------------------------------
+        -> Params
+            kind: MatchKind
+            directory_id: int
+                None when the path has no directory
+            name: str
+            targets: tuple of str
+            directories: DirectoryTable
+        """
+        self.kind = kind
+        self.directory_id = directory_id
+        self.name = name
+        self.targets = targets
+        self.directories = directories
+
+    @classmethod
+    def from_path(cls,
+                  kind: MatchKind,
+                  path: str,
+                  targets: tuple,
+                  directories: DirectoryTable) -> "SearchResult":
+        """
+        Create a result of a path with "/"
+        separators.
+        ----------------------------------
+        -> Params
+            kind: MatchKind
+            path: str
+            targets: tuple of str
+            directories: DirectoryTable
+        <- Return
+            SearchResult
+        """
+        directory, separator, name = path.rpartition("/")
+        directory_id = directories.get_id(directory) if separator else None
+        return cls(kind, directory_id, name, targets, directories)
+
+    @property
+    def path(self) -> str:
+        """
+        The full path of the result.
+        """
+        if self.directory_id is None:
+            return self.name
+        return f"{self.directories.get_path(self.directory_id)}/{self.name}"
+
+    def to_dict(self) -> dict:
+        """
+        Returns the result as a dict in the
+        shape of {kind: path, "targets": targets}.
+        """
+        return {self.kind.value: self.path,
+                "targets": self.targets}
+
+    def __str__(self) -> str:
+        return self.path
+
+    def __repr__(self) -> str:
+        return f"SearchResult({self.kind.name}, {self.path!r}, {self.targets})"
+
+
+class ResultBuffer:
+    """
+    Collects the results of the search threads and
+    passes them to the callback as lists, when the
+    buffer reaches the maximum items or on a timer.
+    """
+
+    def __init__(self,
+                 callback: Callable,
+                 max_items: int = 500,
+                 interval: float = 0.05) -> None:
+        """
+        ---------------------------------------
+        -> Params
+            callback: Callable
+                gets a list of results
+            max_items: int
+            interval: float
+                Seconds between the timer flushes.
+        """
+        self.callback = callback
+        self.max_items = max_items
+        self.interval = interval
+        self.items = list()
+        self.lock = Lock()
+        self.stopped = Event()
+        self.timer = None
+
+    def add(self, result: dict) -> None:
+        """
+        Add a result to the buffer.
+        ---------------------------
+        -> Params
+            result: SearchResult
+        """
+        self.extend([result])
+
+    def extend(self, results: list) -> None:
+        """
+        Add a batch of results to the buffer and
+        flush it when it's full.
+        ----------------------------------------
+        -> Params
+            results: list of SearchResult
+        """
+        with self.lock:
+            self.items.extend(results)
+            is_full = len(self.items) >= self.max_items
+            if self.timer is None:
+                self.stopped.clear()
+                self.timer = Thread(target=self.run_timer)
+                self.timer.daemon = True
+                self.timer.start()
+        if is_full:
+            self.flush()
+
+    def flush(self) -> None:
+        """
+        Pass the buffered results to the callback.
+        """
+        with self.lock:
+            items = self.items
+            self.items = list()
+        if items:
+            self.callback(items)
+
+    def run_timer(self) -> None:
+        """
+        Flush the buffer every interval until the
+        buffer is closed.
+        """
+        while not self.stopped.wait(self.interval):
+            self.flush()
+
+    def close(self) -> None:
+        """
+        Stop the timer and flush the remaining
+        results.
+        """
+        with self.lock:
+            self.timer = None
+            self.stopped.set()
+        self.flush()
@@ -0,0 +1,152 @@
+"""
+This module searches the targets in the files
+contents with a bounded memory, no matter how
+big the files are.
+"""
+import os
+import mmap
+from codecs import BOM_UTF8
+from codecs import BOM_UTF16_BE
+from codecs import BOM_UTF16_LE
+
+TEXT_ENCODINGS = ("utf-8", "latin-1")
+
+
+class ContentScanner:
+    """
+    Scans the raw bytes of a file for the targets.
+    The first block of the file chooses the encodings
+    of the targets. Small files are read at once,
+    bigger files are searched over a read only memory
+    map and if the file can't be mapped, over fixed
+    size chunks that overlap at their boundaries.
+    """
+
+    def __init__(self,
+                 chunk_size: int = 1024 * 1024,
+                 use_mmap: bool = True,
+                 sniff_size: int = 4096) -> None:
+        """
+        ---------------------------------------
+        -> Params
+            chunk_size: int
+                Bytes read at each step. Files not
+                bigger than it are read at once.
+            use_mmap: bool
+                Map the big files instead of reading
+                them chunk by chunk.
+            sniff_size: int
+                Bytes of the file beginning that are
+                used for detecting the encodings.
+        """
+        self.chunk_size = chunk_size
+        self.use_mmap = use_mmap
+        self.sniff_size = sniff_size
+
+    def detect_encodings(self, head: bytes) -> tuple:
+        """
+        Choose the encodings of a file by its byte
+        order mark or the NUL bytes of its first
+        block. Text without NUL bytes can be UTF-8
+        or latin-1, NUL bytes at the odd or even
+        positions mean UTF-16 without a BOM and
+        other NUL bytes mean a binary file.
+        ------------------------------------------
+        -> Params
+            head: bytes
+        <- Return
+            tuple of str: empty for the binary files
+        """
+        if head.startswith(BOM_UTF8):
+            return ("utf-8",)
+        if head.startswith(BOM_UTF16_LE):
+            return ("utf-16-le",)
+        if head.startswith(BOM_UTF16_BE):
+            return ("utf-16-be",)
+        if b"\0" not in head:
+            return TEXT_ENCODINGS
+        half = len(head) // 2
+        even_nuls = head[0::2].count(0)
+        odd_nuls = head[1::2].count(0)
+        if odd_nuls >= half * 0.6 and even_nuls <= half * 0.1:
+            return ("utf-16-le",)
+        if even_nuls >= half * 0.6 and odd_nuls <= half * 0.1:
+            return ("utf-16-be",)
+        return ()
+
+    def read_text(self, full_path: str) -> str:
+        """
+        Decode a file with its detected encoding.
+        -----------------------------------------
+        -> Params
+            full_path: str
+        <- Return
+            str or None for the binary files
+        """
+        with open(full_path, "rb") as file:
+            data = file.read()
+        encodings = self.detect_encodings(data[:self.sniff_size])
+        for encoding in encodings:
+            try:
+                return data.decode(encoding).lstrip("\ufeff")
+            except UnicodeDecodeError:
+                continue
+        return None
+
+    def scan(self, full_path: str, matcher: object) -> set:
+        """
+        Returns the targets of the matcher that are
+        in the given file.
+        -------------------------------------------
+        -> Params
+            full_path: str
+            matcher: TargetMatcher
+        <- Return
+            set of str
+        """
+        with open(full_path, "rb") as file:
+            head = file.read(self.sniff_size)
+            encodings = self.detect_encodings(head)
+            if not encodings:
+                return set()
+            matcher = matcher.get_bytes_matcher(encodings)
+            size = os.fstat(file.fileno()).st_size
+            if size <= self.chunk_size:
+                return matcher.find(head + file.read())
+            if self.use_mmap:
+                try:
+                    with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                        return matcher.find(data)
+                except (OSError, ValueError):
+                    # Some files like the pipes or the special
+                    # files can't be mapped, read them instead
+                    pass
+            file.seek(0)
+            return self.scan_chunks(file, matcher)
+
+    def scan_chunks(self, file: object, matcher: object) -> set:
+        """
+        Read the file chunk by chunk and search the
+        targets in each chunk plus the tail of the
+        previous one, so the targets that cross the
+        chunk boundaries are found too.
+        -------------------------------------------
+        -> Params
+            file: binary file object
+            matcher: BytesMatcher
+        <- Return
+            set of str
+        """
+        overlap = max(matcher.max_length - 1, 0)
+        found = set()
+        buffer = bytearray()
+        while True:
+            chunk = file.read(self.chunk_size)
+            if not chunk:
+                break
+            buffer += chunk
+            found |= matcher.find(buffer)
+            if len(found) == len(matcher.patterns):
+                break
+            del buffer[:max(len(buffer) - overlap, 0)]
+        return found
@@ -3,47 +3,141 @@ This module is for searching through files, folders
 for the result.
 """
 import os
-from time import sleep
 from typing import Callable
 from typing import Generator
+from itertools import islice
+from time import perf_counter
 from threading import Thread
 from threading import Lock
+from lib.constants import INDEX_FILE_PATH
+from lib.constants import DEFAULT_EXCLUDED_DIRECTORIES
+from .matching import TargetMatcher
+from .matching import RegexMatcher
+from .filters import NameFilter
+from .filters import GlobMatcher
+from .filters import get_extension_globs
+from .ignoring import IgnoreFilter
+from .planning import PlanStage
+from .planning import QueryPlan
+from .planning import STAGE_COSTS
+from .planning import CACHED_STAT_COST
+from .scanning import ContentScanner
+from .throttling import RateGovernor
+from .traversal import WalkSource
+from .traversal import WorkStealingTraversal
+from .results import MatchKind
+from .results import SearchResult
+from .results import DirectoryTable
+from .stats import SearchStats
+from .profiling import Profiler
 
 class Search:
     
     def __init__(self,
                  in_file_search: bool,
                  file_size_limit: float = 30,
-                 extensions: list = []) -> None:
+                 extensions: list = [],
+                 scanner: ContentScanner = None,
+                 governor: RateGovernor = None,
+                 stats: SearchStats = None,
+                 profiler: Profiler = None,
+                 use_regex: bool = False,
+                 name_filter: NameFilter = None,
+                 ignore_filter: IgnoreFilter = None) -> None:
         """
         ---------------------------------------
         -> Params
             file_size_limit: float
                 Limit of file size that it should search
                 inside the file. It's in Megabyte
+            extensions: list of str
+                Extensions of the files that their
+                contents are searched, like "txt".
+            scanner: ContentScanner
+                Searches the files contents with a
+                bounded memory.
+            governor: RateGovernor
+                Limits the reading rate, default is
+                unthrottled.
+            stats: SearchStats
+                Counters of the checked directories
+                and files.
+            profiler: Profiler
+                Records the spans of reading the
+                files, default is disabled.
+            use_regex: bool
+                The targets are case insensitive
+                regex patterns.
+            name_filter: NameFilter
+                Include and exclude globs and types
+                of the files, the other files are
+                dropped before any other check.
+            ignore_filter: IgnoreFilter
+                Prunes the excluded and ignored
+                directories before they are listed.
         """
         self.in_file_search = in_file_search
         self.file_size_limit = file_size_limit
-        self.extensions = extensions
+        self.extensions = GlobMatcher(get_extension_globs(extensions))
+        self.name_filter = name_filter or NameFilter()
+        self.ignore_filter = ignore_filter or IgnoreFilter()
+        self.scanner = scanner or ContentScanner()
+        self.governor = governor or RateGovernor()
+        self.stats = stats or SearchStats()
+        self.profiler = profiler or Profiler()
+        self.matcher_class = RegexMatcher if use_regex else TargetMatcher
+        # In processes mode the contents are matched
+        # in the pool instead of the search threads
+        self.pool = None
+        # {target: set of files ids} from the content index,
+        # None means all the files are candidates
+        self.content_candidates = dict()
+        # {full path: (id, size, mtime)} of the files that
+        # their contents are indexed, loaded by the first
+        # search thread that checks the content index
+        self.content_files = None
+        self.load_content_files = None
+        self.content_lock = Lock()
+        # The entries stat is the one recorded in the files
+        # index, it can't tell a file was edited in place
+        self.is_stat_recorded = False
+        self.matcher = None
+        # Order of the checks before reading the files
+        self.plan = None
+        # Directories of the results
+        self.directories = DirectoryTable()
     
     def get_paths(self,
                   paths: tuple = None) -> Generator:
         """
-        Run os.walk method on the given paths and
-        yield the output of the walk method.
-        If didn't provided any paths, it uses all
-        partitions names like C:/, E:/ ,...
+        Walk the given paths like os.walk method
+        and yield the output of the walk. The
+        excluded and ignored directories are not
+        walked. If didn't provided any paths, it
+        uses all partitions names like C:/, E:/ ,...
         -----------------------------------------
         -> Params
             paths: list of str
         <- Return
             Generator
         """
+        for path in self.get_roots(paths):
+            yield from self.ignore_filter.walk(path)
+
+    def get_roots(self, paths: tuple = None) -> list:
+        """
+        Returns the valid directories of the given
+        paths. If didn't provided any paths, it
+        uses all partitions names.
+        ------------------------------------------
+        -> Params
+            paths: list of str
+        <- Return
+            list of str
+        """
         if not paths:
             paths = self.get_partitions()
-        for path in paths:
-            if self.is_dir(path):
-                yield from os.walk(path)
+        return [path for path in paths if self.is_dir(path)]
 
     def is_dir(self, path: str) -> bool:
         """
@@ -71,82 +165,449 @@ class Search:
 
     def search_directory(self,
                          dir_path: str,
-                         file_names: list,
+                         files: list,
                          targets: list) -> Generator:
         """
         Search targets in the given directory address
-        and the files in the directory.
+        and the files in the directory. All the targets
+        are matched in one pass over each name and each
+        file content. The skipped directories are pruned
+        by the traversal before they get here.
         ---------------------------------------------
         -> Params
             dir_path: str
-            file_names: list of str
+            files: list of os.DirEntry
+                or the entries with the same name
+                and cached stat
             targets: list of str
         <- Return
             Generator
         """
-        if ".git" in dir_path:
-            return
-        for target in targets:
-            if self.compare(dir_path, target):
-                yield {"dir_name": dir_path.replace("\\","/")}
-            yield from self.check_files(dir_path, file_names, target)
+        self.stats.get_counters().dirs_visited += 1
+        matcher = self.get_matcher(targets)
+        found = matcher.find(dir_path)
+        if found:
+            yield SearchResult.from_path(MatchKind.DIR_NAME,
+                                         dir_path.replace("\\","/"),
+                                         tuple(sorted(found)),
+                                         self.directories)
+        yield from self.check_files(dir_path, files, matcher)
 
-    def compare(self, path: str, target: str) -> bool:
+    def get_matcher(self, targets: list) -> TargetMatcher:
         """
-        Checks the given target is in the
-        path or not.
+        Returns the compiled matcher of the targets.
+        It's compiled once and reused while the
+        targets are the same.
+        --------------------------------------------
+        -> Params
+            targets: list of str
+        <- Return
+            TargetMatcher or RegexMatcher
+        """
+        matcher = self.matcher
+        if matcher is None or matcher.targets != tuple(targets):
+            matcher = self.matcher_class(targets)
+            self.matcher = matcher
+        return matcher
+
+    def is_skipped_directory(self, dir_path: str, root: str = None) -> bool:
+        """
+        Checks the given directory should be
+        skipped from searching or not. The
+        traversal prunes the skipped ones, it's
+        for checking a single directory.
         ------------------------------------
         -> Params
-            path: str
-            target: str
+            dir_path: str
+            root: str
+                searched root of the directory
         <- Return
             bool
         """
-        if target.lower() in path.lower():
-            return True
-        return False
+        return self.ignore_filter.is_skipped_directory(dir_path, root)
 
     def check_files(self,
                     dir_path: str,
-                    file_names: list,
-                    target: str) -> Generator:
+                    files: list,
+                    matcher: TargetMatcher) -> Generator:
         """
-        Loop through file names, create a full
-        valid path, and check the target is in
-        the path and in the file or not.
+        Loop through file entries, create a full
+        valid path, and check the targets are in
+        the path and in the file or not. Each file
+        is read once for all the targets. The
+        files out of the name filter are dropped
+        first, then the checks of the query plan
+        run in its order and the file is read if
+        it passed all of them. The names and the
+        checks of all the files run first, in the
+        filter span of the profile, then the
+        files that passed them are read.
         --------------------------------------
         -> Params
             dir_path: str,
-            file_names: list
-            target: str
+            files: list of os.DirEntry
+            matcher: TargetMatcher
         <- Return
             Generator
         """
-        for file_name in file_names:
-            full_path = f"{dir_path}/{file_name}"
-            if self.compare(file_name, target):
-                yield {"file_name": full_path.replace("\\","/")}
-            
-            # Check in files
-            if not self.in_file_search:
-                continue
-            file_size = self.get_file_size(full_path)
-            if file_size > self.file_size_limit:
-                continue
-            if not self.is_valid_extension(file_name):
+        directory_id = None
+        counters = self.stats.get_counters()
+        profiler = self.profiler
+        # The args are built just for the recorded spans
+        is_tracing = bool(profiler.trace_path)
+        results = list()
+        to_read = list()
+        with profiler.span("filter", {"path": dir_path} if is_tracing else None):
+            counters.files_considered += len(files)
+            if self.name_filter:
+                listed_count = len(files)
+                files = self.name_filter.filter(files)
+                counters.files_skipped_name += listed_count - len(files)
+            stages = ()
+            if self.in_file_search:
+                plan = self.get_plan(matcher)
+                plan.observe(len(files), self.stats)
+                stages = plan.stages
+            for entry in files:
+                file_name = entry.name
+                found = matcher.find(file_name)
+                if found:
+                    if directory_id is None:
+                        directory_id = self.get_directory_id(dir_path)
+                    results.append(SearchResult(MatchKind.FILE_NAME, directory_id, file_name,
+                                                tuple(sorted(found)), self.directories))
+
+                # Check in files
+                if not self.in_file_search:
+                    continue
+                full_path = f"{dir_path}/{file_name}"
+                for stage in stages:
+                    if not stage.check(entry, full_path, matcher, counters):
+                        break
+                else:
+                    to_read.append((entry, full_path))
+        yield from results
+
+        batch = list()
+        for entry, full_path in to_read:
+            # The size stage did the stat of the entry, it's cached
+            file_size = self.get_entry_size(entry)
+            self.governor.throttle(file_size)
+            counters.files_read += 1
+            counters.bytes_read += int(file_size * 1024 * 1024)
+            if self.pool:
+                batch.append(full_path)
                 continue
-            try:
-                with open(full_path, "r") as file:
-                    if target.lower() in file.read().lower():
-                        yield {"in_file": full_path}   
-            except UnicodeDecodeError:
-                pass
-            sleep(0.01)
+            started = perf_counter()
+            with profiler.span("read", {"path": full_path} if is_tracing else None):
+                found = self.scan_file(full_path, matcher)
+            counters.read_time += perf_counter() - started
+            if found:
+                if directory_id is None:
+                    directory_id = self.get_directory_id(dir_path)
+                yield SearchResult(MatchKind.IN_FILE, directory_id, entry.name,
+                                   tuple(sorted(found)), self.directories)
+        if batch:
+            started = perf_counter()
+            with profiler.span("read_batch", {"files": len(batch)} if is_tracing else None):
+                yield from self.scan_batch(batch, matcher)
+            counters.read_time += perf_counter() - started
+
+    def get_plan(self, matcher: TargetMatcher) -> QueryPlan:
+        """
+        Returns the query plan of the matcher. It's
+        compiled at the first use if the search
+        didn't compile it.
+        -------------------------------------------
+        -> Params
+            matcher: TargetMatcher
+        <- Return
+            QueryPlan
+        """
+        plan = self.plan
+        if plan is None or plan.matcher is not matcher:
+            plan = self.compile_plan(matcher)
+        return plan
+
+    def compile_plan(self,
+                     matcher: TargetMatcher,
+                     has_cached_stat: bool = False) -> QueryPlan:
+        """
+        Compile the criteria of the search to a
+        query plan. The checks that can't reject
+        any file, like the extension check without
+        any extension, are left out.
+        ------------------------------------------
+        -> Params
+            matcher: TargetMatcher
+            has_cached_stat: bool
+                the stat of the entries is recorded
+                while listing, like the index entries
+        <- Return
+            QueryPlan
+        """
+        stat_cost = STAGE_COSTS["size"]
+        if has_cached_stat or os.name == "nt":
+            stat_cost = CACHED_STAT_COST
+        self.is_stat_recorded = has_cached_stat
+        stages = list()
+        if self.extensions:
+            stages.append(PlanStage("extension", self.check_extension,
+                                    STAGE_COSTS["extension"]))
+        if all(self.content_candidates.get(target) is not None
+               for target in matcher.targets):
+            # The stat tells the file didn't change after the
+            # build, the recorded stat of the files index can't
+            # tell it, so the file is stated again
+            index_stat_cost = STAGE_COSTS["size"] if has_cached_stat else stat_cost
+            stages.append(PlanStage("index", self.check_index,
+                                    STAGE_COSTS["index"] + index_stat_cost))
+        stages.append(PlanStage("size", self.check_size, stat_cost))
+
+        description = list()
+        if self.name_filter:
+            description.append(("name filter",
+                                f"include {', '.join(self.name_filter.include.globs) or 'all'}; "
+                                f"exclude {', '.join(self.name_filter.exclude.globs) or 'none'}"))
+        description.append(("name match",
+                            f"{len(matcher.targets)} targets, "
+                            f"{'regex' if isinstance(matcher, RegexMatcher) else 'literal'}"))
+        if self.in_file_search:
+            description.append(("read",
+                                f"{'process pool' if self.pool else 'search threads'}, "
+                                f"files up to {self.file_size_limit:g} MB"))
+        else:
+            description.append(("read", "the contents are not searched"))
+            stages = list()
+        self.plan = QueryPlan(matcher, stages, description)
+        return self.plan
+
+    def check_extension(self,
+                        entry: os.DirEntry,
+                        full_path: str,
+                        matcher: TargetMatcher,
+                        counters: object) -> bool:
+        """
+        Extension stage of the plan.
+        ----------------------------
+        -> Params
+            entry: os.DirEntry
+            full_path: str
+            matcher: TargetMatcher
+            counters: ThreadCounters
+        <- Return
+            bool: the file passed
+        """
+        counters.files_checked_extension += 1
+        if self.is_valid_extension(entry.name):
+            return True
+        counters.files_skipped_extension += 1
+        return False
+
+    def check_index(self,
+                    entry: os.DirEntry,
+                    full_path: str,
+                    matcher: TargetMatcher,
+                    counters: object) -> bool:
+        """
+        Content index stage of the plan.
+        --------------------------------
+        -> Params
+            entry: os.DirEntry
+            full_path: str
+            matcher: TargetMatcher
+            counters: ThreadCounters
+        <- Return
+            bool: the file passed
+        """
+        counters.files_checked_index += 1
+        if self.is_content_candidate(entry, full_path, matcher.targets):
+            return True
+        counters.files_skipped_index += 1
+        return False
+
+    def check_size(self,
+                   entry: os.DirEntry,
+                   full_path: str,
+                   matcher: TargetMatcher,
+                   counters: object) -> bool:
+        """
+        Size stage of the plan. Files of size 0
+        are read, the size of the procfs files
+        and the stale index entries can be 0.
+        -----------------------------------------
+        -> Params
+            entry: os.DirEntry
+            full_path: str
+            matcher: TargetMatcher
+            counters: ThreadCounters
+        <- Return
+            bool: the file passed
+        """
+        counters.files_checked_size += 1
+        started = perf_counter()
+        try:
+            file_size = self.get_entry_size(entry)
+        except OSError:
+            return False
+        finally:
+            counters.stat_time += perf_counter() - started
+        if file_size <= self.file_size_limit:
+            return True
+        counters.files_skipped_size += 1
+        return False
+
+    def get_directory_id(self, dir_path: str) -> int:
+        """
+        Returns the id of the directory in the
+        results directories table.
+        --------------------------------------
+        -> Params
+            dir_path: str
+        <- Return
+            int
+        """
+        return self.directories.get_id(dir_path.replace("\\","/"))
+
+    def scan_batch(self, paths: list, matcher: TargetMatcher) -> Generator:
+        """
+        Submit the files to the process pool and
+        yield the results of the completed batches
+        of all the threads. It waits just while the
+        pool has too many outstanding batches.
+        --------------------------------------
+        -> Params
+            paths: list of str
+            matcher: TargetMatcher
+        <- Return
+            Generator
+        """
+        self.pool.submit(paths, matcher.targets, type(matcher))
+        yield from self.get_batch_results(self.pool.collect(self.pool.max_pending))
+
+    def collect_batches(self) -> Generator:
+        """
+        Wait for the outstanding batches of the
+        process pool and yield their results. The
+        search threads call it after the last
+        directory.
+        --------------------------------------
+        <- Return
+            Generator
+        """
+        if self.pool:
+            yield from self.get_batch_results(self.pool.collect())
+
+    def get_batch_results(self, results: Generator) -> Generator:
+        """
+        Yield the found targets of the process pool
+        results as search results.
+        --------------------------------------
+        -> Params
+            results: Generator
+                (path, found targets)
+        <- Return
+            Generator
+        """
+        for full_path, found in results:
+            if found:
+                yield SearchResult.from_path(MatchKind.IN_FILE,
+                                             full_path.replace("\\","/"),
+                                             tuple(sorted(found)),
+                                             self.directories)
+
+    def scan_file(self, full_path: str, matcher: TargetMatcher) -> set:
+        """
+        Search the targets in the raw bytes of the
+        file with a bounded memory. Binary files
+        are skipped.
+        ------------------------------------------
+        -> Params
+            full_path: str
+            matcher: TargetMatcher
+        <- Return
+            set of str: found targets
+        """
+        try:
+            return self.scanner.scan(full_path, matcher)
+        except OSError:
+            return set()
+
+    def is_content_candidate(self,
+                             entry: os.DirEntry,
+                             full_path: str,
+                             targets: tuple) -> bool:
+        """
+        Checks the content index allows the file
+        to contain any of the targets. The files
+        that are not indexed, or changed after
+        the index was built, are candidates.
+        ----------------------------------------
+        -> Params
+            entry: os.DirEntry
+            full_path: str
+            targets: tuple of str
+        <- Return
+            bool
+        """
+        indexed = self.get_content_record(full_path)
+        if indexed is None:
+            return True
+        file_id, size, mtime = indexed
+        try:
+            stat = os.stat(full_path) if self.is_stat_recorded else entry.stat()
+        except OSError:
+            return True
+        if stat.st_size != size or stat.st_mtime != mtime:
+            return True
+        for target in targets:
+            candidates = self.content_candidates.get(target)
+            if candidates is None or file_id in candidates:
+                return True
+        return False
+
+    def get_content_record(self, full_path: str) -> tuple:
+        """
+        Returns the recorded id and stat of a file
+        in the content index. The records are loaded
+        once, by the first thread that needs them.
+        --------------------------------------------
+        -> Params
+            full_path: str
+        <- Return
+            tuple: (id, size in bytes, mtime) or None
+                when its content is not indexed
+        """
+        content_files = self.content_files
+        if content_files is None:
+            with self.content_lock:
+                if self.content_files is None:
+                    self.content_files = (self.load_content_files()
+                                          if self.load_content_files else dict())
+                content_files = self.content_files
+        return content_files.get(full_path)
+
+    def read_file(self, full_path: str) -> str:
+        """
+        Read a text file with its detected encoding
+        and return its lowered content or None if
+        it's not a text file.
+        ----------------------------------------
+        -> Params
+            full_path: str
+        <- Return
+            str
+        """
+        content = self.scanner.read_text(full_path)
+        if content is None:
+            return None
+        return content.lower()
 
     def is_valid_extension(self, file_name: str):
         """
         Checks the given file has the desired
-        extension or not.
+        extension or not. The extensions are
+        compiled once in a suffix set.
         -------------------------------------
         -> Params
             file_name: str
@@ -155,22 +616,19 @@ class Search:
         """
         if not self.extensions:
             return True
-        for extension in self.extensions:
-            if file_name.endswith(extension):
-                return True
-        return False
+        return self.extensions.match(file_name)
 
-    def get_file_size(self, path: str) -> float:
+    def get_entry_size(self, entry: os.DirEntry) -> float:
         """
-        Calculates a file size in Megabyte and
-        return the size.
+        Returns a file size in Megabyte from the
+        cached stat of its entry.
         ---------------------------------------
         -> Params
-            path: str
+            entry: os.DirEntry
         <- Return
             float: Megabyte
         """
-        return os.stat(path).st_size / (1024 * 1024)
+        return entry.stat().st_size / (1024 * 1024)
 
 
 class SearchWorkers:
@@ -178,90 +636,222 @@ class SearchWorkers:
     def __init__(self,
                  signal_callback: Callable,
                  finish_search_callback: Callable,
-                 threads_count: int = 16) -> None:
+                 threads_count: int = 16,
+                 governor: RateGovernor = None,
+                 stream_batch_size: int = 500,
+                 stats: SearchStats = None,
+                 profiler: Profiler = None) -> None:
+        """
+        ---------------------------------------
+        -> Params
+            signal_callback: Callable
+                gets the results as a list of SearchResult
+            finish_search_callback: Callable
+            threads_count: int
+            governor: RateGovernor
+            stream_batch_size: int
+                results per call of the streamed
+                results
+            stats: SearchStats
+            profiler: Profiler
+        """
         self.is_searching = False
         self.is_finished = False
         self.threads_count = threads_count
+        self.active_threads = 0
         self.lock = Lock()
         self.signal_callback = signal_callback
         self.finish_search_callback = finish_search_callback
+        self.governor = governor or RateGovernor()
+        self.stream_batch_size = stream_batch_size
+        self.stats = stats or SearchStats()
+        self.profiler = profiler or Profiler()
     
     def search(self,
                targets: list,
                search_handler: Callable,
-               paths: Generator) -> list:
+               source: object,
+               finish_handler: Callable = None) -> list:
         """
         Generate threads to do the search process
-        on the provided paths.
+        on the directories of the source.
         -----------------------------------------
         -> Params
             targets: list of str
-            search_handler:
+            search_handler: Callable
+            source: WorkStealingTraversal or WalkSource
+            finish_handler: Callable
+                gives the remaining results, like the
+                outstanding process pool batches, when
+                a thread has no directory left
+        """
+        self.start_threads([Thread(target=self.worker,
+                                   args=[index, search_handler, targets, source,
+                                         finish_handler])
+                            for index in range(self.threads_count)])
+
+    def stream(self, results: Generator) -> None:
+        """
+        Generate a thread to pass the ready results,
+        for example the index query results, to the
+        signal callback.
+        --------------------------------------------
+        -> Params
+            results: Generator
+        """
+        self.start_threads([Thread(target=self.stream_worker,
+                                   args=[results])])
+
+    def run_task(self, task: Callable) -> None:
+        """
+        Run a task, like building the index, in a
+        background thread and call the finish
+        callback at the end.
+        -----------------------------------------
+        -> Params
+            task: Callable
+        """
+        def run() -> None:
+            try:
+                task()
+            finally:
+                self.stop_working()
+
+        self.start_threads([Thread(target=run)])
+
+    def start_threads(self, threads: list) -> None:
+        """
+        Start the given threads as daemon threads.
+        The finish callback is called when the last
+        one of them stops working.
+        -------------------------------------------
+        -> Params
+            threads: list of Thread
         """
         self.is_searching = True
         self.is_finished = True
-        self.threads = [Thread(target=self.worker,
-                  args=[search_handler, targets, paths])
-                  for _ in range(self.threads_count)]
+        self.stats.start()
+        self.active_threads = len(threads)
+        self.threads = threads
         for thread in self.threads:
             thread.daemon = True
             thread.start()
+
+    def stream_worker(self, results: Generator) -> None:
+        """
+        Worker function that passes the results of
+        the given generator in batches to the signal
+        callback until the generator exhausted or the
+        search stopped.
+        -------------------------------------------
+        -> Params
+            results: Generator
+        """
+        self.profiler.start_thread()
+        try:
+            while self.is_searching:
+                with self.profiler.span("walk"):
+                    batch = list(islice(results, self.stream_batch_size))
+                if not batch:
+                    break
+                self.emit(batch)
+        finally:
+            self.is_searching = False
+            self.profiler.finish_thread()
+            self.stop_working()
     
     def worker(self,
+               index: int,
                search_handler: Callable,
                targets: list,
-               paths: Generator) -> None:
+               source: object,
+               finish_handler: Callable = None) -> None:
         """
-        Worker function that first gets a list of
-        directories and file names, then search in
-        the directories and files for the desired
-        targets and add the results to a provided
-        list.
+        Worker function that first gets a directory
+        and its file names from the source, then
+        search in the directory and files for the
+        desired targets and add the results to a
+        provided list.
         -----------------------------------------
         -> Params
+            index: int
+                index of the worker in the source
             search_handler: Callable
             targets: list of strings
-            paths: Generator
-                includes dirname and file names
+            source: WorkStealingTraversal or WalkSource
+            finish_handler: Callable
         """
-        while self.is_searching:
-            try:
-                with self.lock:
-                    dir_path, _, file_names = next(paths)
-                result = search_handler(dir_path, file_names, targets)
-                self.add_to_finds(result)
-            except StopIteration:
-                self.is_searching = False
-                break
-        self.stop_working()
+        self.governor.setup_thread()
+        self.profiler.start_thread()
+        counters = self.stats.get_counters()
+        profiler = self.profiler
+        try:
+            while self.is_searching:
+                started = perf_counter()
+                with profiler.span("walk"):
+                    directory = source.next_directory(index)
+                counters.walk_time += perf_counter() - started
+                if directory is None:
+                    break
+                dir_path, _, file_names = directory
+                with profiler.span("directory",
+                                   {"path": dir_path} if profiler.trace_path else None):
+                    result = search_handler(dir_path, file_names, targets)
+                    self.add_to_finds(result)
+            if finish_handler and self.is_searching:
+                self.add_to_finds(finish_handler())
+        finally:
+            # The finish callback must be called even if this
+            # thread failed, the other threads may be done
+            profiler.finish_thread()
+            self.stop_working()
     
     def add_to_finds(self, result: Generator) -> None:
         """
-        Adds the search result to the finds
-        container.
+        Drain all the results of a directory and
+        pass them to the signal callback in one
+        batch.
         -----------------------------------
         -> Params
-            result: tuple
-                (find type, path)
+            result: Generator
+                results of search_directory
         """
-        try:
-            result = dict(next(result))
-            self.signal_callback(result)
-        except StopIteration:
-            pass
+        batch = list(result)
+        if batch:
+            self.emit(batch)
+
+    def emit(self, batch: list) -> None:
+        """
+        Pass a batch of results to the signal
+        callback and count them.
+        -------------------------------------
+        -> Params
+            batch: list of SearchResult
+        """
+        counters = self.stats.get_counters()
+        counters.matches += len(batch)
+        started = perf_counter()
+        with self.profiler.span("emit",
+                                {"results": len(batch)} if self.profiler.trace_path else None):
+            self.signal_callback(batch)
+        counters.emit_time += perf_counter() - started
     
     def stop_working(self) -> None:
         """
-        To prevent all threads call the finish
-        callback this method checks to call it
-        just once.
+        Each thread calls it when it stops. The
+        finish callback is called just once, when
+        the last thread stopped.
         """
+        started = perf_counter()
         with self.lock:
-            if self.is_finished:
-                self.finish_search_callback()
-                self.is_finished = False
-                for thread in self.threads:
-                    thread.join()
+            self.stats.get_counters().lock_wait_time += perf_counter() - started
+            self.active_threads -= 1
+            if self.active_threads > 0 or not self.is_finished:
+                return
+            self.is_finished = False
+            self.is_searching = False
+        self.stats.finish()
+        self.finish_search_callback()
 
     def stop_searching(self) -> None:
         """
@@ -278,45 +868,330 @@ class SearchProcess:
     and inside the files with specific criteria
     such as the maximum file size or its extension.
     """
+    EXECUTION_MODES = ("threads", "processes")
+
     def __init__(self,
                  signal_callback: Callable,
                  finish_search_callback: Callable,
                  in_file_search:bool = False,
                  max_file_size: float = 20,
                  extensions: list = [],
-                 threads_count: int = 16) -> None:
+                 threads_count: int = 16,
+                 use_index: bool = False,
+                 index_path: str = INDEX_FILE_PATH,
+                 max_mb_per_second: float = 0,
+                 max_files_per_second: float = 0,
+                 idle_priority: bool = False,
+                 execution_mode: str = "threads",
+                 processes_count: int = None,
+                 trace_path: str = None,
+                 cprofile_path: str = None,
+                 use_regex: bool = False,
+                 include_globs: list = [],
+                 exclude_globs: list = [],
+                 include_types: list = [],
+                 exclude_types: list = [],
+                 excluded_directories: list = DEFAULT_EXCLUDED_DIRECTORIES,
+                 use_ignore_files: bool = False) -> None:
         """
         -----------------------------------------------
         -> Params
-            finds_container: dict
+            signal_callback: Callable
+                gets the results of each directory
+                as a list of SearchResult
+            finish_search_callback: Callable
+            in_file_search: bool
             max_file_size: float
             extensions: list of string
             threads_count: int
             number of threads spawn
+            use_index: bool
+                answer the queries from the files index
+                when it is fresh
+            index_path: str
+            max_mb_per_second: float
+            max_files_per_second: float
+                limits of reading the files contents
+                shared by all the threads, 0 means
+                unthrottled
+            idle_priority: bool
+                run the threads with the lowest CPU
+                and I/O priority
+            execution_mode: str
+                "threads" matches the files contents in
+                the search threads, "processes" sends
+                them to a process pool in batches
+            processes_count: int
+                size of the process pool, default is
+                the number of CPU cores
+            trace_path: str
+                profile the search and write its
+                spans as a Chrome trace JSON file
+            cprofile_path: str
+                profile the search threads with
+                cProfile and dump the stats
+            use_regex: bool
+                the targets are case insensitive
+                regex patterns for the names and
+                the contents
+            include_globs: list of str
+            exclude_globs: list of str
+                globs of the files names like
+                "test_*.py", case insensitive
+            include_types: list of str
+            exclude_types: list of str
+                named file types like "py" or "cpp"
+            excluded_directories: list of str
+                names or globs of the directories
+                that are never walked
+            use_ignore_files: bool
+                skip the entries that are ignored by
+                the .gitignore and .ignore files
         """
+        if execution_mode not in self.EXECUTION_MODES:
+            raise ValueError(f"invalid execution mode -> <{execution_mode}>")
+        self.finish_search_callback = finish_search_callback
+        self.search_stats = SearchStats()
+        self.profiler = Profiler(trace_path=trace_path,
+                                 cprofile_path=cprofile_path)
+        self.governor = RateGovernor(mb_per_second=max_mb_per_second,
+                                     files_per_second=max_files_per_second,
+                                     idle_priority=idle_priority)
         self.search_handler = Search(in_file_search=in_file_search,
                                      file_size_limit=max_file_size,
-                                     extensions=extensions)
+                                     extensions=extensions,
+                                     governor=self.governor,
+                                     stats=self.search_stats,
+                                     profiler=self.profiler,
+                                     use_regex=use_regex,
+                                     name_filter=NameFilter(include_globs=include_globs,
+                                                            exclude_globs=exclude_globs,
+                                                            include_types=include_types,
+                                                            exclude_types=exclude_types),
+                                     ignore_filter=IgnoreFilter(
+                                         excluded_directories=excluded_directories,
+                                         use_ignore_files=use_ignore_files))
         self.workers = SearchWorkers(threads_count=threads_count,
                                      signal_callback=signal_callback,
-                                     finish_search_callback=finish_search_callback)
+                                     finish_search_callback=self.finish_search,
+                                     governor=self.governor,
+                                     stats=self.search_stats,
+                                     profiler=self.profiler)
+        if execution_mode == "processes" and in_file_search:
+            # multiprocessing is loaded just for this mode
+            from .process_pool import ProcessPoolScanner
+            self.search_handler.pool = ProcessPoolScanner(scanner=self.search_handler.scanner,
+                                                          processes_count=processes_count)
+        self.use_index = use_index
+        self.index_path = index_path
+        self.file_index = None
+        self.file_content_index = None
+        self.is_stopped = False
+
+    @property
+    def index(self) -> object:
+        """
+        The files index. It's created at the first
+        use, so sqlite3 is not loaded otherwise.
+        """
+        if self.file_index is None:
+            from .indexing import FileIndex
+            self.file_index = FileIndex(search_handler=self.search_handler,
+                                        index_path=self.index_path)
+        return self.file_index
+
+    @property
+    def content_index(self) -> object:
+        """
+        The files content index, created at the
+        first use.
+        """
+        if self.file_content_index is None:
+            from .content_index import ContentIndex
+            self.file_content_index = ContentIndex(search_handler=self.search_handler,
+                                                   index_path=self.index_path)
+        return self.file_content_index
     
     def search(self,
                targets: list,
                paths: list) -> None:
         """
+        Start searching in a background thread. The
+        invalid targets, like an invalid regex, are
+        raised here, the rest of the work like
+        checking the index is fresh is done by the
+        background thread, so the caller, like the
+        interface, is never blocked.
+        ----------------------------------------
+        -> Params
+            targets: list of string,
+            paths: list of string
+        """
+        self.search_handler.get_matcher(targets)
+        self.is_stopped = False
+        Thread(target=self.start_search, args=[targets, paths], daemon=True).start()
+
+    def start_search(self,
+                     targets: list,
+                     paths: list) -> None:
+        """
+        Choose the source of the directories, the
+        files index when it is fresh or walking the
+        paths, compile the query plan and start the
+        search threads. The finish callback is
+        called even if it fails.
         ----------------------------------------
         -> Params
             targets: list of string,
             paths: list of string
         """
-        paths = self.search_handler.get_paths(paths=paths)
+        try:
+            self.start_workers(targets, paths)
+        except BaseException:
+            self.finish_search()
+            raise
+        if self.is_stopped:
+            # Stopped while the threads were starting
+            self.workers.stop_searching()
+
+    def start_workers(self,
+                      targets: list,
+                      paths: list) -> None:
+        """
+        ----------------------------------------
+        -> Params
+            targets: list of string,
+            paths: list of string
+        """
+        matcher = self.search_handler.get_matcher(targets)
+        if self.search_handler.pool:
+            self.search_handler.pool.start()
+        has_cached_stat = False
+        if self.use_index and self.index.is_fresh(paths):
+            if not self.search_handler.in_file_search:
+                self.search_handler.compile_plan(matcher)
+                self.workers.stream(self.index.search_names(targets=targets,
+                                                            paths=paths))
+                return
+            source = WalkSource(self.index.walk(paths=paths),
+                                stats=self.search_stats)
+            has_cached_stat = True
+        else:
+            source = WorkStealingTraversal(roots=self.search_handler.get_roots(paths),
+                                           workers_count=self.workers.threads_count,
+                                           stats=self.search_stats,
+                                           ignore_filter=self.search_handler.ignore_filter)
+        self.search_handler.content_candidates = dict()
+        self.search_handler.content_files = None
+        self.search_handler.load_content_files = None
+        if self.use_index and self.search_handler.in_file_search \
+                and self.content_index.is_fresh(paths):
+            self.search_handler.content_candidates = \
+                self.get_content_candidates(matcher)
+            self.search_handler.load_content_files = self.content_index.get_indexed_files
+        self.search_handler.compile_plan(matcher, has_cached_stat=has_cached_stat)
         self.workers.search(targets=targets,
                             search_handler=self.search_handler.search_directory,
-                            paths=paths)
+                            source=source,
+                            finish_handler=self.search_handler.collect_batches)
+
+    def get_content_candidates(self, matcher: object) -> dict:
+        """
+        Returns the candidate files of each target
+        from the content index. A regex target uses
+        the candidates of its required literal.
+        -------------------------------------------
+        -> Params
+            matcher: TargetMatcher or RegexMatcher
+        <- Return
+            dict: {target: set of files ids or None}
+        """
+        if not isinstance(matcher, RegexMatcher):
+            return self.content_index.get_candidates(matcher.targets)
+        literals = [literal for literal in matcher.required.values() if literal]
+        candidates = self.content_index.get_candidates(literals)
+        content_candidates = dict()
+        for target in matcher.targets:
+            literal = matcher.required.get(target)
+            # The files of a pattern without a literal are all candidates
+            content_candidates[target] = candidates.get(literal) if literal else None
+        return content_candidates
+
+    def explain(self, targets: list) -> str:
+        """
+        Returns the query plan of the targets as
+        text. After a search it's the plan that
+        the search used, with its counters.
+        ----------------------------------------
+        -> Params
+            targets: list of string
+        <- Return
+            str
+        """
+        matcher = self.search_handler.get_matcher(targets)
+        return self.search_handler.get_plan(matcher).explain(self.stats())
+
+    def stats(self) -> dict:
+        """
+        Returns a snapshot of the search counters,
+        timings and rates. It's cheap enough to be
+        called while the search is running.
+        ------------------------------------------
+        <- Return
+            dict
+        """
+        return self.search_stats.snapshot()
+
+    def build_index(self, paths: list) -> None:
+        """
+        Build the files index of the given paths
+        in a background thread and call the finish
+        callback at the end.
+        ------------------------------------------
+        -> Params
+            paths: list of string
+        """
+        self.workers.run_task(lambda: self.index.build(paths=paths))
+
+    def refresh_index(self,
+                      paths: list,
+                      with_content: bool = False) -> None:
+        """
+        Refresh the files index of the given paths
+        by rescanning just the changed directories
+        in a background thread and call the finish
+        callback at the end.
+        ------------------------------------------
+        -> Params
+            paths: list of string
+            with_content: bool
+                rebuild the content index too
+        """
+        def refresh() -> None:
+            self.index.refresh(paths=paths)
+            if with_content:
+                self.content_index.build(paths=paths)
+
+        self.workers.run_task(refresh)
     
+    def finish_search(self) -> None:
+        """
+        Release the process pool, write the
+        profiles and call the finish callback.
+        """
+        if self.search_handler.pool:
+            self.search_handler.pool.shutdown()
+        try:
+            if self.profiler.is_enabled:
+                self.profiler.export()
+        finally:
+            self.finish_search_callback()
+
     def stop_searching(self) -> None:
         """
         Stop searching process.
         """
-        self.workers.stop_searching()
\ No newline at end of file
+        self.is_stopped = True
+        self.workers.stop_searching()
+        if self.search_handler.pool:
+            self.search_handler.pool.shutdown()
\ No newline at end of file
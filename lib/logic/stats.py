@@ -0,0 +1,119 @@
+"""
+This module keeps the statistics of a search.
+Each thread updates its own counters without
+any lock and a snapshot sums them up.
+"""
+from time import perf_counter
+from threading import Lock
+from threading import local
+
+
+class ThreadCounters:
+    """
+    Counters and timings of one thread. The
+    timings are in seconds.
+    """
+    COUNTERS = ("dirs_visited",
+                "dirs_skipped",
+                "files_considered",
+                "files_skipped_name",
+                "files_checked_extension",
+                "files_skipped_extension",
+                "files_checked_index",
+                "files_skipped_index",
+                "files_checked_size",
+                "files_skipped_size",
+                "files_read",
+                "bytes_read",
+                "matches")
+    TIMINGS = ("walk_time",
+               "stat_time",
+               "read_time",
+               "emit_time",
+               "lock_wait_time")
+    __slots__ = COUNTERS + TIMINGS
+
+    def __init__(self) -> None:
+        for name in self.__slots__:
+            setattr(self, name, 0)
+
+
+class SearchStats:
+    """
+    Collects the counters of the search threads
+    and gives a snapshot of them with the rates
+    of the search.
+    ---------------------------------------------
+    @usage:
+        counters = stats.get_counters()
+        counters.files_read += 1
+        stats.snapshot()["files_per_second"]
+    """
+
+    def __init__(self) -> None:
+        self.local = local()
+        self.counters = list()
+        self.lock = Lock()
+        self.start_time = None
+        self.finish_time = None
+
+    def get_counters(self) -> ThreadCounters:
+        """
+        Returns the counters of the calling thread.
+        -------------------------------------------
+        <- Return
+            ThreadCounters
+        """
+        try:
+            return self.local.counters
+        except AttributeError:
+            counters = ThreadCounters()
+            self.local.counters = counters
+            with self.lock:
+                self.counters.append(counters)
+            return counters
+
+    def start(self) -> None:
+        """
+        Mark the start of the search.
+        """
+        self.start_time = perf_counter()
+        self.finish_time = None
+
+    def finish(self) -> None:
+        """
+        Mark the end of the search.
+        """
+        self.finish_time = perf_counter()
+
+    @property
+    def is_running(self) -> bool:
+        """
+        Checks the search is started and not
+        finished yet.
+        """
+        return self.start_time is not None and self.finish_time is None
+
+    def snapshot(self) -> dict:
+        """
+        Returns the sum of the threads counters,
+        the elapsed seconds and the rates. It can
+        be called while the search is running.
+        -----------------------------------------
+        <- Return
+            dict
+        """
+        with self.lock:
+            all_counters = tuple(self.counters)
+        snapshot = {name: sum(getattr(counters, name) for counters in all_counters)
+                    for name in ThreadCounters.__slots__}
+        elapsed = 0
+        if self.start_time is not None:
+            elapsed = (self.finish_time or perf_counter()) - self.start_time
+        snapshot["elapsed"] = elapsed
+        snapshot["is_running"] = self.is_running
+        rate = 1 / elapsed if elapsed else 0
+        snapshot["dirs_per_second"] = snapshot["dirs_visited"] * rate
+        snapshot["files_per_second"] = snapshot["files_considered"] * rate
+        snapshot["mb_per_second"] = snapshot["bytes_read"] / (1024 * 1024) * rate
+        return snapshot
@@ -0,0 +1,142 @@
+"""
+This module limits the reading rate of the
+search threads, so a search doesn't make the
+machine unresponsive.
+"""
+import os
+import sys
+from time import sleep
+from time import monotonic
+from threading import Lock
+from threading import get_native_id
+
+# ioprio_set(2) system call numbers
+IOPRIO_SET_SYSCALLS = {
+    "x86_64": 251,
+    "i386": 289,
+    "i686": 289,
+    "aarch64": 30,
+    "armv7l": 314,
+    "ppc64le": 273,
+}
+IOPRIO_WHO_PROCESS = 1
+IOPRIO_CLASS_IDLE = 3
+IOPRIO_CLASS_SHIFT = 13
+IDLE_NICENESS = 19
+
+
+class TokenBucket:
+    """
+    Thread safe token bucket. Consuming more than
+    the available tokens is allowed and the caller
+    waits until the debt is paid by the rate.
+    """
+
+    def __init__(self, rate: float, capacity: float = None) -> None:
+        """
+        ---------------------------------------
+        -> Params
+            rate: float
+                tokens added per second
+            capacity: float
+                maximum stored tokens, default is
+                one second of the rate
+        """
+        self.rate = rate
+        self.capacity = capacity or rate
+        self.tokens = self.capacity
+        self.last_time = monotonic()
+        self.lock = Lock()
+
+    def consume(self, amount: float) -> float:
+        """
+        Take tokens from the bucket and returns the
+        seconds that the caller should wait.
+        -------------------------------------------
+        -> Params
+            amount: float
+        <- Return
+            float: seconds
+        """
+        with self.lock:
+            now = monotonic()
+            self.tokens = min(self.capacity,
+                              self.tokens + (now - self.last_time) * self.rate)
+            self.last_time = now
+            self.tokens -= amount
+            if self.tokens >= 0:
+                return 0
+            return -self.tokens / self.rate
+
+
+class RateGovernor:
+    """
+    Shared by all the search threads to limit the
+    megabytes and files read per second. In idle
+    priority mode, the threads get the lowest CPU
+    and I/O priority on Linux. Without any limit
+    and idle priority, it's unthrottled.
+    """
+
+    def __init__(self,
+                 mb_per_second: float = 0,
+                 files_per_second: float = 0,
+                 idle_priority: bool = False) -> None:
+        """
+        ---------------------------------------
+        -> Params
+            mb_per_second: float
+                0 means no limit
+            files_per_second: float
+                0 means no limit
+            idle_priority: bool
+        """
+        self.idle_priority = idle_priority
+        self.bytes_bucket = None
+        self.files_bucket = None
+        if mb_per_second:
+            self.bytes_bucket = TokenBucket(mb_per_second * 1024 * 1024)
+        if files_per_second:
+            self.files_bucket = TokenBucket(files_per_second)
+
+    def setup_thread(self) -> None:
+        """
+        Must be called by each search thread when it
+        starts. In idle priority mode it lowers the
+        CPU and I/O priority of the calling thread.
+        """
+        if not self.idle_priority or not sys.platform.startswith("linux"):
+            return
+        thread_id = get_native_id()
+        try:
+            os.setpriority(os.PRIO_PROCESS, thread_id, IDLE_NICENESS)
+        except OSError:
+            pass
+        # Loaded here, because idle priority is rarely used
+        import ctypes
+        import platform
+        import ctypes.util
+        syscall_number = IOPRIO_SET_SYSCALLS.get(platform.machine())
+        if syscall_number is None:
+            return
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6",
+                           use_errno=True)
+        libc.syscall(syscall_number, IOPRIO_WHO_PROCESS, thread_id,
+                     IOPRIO_CLASS_IDLE << IOPRIO_CLASS_SHIFT)
+
+    def throttle(self, file_size: float) -> None:
+        """
+        Wait until reading a file with the given
+        size is allowed.
+        ----------------------------------------
+        -> Params
+            file_size: float
+                Megabyte
+        """
+        wait = 0
+        if self.files_bucket:
+            wait = self.files_bucket.consume(1)
+        if self.bytes_bucket:
+            wait = max(wait, self.bytes_bucket.consume(file_size * 1024 * 1024))
+        if wait:
+            sleep(wait)
@@ -0,0 +1,222 @@
+"""
+This module gives the directories to the search
+threads. The directories are listed in parallel
+by the threads themselves instead of one shared
+os.walk generator.
+"""
+import os
+from time import sleep
+from time import perf_counter
+from threading import Lock
+from collections import deque
+from typing import Generator
+from .stats import SearchStats
+from .ignoring import IgnoreFilter
+from .ignoring import IgnoreRules
+
+
+def list_directory(dir_path: str,
+                   ignore_filter: IgnoreFilter = None,
+                   rules: IgnoreRules = None,
+                   stats: SearchStats = None) -> tuple:
+    """
+    List a directory the same way of os.walk.
+    Symbolic links to directories are not
+    followed. The excluded and ignored entries
+    are pruned, so they are never listed.
+    -----------------------------------------
+    -> Params
+        dir_path: str
+        ignore_filter: IgnoreFilter
+        rules: IgnoreRules
+            rules that the directory gets from
+            its parents
+        stats: SearchStats
+            counts the pruned directories
+    <- Return
+        tuple: (dir names, file entries, sub directories to walk)
+            sub directories are (path, rules) pairs
+    """
+    dir_names = list()
+    files = list()
+    sub_directories = list()
+    with os.scandir(dir_path) as entries:
+        for entry in entries:
+            try:
+                is_dir = entry.is_dir()
+            except OSError:
+                is_dir = False
+            if not is_dir:
+                files.append(entry)
+                continue
+            dir_names.append(entry.name)
+            try:
+                is_symlink = entry.is_symlink()
+            except OSError:
+                is_symlink = False
+            if not is_symlink:
+                sub_directories.append(entry.name)
+    if ignore_filter:
+        listed_count = len(dir_names)
+        rules = ignore_filter.prune(dir_path, dir_names, files, rules)
+        if len(dir_names) < listed_count:
+            if stats:
+                stats.get_counters().dirs_skipped += listed_count - len(dir_names)
+            kept = set(dir_names)
+            sub_directories = [name for name in sub_directories if name in kept]
+    return dir_names, files, [(os.path.join(dir_path, name), rules)
+                              for name in sub_directories]
+
+
+class WalkSource:
+    """
+    Shares an os.walk like generator, for example
+    the files index walk, between the threads.
+    """
+
+    def __init__(self,
+                 paths: Generator,
+                 stats: SearchStats = None) -> None:
+        """
+        ---------------------------------------
+        -> Params
+            paths: Generator
+                yields (dir path, dir names, file entries)
+            stats: SearchStats
+                records the lock wait time
+        """
+        self.paths = paths
+        self.lock = Lock()
+        self.stats = stats or SearchStats()
+
+    def next_directory(self, worker_index: int) -> tuple:
+        """
+        Returns the next directory of the generator
+        or None when it's exhausted.
+        -------------------------------------------
+        -> Params
+            worker_index: int
+        <- Return
+            tuple: (dir path, dir names, file entries)
+        """
+        started = perf_counter()
+        with self.lock:
+            self.stats.get_counters().lock_wait_time += perf_counter() - started
+            return next(self.paths, None)
+
+
+class WorkStealingTraversal:
+    """
+    Each thread lists its directories with os.scandir
+    and pushes the sub directories to its own deque.
+    A thread takes the newest directory of its own
+    deque and when it's empty, steals the oldest
+    directory of the other threads deques.
+    """
+
+    def __init__(self,
+                 roots: list,
+                 workers_count: int,
+                 idle_sleep: float = 0.001,
+                 stats: SearchStats = None,
+                 ignore_filter: IgnoreFilter = None) -> None:
+        """
+        ---------------------------------------
+        -> Params
+            roots: list of str
+            workers_count: int
+            idle_sleep: float
+                Seconds that an idle thread waits
+                before trying to steal again.
+            stats: SearchStats
+                records the lock wait time and
+                the pruned directories
+            ignore_filter: IgnoreFilter
+                prunes the excluded and ignored
+                directories before they are listed
+        """
+        self.ignore_filter = ignore_filter or IgnoreFilter()
+        self.deques = [deque() for _ in range(workers_count)]
+        for index, root in enumerate(roots):
+            self.deques[index % workers_count].append(
+                (root, self.ignore_filter.get_inherited_rules(root)))
+        # Directories that are queued or being listed
+        self.pending = len(roots)
+        self.lock = Lock()
+        self.idle_sleep = idle_sleep
+        self.stats = stats or SearchStats()
+
+    def next_directory(self, worker_index: int) -> tuple:
+        """
+        Take a directory, list it and returns it in
+        os.walk shape, with the os.DirEntry of the
+        files instead of their names, so their
+        metadata is not discarded. Returns None when
+        all the directories are listed.
+        -------------------------------------------
+        -> Params
+            worker_index: int
+        <- Return
+            tuple: (dir path, dir names, file entries)
+        """
+        while True:
+            directory = self.take(worker_index)
+            if directory is None:
+                if not self.pending:
+                    return None
+                sleep(self.idle_sleep)
+                continue
+            dir_path, rules = directory
+            try:
+                dir_names, files, sub_directories = list_directory(dir_path,
+                                                                   self.ignore_filter,
+                                                                   rules,
+                                                                   self.stats)
+            except OSError:
+                self.finish_directory(worker_index, [])
+                continue
+            self.finish_directory(worker_index, sub_directories)
+            return dir_path, dir_names, files
+
+    def take(self, worker_index: int) -> str:
+        """
+        Pop a directory from the thread deque or
+        steal one from the other deques.
+        ----------------------------------------
+        -> Params
+            worker_index: int
+        <- Return
+            tuple: (dir path, rules) or None
+        """
+        try:
+            return self.deques[worker_index].pop()
+        except IndexError:
+            pass
+        count = len(self.deques)
+        for offset in range(1, count):
+            try:
+                return self.deques[(worker_index + offset) % count].popleft()
+            except IndexError:
+                continue
+        return None
+
+    def finish_directory(self,
+                         worker_index: int,
+                         sub_directories: list) -> None:
+        """
+        Queue the sub directories of a listed
+        directory in the thread deque.
+        -------------------------------------
+        -> Params
+            worker_index: int
+            sub_directories: list of (path, rules)
+        """
+        started = perf_counter()
+        with self.lock:
+            self.stats.get_counters().lock_wait_time += perf_counter() - started
+            # Counted before they are queued, so an idle thread never
+            # sees no pending directory while they are being stolen
+            self.pending += len(sub_directories)
+        self.deques[worker_index].extend(sub_directories)
+        with self.lock:
+            self.pending -= 1
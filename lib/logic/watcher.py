@@ -0,0 +1,388 @@
+"""
+This module keeps the files index up to date by
+listening to the Linux inotify events of the
+search paths.
+"""
+import os
+import sys
+import ctypes
+import select
+import struct
+import ctypes.util
+from time import monotonic
+from threading import Thread
+from typing import Generator
+from lib.errors import WatcherNotSupportedError
+
+# Inotify flags, see inotify(7)
+IN_ATTRIB = 0x00000004
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ONLYDIR = 0x01000000
+IN_ISDIR = 0x40000000
+# The files are recorded again when they are written or
+# their attributes change, their size and mtime are
+# usually not final when they are created
+WATCH_MASK = (IN_CREATE | IN_DELETE | IN_MOVED_FROM | IN_MOVED_TO
+              | IN_CLOSE_WRITE | IN_ATTRIB | IN_ONLYDIR)
+
+EVENT_HEADER = struct.Struct("iIII")
+MAX_USER_WATCHES_PATH = "/proc/sys/fs/inotify/max_user_watches"
+
+
+class IndexWatcher:
+    """
+    Watches the indexed directories of the given
+    roots and applies the creates, writes, renames
+    and deletes to the index as they happen.
+    """
+
+    def __init__(self,
+                 index: object,
+                 paths: list,
+                 max_watches: int = 8192,
+                 poll_interval: float = 0.5,
+                 rescan_interval: float = 60) -> None:
+        """
+        ---------------------------------------
+        -> Params
+            index: FileIndex
+            paths: list of str
+                roots to watch
+            max_watches: int
+                Maximum number of watched directories.
+                Directories beyond the budget are just
+                updated by the rescans.
+            poll_interval: float
+                Seconds to wait for events before
+                checking the watcher is stopped.
+            rescan_interval: float
+                Seconds between the rescans while some
+                directories are not watched.
+        """
+        if not sys.platform.startswith("linux"):
+            raise WatcherNotSupportedError(
+                "Watching the index is only supported on Linux.")
+        self.index = index
+        self.paths = paths
+        self.max_watches = min(max_watches, self.get_system_watch_limit())
+        self.poll_interval = poll_interval
+        self.rescan_interval = rescan_interval
+        self.is_watching = False
+        self.is_complete = True
+        self.watches = dict()
+        self.watched = dict()
+        self.libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6",
+                                use_errno=True)
+        self.fd = None
+
+    def get_system_watch_limit(self) -> int:
+        """
+        Returns the maximum number of watches that
+        a user can have on this system.
+        """
+        try:
+            with open(MAX_USER_WATCHES_PATH) as file:
+                return int(file.read())
+        except (OSError, ValueError):
+            return sys.maxsize
+
+    def start(self) -> None:
+        """
+        Start watching in a background thread.
+        """
+        fd = self.libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if fd < 0:
+            errno = ctypes.get_errno()
+            raise WatcherNotSupportedError(
+                f"Couldn't initialize inotify: {os.strerror(errno)}")
+        self.fd = fd
+        self.is_watching = True
+        self.thread = Thread(target=self.run)
+        self.thread.daemon = True
+        self.thread.start()
+
+    def stop(self) -> None:
+        """
+        Stop watching, the thread closes the
+        inotify file descriptor on exit.
+        """
+        self.is_watching = False
+
+    def run(self) -> None:
+        """
+        Bring the index up to date, watch all the
+        indexed directories and apply the events
+        until the watcher stopped. While the budget
+        doesn't allow watching all the directories,
+        the index is refreshed at the intervals.
+        """
+        connection = self.index.connect()
+        try:
+            self.index.refresh(paths=self.paths)
+            self.add_watches()
+            rescanned_at = monotonic()
+            while self.is_watching:
+                if not self.is_complete and monotonic() - rescanned_at >= self.rescan_interval:
+                    self.rescan()
+                    rescanned_at = monotonic()
+                ready, _, _ = select.select([self.fd], [], [], self.poll_interval)
+                if not ready:
+                    continue
+                with connection:
+                    overflow = self.handle_events(connection, self.read_events())
+                if overflow:
+                    self.rescan()
+                    rescanned_at = monotonic()
+        finally:
+            connection.close()
+            os.close(self.fd)
+
+    def add_watches(self) -> None:
+        """
+        Watch the indexed directories of the roots
+        from top to bottom until the budget finishes.
+        """
+        for dir_path, _, _ in self.index.walk(paths=self.paths):
+            self.add_watch(dir_path)
+
+    def add_watch(self, dir_path: str) -> None:
+        """
+        Watch a directory if the budget allows.
+        ---------------------------------------
+        -> Params
+            dir_path: str
+        """
+        if dir_path in self.watched:
+            return
+        if len(self.watches) >= self.max_watches:
+            self.is_complete = False
+            return
+        wd = self.libc.inotify_add_watch(self.fd, os.fsencode(dir_path), WATCH_MASK)
+        if wd < 0:
+            if ctypes.get_errno() == 28:  # ENOSPC, system limit reached
+                self.is_complete = False
+            return
+        self.watches[wd] = dir_path
+        self.watched[dir_path] = wd
+
+    def remove_watches(self, dir_path: str) -> None:
+        """
+        Remove the watches of a directory and its
+        sub directories.
+        -----------------------------------------
+        -> Params
+            dir_path: str
+        """
+        prefix = os.path.join(dir_path, "")
+        for path in [path for path in self.watched
+                     if path == dir_path or path.startswith(prefix)]:
+            wd = self.watched.pop(path)
+            self.watches.pop(wd, None)
+            self.libc.inotify_rm_watch(self.fd, wd)
+
+    def move_watches(self, old_path: str, new_path: str) -> None:
+        """
+        Change path of the watches of a renamed
+        directory and its sub directories.
+        ---------------------------------------
+        -> Params
+            old_path: str
+            new_path: str
+        """
+        prefix = os.path.join(old_path, "")
+        for path in [path for path in self.watched
+                     if path == old_path or path.startswith(prefix)]:
+            wd = self.watched.pop(path)
+            path = new_path + path[len(old_path):]
+            self.watches[wd] = path
+            self.watched[path] = wd
+
+    def read_events(self) -> Generator:
+        """
+        Read the pending events from the inotify
+        file descriptor.
+        ----------------------------------------
+        <- Return
+            Generator: (wd, mask, cookie, name)
+        """
+        try:
+            buffer = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return
+        offset = 0
+        while offset < len(buffer):
+            wd, mask, cookie, length = EVENT_HEADER.unpack_from(buffer, offset)
+            offset += EVENT_HEADER.size
+            name = buffer[offset:offset + length].rstrip(b"\0")
+            offset += length
+            yield wd, mask, cookie, os.fsdecode(name)
+
+    def handle_events(self,
+                      connection: object,
+                      events: Generator) -> bool:
+        """
+        Apply the events to the index. Moves are
+        paired by their cookie, unpaired moves are
+        handled as creates and deletes.
+        ------------------------------------------
+        -> Params
+            connection: sqlite3.Connection
+            events: Generator
+        <- Return
+            bool: the events queue overflowed
+        """
+        overflow = False
+        moved = dict()
+        # Directories that their entries changed
+        changed = set()
+        for wd, mask, cookie, name in events:
+            if mask & IN_Q_OVERFLOW:
+                overflow = True
+                continue
+            if mask & IN_IGNORED:
+                dir_path = self.watches.pop(wd, None)
+                self.watched.pop(dir_path, None)
+                continue
+            dir_path = self.watches.get(wd)
+            if dir_path is None or not name:
+                continue
+            path = os.path.join(dir_path, name)
+            is_dir = bool(mask & IN_ISDIR)
+            changed.add(dir_path)
+            if mask & IN_MOVED_FROM:
+                moved[cookie] = (path, is_dir)
+            elif mask & IN_MOVED_TO and cookie in moved:
+                old_path, _ = moved.pop(cookie)
+                self.move(connection, old_path, path, is_dir)
+            elif mask & (IN_CREATE | IN_MOVED_TO):
+                self.create(connection, path, is_dir)
+            elif mask & IN_DELETE:
+                self.delete(connection, path, is_dir)
+            elif mask & (IN_CLOSE_WRITE | IN_ATTRIB) and not is_dir:
+                self.update(connection, path)
+        for path, is_dir in moved.values():
+            self.delete(connection, path, is_dir)
+        # The index stays fresh for the applied changes
+        self.index.touch_directories(connection, changed)
+        self.index.touch_roots(connection, self.paths)
+        return overflow
+
+    def create(self,
+               connection: object,
+               path: str,
+               is_dir: bool) -> None:
+        """
+        Add a created file or directory to the
+        index. Created directories are watched
+        and indexed with their contents.
+        ---------------------------------------
+        -> Params
+            connection: sqlite3.Connection
+            path: str
+            is_dir: bool
+        """
+        dir_path, name = os.path.split(path)
+        parent = self.index.get_directory(connection, dir_path)
+        if not parent:
+            return
+        directory_id, root_id = parent
+        if not is_dir:
+            self.index.remove_file(connection, directory_id, name)
+            self.index.add_files(connection, directory_id, dir_path, [name])
+            return
+        root = self.index.get_root_path(connection, root_id)
+        if self.index.search_handler.is_skipped_directory(path, root):
+            return
+        # Watched before they are indexed, so the entries that are
+        # created meanwhile are indexed or get their own events
+        for watched_path, _, _ in self.index.search_handler.ignore_filter.walk(path, root):
+            self.add_watch(watched_path)
+        for added_path in self.index.add_tree(connection, root_id, path):
+            self.add_watch(added_path)
+
+    def update(self,
+               connection: object,
+               path: str) -> None:
+        """
+        Record the current size and mtime of a
+        written or changed file.
+        ---------------------------------------
+        -> Params
+            connection: sqlite3.Connection
+            path: str
+        """
+        dir_path, name = os.path.split(path)
+        parent = self.index.get_directory(connection, dir_path)
+        if not parent:
+            return
+        self.index.remove_file(connection, parent[0], name)
+        self.index.add_files(connection, parent[0], dir_path, [name])
+
+    def delete(self,
+               connection: object,
+               path: str,
+               is_dir: bool) -> None:
+        """
+        Remove a deleted file or directory from
+        the index.
+        ---------------------------------------
+        -> Params
+            connection: sqlite3.Connection
+            path: str
+            is_dir: bool
+        """
+        if is_dir:
+            self.index.remove_tree(connection, path)
+            self.remove_watches(path)
+            return
+        dir_path, name = os.path.split(path)
+        parent = self.index.get_directory(connection, dir_path)
+        if parent:
+            self.index.remove_file(connection, parent[0], name)
+
+    def move(self,
+             connection: object,
+             old_path: str,
+             new_path: str,
+             is_dir: bool) -> None:
+        """
+        Apply a rename inside the watched roots.
+        Renamed directories keep their records
+        and watches with the new path.
+        ----------------------------------------
+        -> Params
+            connection: sqlite3.Connection
+            old_path: str
+            new_path: str
+            is_dir: bool
+        """
+        is_indexed = self.index.get_directory(connection, old_path)
+        if not is_dir or not is_indexed:
+            self.delete(connection, old_path, is_dir)
+            self.create(connection, new_path, is_dir)
+            return
+        parent = self.index.get_directory(connection, os.path.dirname(new_path))
+        if not parent or self.index.search_handler.is_skipped_directory(
+                new_path, self.index.get_root_path(connection, parent[1])):
+            self.delete(connection, old_path, is_dir)
+            return
+        self.index.move_tree(connection, parent[1], old_path, new_path)
+        self.move_watches(old_path, new_path)
+
+    def rescan(self) -> None:
+        """
+        After the events queue overflowed some
+        changes are lost, and the directories
+        beyond the budget are not watched, so
+        refresh the changed directories and watch
+        the new ones. It must run out of the
+        events transaction.
+        """
+        self.index.refresh(paths=self.paths)
+        self.add_watches()
@@ -0,0 +1,74 @@
+"""
+Checks the exit codes of the command line mode,
+0 when something is found, 1 when nothing is
+found and 2 for the errors.
+"""
+import os
+import sys
+import subprocess
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def run_cli(*arguments: str) -> subprocess.CompletedProcess:
+    """
+    Run the command line mode in a new process.
+    -------------------------------------------
+    -> Params
+        arguments: str
+    <- Return
+        subprocess.CompletedProcess
+    """
+    return subprocess.run([sys.executable, "-m", "lib.cli", *arguments], cwd=ROOT,
+                          capture_output=True, text=True, timeout=60)
+
+
+@pytest.fixture
+def tree(tmp_path) -> str:
+    os.makedirs(tmp_path / "sub")
+    (tmp_path / "sub" / "needle_name.txt").write_text("nothing here")
+    (tmp_path / "content.txt").write_text("a needle in the content")
+    return str(tmp_path)
+
+
+def test_found(tree: str) -> None:
+    process = run_cli("needle", "-p", tree)
+    assert process.returncode == 0
+    assert process.stdout.splitlines() == [os.path.join(tree, "sub", "needle_name.txt")]
+
+
+def test_found_in_file(tree: str) -> None:
+    process = run_cli("content", "-p", tree, "-i", "-e", "txt")
+    assert process.returncode == 0
+    assert os.path.join(tree, "content.txt") in process.stdout.splitlines()
+
+
+def test_not_found(tree: str) -> None:
+    process = run_cli("missing", "-p", tree, "-i")
+    assert process.returncode == 1
+    assert process.stdout == ""
+
+
+def test_not_a_directory(tree: str) -> None:
+    process = run_cli("needle", "-p", os.path.join(tree, "nowhere"))
+    assert process.returncode == 2
+    assert "not a directory" in process.stderr
+
+
+def test_invalid_regex(tree: str) -> None:
+    process = run_cli("(", "-p", tree, "-r")
+    assert process.returncode == 2
+    assert "invalid regex pattern" in process.stderr
+
+
+def test_invalid_threads_count(tree: str) -> None:
+    assert run_cli("needle", "-p", tree, "-t", "0").returncode == 2
+
+
+def test_unknown_file_type(tree: str) -> None:
+    assert run_cli("needle", "-p", tree, "-T", "nosuchtype").returncode == 2
+
+
+def test_usage_error() -> None:
+    assert run_cli().returncode == 2
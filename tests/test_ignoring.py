@@ -0,0 +1,130 @@
+"""
+Checks the .gitignore syntax of the ignore files
+and the pruning of the ignored entries.
+"""
+import os
+import pytest
+from lib.logic.ignoring import IgnoreFile
+from lib.logic.ignoring import IgnoreRules
+from lib.logic.ignoring import IgnoreFilter
+from lib.logic.ignoring import parse_ignore_line
+
+BASE = "/repo"
+
+
+def is_ignored(lines: list, path: str, is_dir: bool = False) -> bool:
+    """
+    Checks a path relative to the base is ignored
+    by the lines of one ignore file.
+    ---------------------------------------------
+    -> Params
+        lines: list of str
+        path: str
+        is_dir: bool
+    <- Return
+        bool
+    """
+    return IgnoreRules((IgnoreFile(BASE, lines),)).is_ignored(f"{BASE}/{path}", is_dir)
+
+
+@pytest.mark.parametrize("line", ["", "   ", "# comment", "/", "!"])
+def test_no_rule(line: str) -> None:
+    assert parse_ignore_line(line) is None
+
+
+def test_rule_flags() -> None:
+    assert parse_ignore_line("!keep.log\n")[1:] == (True, False)
+    assert parse_ignore_line("build/")[1:] == (False, True)
+    assert parse_ignore_line("\\#file")[1:] == (False, False)
+
+
+@pytest.mark.parametrize("path, expected", [
+    ("debug.log", True),
+    ("src/deep/debug.log", True),
+    ("debug.log.txt", False),
+    ("debug_log", False),
+])
+def test_unanchored(path: str, expected: bool) -> None:
+    assert is_ignored(["*.log"], path) is expected
+
+
+def test_escaped_hash() -> None:
+    assert is_ignored(["\\#notes"], "#notes")
+
+
+def test_trailing_spaces() -> None:
+    assert is_ignored(["spaced   "], "spaced")
+    assert is_ignored(["spaced\\ "], "spaced ")
+    assert not is_ignored(["spaced\\ "], "spaced")
+
+
+@pytest.mark.parametrize("path, expected", [
+    ("top.txt", True),
+    ("sub/top.txt", False),
+])
+def test_anchored(path: str, expected: bool) -> None:
+    assert is_ignored(["/top.txt"], path) is expected
+
+
+@pytest.mark.parametrize("path, expected", [
+    ("doc/a.pdf", True),
+    ("doc/x/y/a.pdf", True),
+    ("other/doc/a.pdf", False),
+    ("doc/a.txt", False),
+])
+def test_double_star_middle(path: str, expected: bool) -> None:
+    assert is_ignored(["doc/**/*.pdf"], path) is expected
+
+
+def test_double_star_leading_and_trailing() -> None:
+    assert is_ignored(["**/cache"], "a/b/cache", True)
+    assert is_ignored(["logs/**"], "logs/x/y.txt")
+    assert not is_ignored(["logs/**"], "other/logs/y.txt")
+
+
+def test_single_star_stops_at_separator() -> None:
+    assert is_ignored(["a/*.c"], "a/x.c")
+    assert not is_ignored(["a/*.c"], "a/b/x.c")
+
+
+def test_negation() -> None:
+    lines = ["*.log", "!keep.log"]
+    assert is_ignored(lines, "debug.log")
+    assert not is_ignored(lines, "keep.log")
+    # The last matching rule decides
+    assert is_ignored(lines + ["keep.log"], "keep.log")
+
+
+def test_directory_rule() -> None:
+    assert is_ignored(["build/"], "build", True)
+    assert not is_ignored(["build/"], "build", False)
+
+
+def test_character_class() -> None:
+    assert is_ignored(["file[0-9].txt"], "file3.txt")
+    assert not is_ignored(["file[!0-9].txt"], "file3.txt")
+    assert is_ignored(["file[!0-9].txt"], "filex.txt")
+
+
+def test_inner_rules_take_precedence() -> None:
+    rules = IgnoreRules((IgnoreFile(BASE, ["*.log"]),
+                         IgnoreFile(f"{BASE}/src", ["!keep.log"])))
+    assert not rules.is_ignored(f"{BASE}/src/keep.log", False)
+    assert rules.is_ignored(f"{BASE}/keep.log", False)
+
+
+def test_walk_prunes(tmp_path) -> None:
+    root = str(tmp_path)
+    for path in ("kept/a.txt", "ignored/b.txt", "node_modules/c.txt", "d.log", "e.txt"):
+        os.makedirs(os.path.dirname(os.path.join(root, path)), exist_ok=True)
+        with open(os.path.join(root, path), "w"):
+            pass
+    os.mkdir(os.path.join(root, ".git"))
+    with open(os.path.join(root, ".gitignore"), "w") as file:
+        file.write("ignored/\n*.log\n")
+    ignore_filter = IgnoreFilter(excluded_directories=[".git", "node_*"],
+                                 use_ignore_files=True)
+    walked = {os.path.relpath(os.path.join(dir_path, name), root)
+              for dir_path, _, names in ignore_filter.walk(root)
+              for name in names}
+    assert walked == {".gitignore", "e.txt", os.path.join("kept", "a.txt")}
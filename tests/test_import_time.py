@@ -0,0 +1,49 @@
+"""
+Checks the search engine loads fast and without
+the GUI and the modules that are imported just
+when a feature needs them.
+"""
+import os
+import sys
+import json
+import subprocess
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# Seconds for importing the engine in a fresh interpreter
+IMPORT_BUDGET = 0.1
+DEFERRED_MODULES = ("PyQt5", "sqlite3", "multiprocessing", "ctypes")
+SCRIPT = """
+import sys
+import json
+from time import perf_counter
+started = perf_counter()
+import lib.logic.search_algorithm
+import lib.errors
+import lib.constants
+elapsed = perf_counter() - started
+print(json.dumps({"elapsed": elapsed,
+                  "loaded": [name for name in %r if name in sys.modules]}))
+""" % (DEFERRED_MODULES,)
+
+
+def import_engine() -> dict:
+    """
+    Import the engine in a new interpreter and
+    returns its import time and the deferred
+    modules that were loaded.
+    ------------------------------------------
+    <- Return
+        dict: {"elapsed": float, "loaded": list of str}
+    """
+    output = subprocess.run([sys.executable, "-c", SCRIPT], cwd=ROOT,
+                            capture_output=True, text=True, check=True).stdout
+    return json.loads(output)
+
+
+def test_import_time() -> None:
+    result = import_engine()
+    assert result["elapsed"] < IMPORT_BUDGET, result
+
+
+def test_deferred_modules_not_loaded() -> None:
+    assert import_engine()["loaded"] == []
@@ -0,0 +1,114 @@
+"""
+Checks the matchers of the targets find all the
+targets in the names and the raw contents, and
+the required literals of the regex targets.
+"""
+import pytest
+from lib.logic.matching import LOWER_WINDOW
+from lib.logic.matching import TargetMatcher
+from lib.logic.matching import RegexMatcher
+from lib.logic.matching import get_required_literal
+
+
+def test_overlapping_targets() -> None:
+    matcher = TargetMatcher(["he", "she", "his", "hers"])
+    assert matcher.find("USHERS") == {"he", "she", "hers"}
+
+
+def test_target_inside_another() -> None:
+    matcher = TargetMatcher(["abc", "b"])
+    assert matcher.find("xabcx") == {"abc", "b"}
+    assert matcher.find("xbx") == {"b"}
+
+
+def test_no_target() -> None:
+    matcher = TargetMatcher(["needle", "pin"])
+    assert matcher.find("haystack") == set()
+    assert not matcher.is_match("haystack")
+    assert matcher.is_match("a PIN")
+
+
+def test_empty_targets() -> None:
+    matcher = TargetMatcher(["", ""])
+    assert matcher.find("anything") == set()
+    assert not matcher.is_match("anything")
+
+
+def test_lowered_text() -> None:
+    matcher = TargetMatcher(["Needle"])
+    assert matcher.find("a needle", is_lower=True) == {"needle"}
+
+
+@pytest.mark.parametrize("encodings, data", [
+    (("utf-8", "latin-1"), "Über ÜBER".encode("utf-8")),
+    (("utf-8", "latin-1"), "ÜBER".encode("latin-1")),
+    (("utf-16-le",), "xx ÜBER xx".encode("utf-16-le")),
+    (("utf-16-be",), "xx über xx".encode("utf-16-be")),
+])
+def test_bytes_encodings(encodings: tuple, data: bytes) -> None:
+    matcher = TargetMatcher(["über"]).get_bytes_matcher(encodings)
+    assert matcher.find(data) == {"über"}
+
+
+def test_bytes_overlapping_targets() -> None:
+    matcher = TargetMatcher(["abc", "bcd", "ab", "zz"]).get_bytes_matcher()
+    assert matcher.find(b"xxABCDxx") == {"abc", "bcd", "ab"}
+
+
+def test_bytes_range() -> None:
+    matcher = TargetMatcher(["one", "two"]).get_bytes_matcher()
+    data = b"one two"
+    assert matcher.find(data, 3) == {"two"}
+    assert matcher.find(data, 0, 5) == {"one"}
+
+
+@pytest.mark.parametrize("pattern, literal", [
+    ("needle", "needle"),
+    ("NEEDLE", "needle"),
+    ("foo.*barbaz", "barbaz"),
+    ("colou?r", "colo"),
+    ("(?:hello)+ w", "hello"),
+    ("(?:hello)+ world", " world"),
+    ("x{2}", "x"),
+    ("(abc|xyz)", ""),
+    ("[abc]+", ""),
+    ("(?:optional)?", ""),
+    ("żółw", "w"),
+    ("żół", ""),
+    ("(", ""),
+])
+def test_required_literal(pattern: str, literal: str) -> None:
+    assert get_required_literal(pattern) == literal
+
+
+def test_invalid_regex() -> None:
+    with pytest.raises(ValueError):
+        RegexMatcher(["("])
+
+
+def test_regex_targets() -> None:
+    matcher = RegexMatcher([r"fin\w+", "(cat|dog)s", "never"])
+    assert matcher.find("The FINAL dogs") == {r"fin\w+", "(cat|dog)s"}
+    assert matcher.literals == ("fin", "s", "never")
+
+
+def test_regex_without_literal() -> None:
+    # The texts can't be filtered by the literals
+    matcher = RegexMatcher(["needle", "[0-9]+"])
+    assert matcher.literals is None
+    assert matcher.find("page 42") == {"[0-9]+"}
+
+
+def test_regex_bytes() -> None:
+    matcher = RegexMatcher([r"need\w+"]).get_bytes_matcher()
+    assert matcher.find(b"a NEEDLES b") == {r"need\w+"}
+    assert matcher.find(b"a need b") == set()
+
+
+def test_regex_decoded_windows() -> None:
+    # The match crosses the boundary of the first decoded window
+    text = "é" * (LOWER_WINDOW // 4 - 2) + "ŻÓŁW" + "x" * LOWER_WINDOW
+    matcher = RegexMatcher(["żółw"])
+    for encoding in ("utf-16-le", "utf-8"):
+        bytes_matcher = matcher.get_bytes_matcher((encoding,))
+        assert bytes_matcher.find(text.encode(encoding)) == {"żółw"}
@@ -0,0 +1,100 @@
+"""
+Checks the query plan orders the checks of the
+files by their rank and reorders them by the
+observed pass rates.
+"""
+import pytest
+from lib.logic.matching import TargetMatcher
+from lib.logic.planning import PlanStage
+from lib.logic.planning import QueryPlan
+from lib.logic.planning import READ_COST
+from lib.logic.planning import UPDATE_INTERVAL
+from lib.logic.planning import MIN_OBSERVED_FILES
+from lib.logic.planning import DEFAULT_PASS_RATES
+
+
+class Stats:
+    """
+    Counters of the search with a fixed snapshot.
+    """
+
+    def __init__(self, snapshot: dict) -> None:
+        self.values = snapshot
+
+    def snapshot(self) -> dict:
+        return dict(self.values)
+
+
+def make_plan(costs: dict) -> QueryPlan:
+    """
+    Returns the plan of the stages with the given
+    costs that pass all the files.
+    ------------------------------------------
+    -> Params
+        costs: dict
+            {stage name: cost}
+    <- Return
+        QueryPlan
+    """
+    stages = [PlanStage(name, lambda *args: True, cost) for name, cost in costs.items()]
+    return QueryPlan(TargetMatcher(["needle"]), stages, [("read", "test")])
+
+
+def get_names(plan: QueryPlan) -> list:
+    return [stage.name for stage in plan.stages]
+
+
+def test_rank() -> None:
+    stage = PlanStage("size", None, 25)
+    assert stage.rank == pytest.approx(25 / (1 - DEFAULT_PASS_RATES["size"]))
+    stage.pass_rate = 1
+    # A check that rejects nothing is the last one
+    assert stage.rank > 1e6
+
+
+def test_order_by_rank() -> None:
+    # extension 1 / 0.7, index 27 / 0.8, size 25 / 0.05
+    plan = make_plan({"size": 25, "index": 27, "extension": 1})
+    assert get_names(plan) == ["extension", "index", "size"]
+
+
+def test_update_reorders() -> None:
+    plan = make_plan({"extension": 1, "size": 1})
+    assert get_names(plan) == ["extension", "size"]
+    plan.update({"files_checked_extension": 1000, "files_skipped_extension": 0,
+                 "files_checked_size": 1000, "files_skipped_size": 900})
+    assert get_names(plan) == ["size", "extension"]
+    assert all(stage.is_observed for stage in plan.stages)
+
+
+def test_update_needs_enough_files() -> None:
+    plan = make_plan({"extension": 1, "size": 1})
+    plan.update({"files_checked_size": MIN_OBSERVED_FILES - 1,
+                 "files_skipped_size": MIN_OBSERVED_FILES - 1})
+    assert get_names(plan) == ["extension", "size"]
+    assert not any(stage.is_observed for stage in plan.stages)
+
+
+def test_observe_updates_at_intervals() -> None:
+    plan = make_plan({"extension": 1, "size": 1})
+    stats = Stats({"files_checked_size": 1000, "files_skipped_size": 1000})
+    plan.observe(UPDATE_INTERVAL - 1, stats)
+    assert get_names(plan) == ["extension", "size"]
+    plan.observe(1, stats)
+    assert get_names(plan) == ["size", "extension"]
+
+
+def test_explain() -> None:
+    plan = make_plan({"extension": 1, "size": 25})
+    text = plan.explain({"files_checked_size": 10, "files_skipped_size": 2,
+                         "files_read": 8})
+    lines = text.splitlines()
+    assert lines[0] == "QUERY PLAN  targets: needle"
+    assert "1. extension" in text and "2. size" in text
+    assert "checked 10  skipped 2" in text
+    assert lines[-1].strip() == f"3. read       cost {READ_COST}  read 8"
+
+
+def test_explain_without_stages() -> None:
+    plan = make_plan({})
+    assert plan.explain() == "QUERY PLAN  targets: needle\n  read         test"
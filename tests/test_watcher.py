@@ -0,0 +1,121 @@
+"""
+Checks the index watcher applies the creates,
+renames and deletes of a local tree to the
+files index.
+"""
+import os
+import sys
+from time import sleep
+from time import monotonic
+import pytest
+from lib.logic.indexing import FileIndex
+from lib.logic.search_algorithm import Search
+from lib.logic.ignoring import IgnoreFilter
+
+pytestmark = pytest.mark.skipif(not sys.platform.startswith("linux"),
+                                reason="inotify is only available on Linux")
+# Seconds to wait for the watcher to apply an event
+TIMEOUT = 5
+
+
+def wait_until(condition: object) -> bool:
+    """
+    Wait until the condition is true or the
+    timeout passes.
+    ---------------------------------------
+    -> Params
+        condition: Callable
+    <- Return
+        bool
+    """
+    deadline = monotonic() + TIMEOUT
+    while monotonic() < deadline:
+        if condition():
+            return True
+        sleep(0.02)
+    return condition()
+
+
+def get_paths(index: FileIndex, target: str, root: str) -> set:
+    """
+    Returns the indexed paths that their names
+    have the target.
+    ------------------------------------------
+    -> Params
+        index: FileIndex
+        target: str
+        root: str
+    <- Return
+        set of str
+    """
+    return {result.path for result in index.search_names(targets=[target], paths=[root])}
+
+
+@pytest.fixture
+def watched(tmp_path):
+    from lib.logic.watcher import IndexWatcher
+    root = str(tmp_path / "tree")
+    os.makedirs(os.path.join(root, "old_dir"))
+    with open(os.path.join(root, ".gitignore"), "w") as file:
+        file.write("skipped_zone/\n")
+    os.mkdir(os.path.join(root, ".git"))
+    with open(os.path.join(root, "old_dir", "kept.txt"), "w") as file:
+        file.write("kept")
+    search_handler = Search(in_file_search=False,
+                            ignore_filter=IgnoreFilter(use_ignore_files=True))
+    index = FileIndex(search_handler=search_handler,
+                      index_path=str(tmp_path / "index.db"))
+    index.build(paths=[root])
+    watcher = IndexWatcher(index=index, paths=[root], poll_interval=0.05)
+    watcher.start()
+    assert wait_until(lambda: root in watcher.watched)
+    yield index, root
+    watcher.stop()
+    watcher.thread.join(TIMEOUT)
+
+
+def test_create(watched) -> None:
+    index, root = watched
+    path = os.path.join(root, "old_dir", "created.txt")
+    with open(path, "w") as file:
+        file.write("created")
+    assert wait_until(lambda: get_paths(index, "created", root) == {path})
+
+
+def test_create_directory(watched) -> None:
+    index, root = watched
+    os.makedirs(os.path.join(root, "new_dir", "inner"))
+    path = os.path.join(root, "new_dir", "inner", "deep.txt")
+    with open(path, "w") as file:
+        file.write("deep")
+    assert wait_until(lambda: get_paths(index, "deep", root) == {path})
+
+
+def test_create_ignored_directory(watched) -> None:
+    index, root = watched
+    os.makedirs(os.path.join(root, "skipped_zone"))
+    with open(os.path.join(root, "skipped_zone", "hidden.txt"), "w") as file:
+        file.write("hidden")
+    # A later event shows the events before it are applied
+    path = os.path.join(root, "marker.txt")
+    with open(path, "w") as file:
+        file.write("marker")
+    assert wait_until(lambda: get_paths(index, "marker", root) == {path})
+    assert get_paths(index, "hidden", root) == set()
+    assert get_paths(index, "skipped_zone", root) == set()
+
+
+def test_rename(watched) -> None:
+    index, root = watched
+    os.rename(os.path.join(root, "old_dir"), os.path.join(root, "renamed_dir"))
+    path = os.path.join(root, "renamed_dir", "kept.txt")
+    assert wait_until(lambda: get_paths(index, "kept", root) == {path})
+    assert get_paths(index, "old_dir", root) == set()
+
+
+def test_delete(watched) -> None:
+    index, root = watched
+    os.remove(os.path.join(root, "old_dir", "kept.txt"))
+    assert wait_until(lambda: get_paths(index, "kept", root) == set())
+    os.rmdir(os.path.join(root, "old_dir"))
+    assert wait_until(lambda: get_paths(index, "old_dir", root) == set())